@@ -0,0 +1,235 @@
+"""Batch extraction: route many PDFs across a process pool and stream one JSON line per document.
+
+Usage:
+    python batch.py <directory|manifest.txt> [--output results.jsonl] [--workers N] [--extractor NAME]
+                    [--journal results.jsonl.journal]
+
+A manifest is a text file with one PDF path per line (relative paths are
+resolved against the manifest's directory; blank lines and # comments are
+skipped). Throughput is reported on stderr when the run finishes.
+
+With --output, every outcome is checkpointed to a journal next to it. Running
+the same command again resumes: documents already extracted (same path and
+content hash) are skipped, failed and interrupted ones are processed again,
+and their new line supersedes any earlier one for the same file. Delete the
+journal to start over.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+_extractor = None
+
+
+def collect_files(source):
+    """PDFs under a directory (recursively, sorted), or the paths listed in a manifest."""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(str(path) for path in source.rglob("*") if path.suffix.lower() == ".pdf")
+    files = []
+    for line in source.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        path = Path(line)
+        files.append(str(path if path.is_absolute() else source.parent / path))
+    return files
+
+
+def file_digest(path):
+    """sha256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointJournal:
+    """Append-only log of each document's status and the output offset its record was committed at."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.offset = 0
+        valid_end = 0
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                for line in file:
+                    # A torn last line (killed mid-write) is dropped along with anything after it
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_end += len(line)
+                    self._apply(entry)
+            os.truncate(path, valid_end)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _apply(self, entry):
+        if entry["status"] == "ok":
+            self.done[entry["file"]] = entry["sha256"]
+        else:
+            self.done.pop(entry["file"], None)
+        if entry.get("offset") is not None:
+            self.offset = entry["offset"]
+
+    def is_done(self, path, digest):
+        return self.done.get(path) == digest
+
+    def record(self, path, digest, status, offset=None):
+        entry = {"file": path, "sha256": digest, "status": status, "offset": offset}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(entry)
+
+    def reset(self):
+        self._file.truncate(0)
+        self.done = {}
+        self.offset = 0
+
+    def close(self):
+        self._file.close()
+
+
+def _init_worker(extractor):
+    """Warm a pool worker: one OCR page at a time, every extractor script imported up front."""
+    global _extractor
+    # Extractors print diagnostics to stdout, which may be carrying the JSONL stream
+    sys.stdout = sys.stderr
+    # The pool already runs one document per core; nested OCR pools would oversubscribe it
+    os.environ["OCR_MAX_WORKERS"] = "1"
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    import router
+    _extractor = extractor
+    names = [extractor] if extractor else list(router.EXTRACTORS)
+    for name in names:
+        try:
+            router.load_script(router.EXTRACTORS[name].script)
+        except Exception as e:
+            print(f"Warning: could not preload {name}: {e}", file=sys.stderr)
+
+
+def process_file(path):
+    """Extract one document in a worker; always returns a JSON-serializable record."""
+    import router
+    start = time.perf_counter()
+    record = {"file": path, "status": "ok", "pages": 0}
+    try:
+        # One open for the page count, classification and extraction
+        with router.PdfDocument(path) as document:
+            record["pages"] = len(document)
+            result = router.extract_document(document, _extractor)
+        if result is None:
+            record["status"] = "failed"
+        record["result"] = result
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(files, output, workers=None, extractor=None, journal=None):
+    """Process files across a pool, writing each record to output as soon as it completes.
+
+    At most two documents per worker are in flight, so after a crash only those
+    are processed again; with a journal, completed documents are skipped.
+    """
+    totals = {"documents": 0, "pages": 0, "failed": 0, "skipped": 0}
+    window = 2 * (workers or os.cpu_count() or 1)
+    pending = iter(files)
+    in_flight = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(extractor,)) as executor:
+
+        def submit_next():
+            for path in pending:
+                digest = file_digest(path) if journal else None
+                if journal and journal.is_done(path, digest):
+                    totals["skipped"] += 1
+                    continue
+                if journal:
+                    journal.record(path, digest, "started")
+                in_flight[executor.submit(process_file, path)] = (path, digest)
+                return True
+            return False
+
+        while len(in_flight) < window and submit_next():
+            pass
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, digest = in_flight.pop(future)
+                record = future.result()
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                if journal:
+                    # The record is durable before the journal points past it
+                    os.fsync(output.fileno())
+                    journal.record(path, digest, record["status"], output.tell())
+                totals["documents"] += 1
+                totals["pages"] += record["pages"]
+                if record["status"] != "ok":
+                    totals["failed"] += 1
+                submit_next()
+    return totals
+
+
+def open_checkpointed_output(output_path, journal):
+    """Open output for appending, cut back to the last record the journal committed."""
+    size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    if size < journal.offset:
+        print(f"Warning: {output_path} is shorter than {journal.path} records; starting over", file=sys.stderr)
+        journal.reset()
+    output = open(output_path, "a", encoding="utf-8")
+    # Lines written after the last journal entry belong to documents that will be redone
+    output.truncate(journal.offset)
+    output.seek(0, os.SEEK_END)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory to walk for PDFs, or a manifest file listing them")
+    parser.add_argument("--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--extractor", help="skip classification and use this extractor for every file")
+    parser.add_argument("--journal", help="checkpoint journal (default: <output>.journal; needs --output)")
+    args = parser.parse_args()
+
+    files = collect_files(args.source)
+    if not files:
+        print(f"No PDF files found in {args.source}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    if args.output:
+        journal = CheckpointJournal(args.journal or args.output + ".journal")
+        try:
+            with open_checkpointed_output(args.output, journal) as output:
+                totals = run_batch(files, output, args.workers, args.extractor, journal)
+        finally:
+            journal.close()
+    else:
+        totals = run_batch(files, sys.stdout, args.workers, args.extractor)
+    elapsed = time.perf_counter() - start
+
+    print(f"{totals['documents']} documents, {totals['pages']} pages, {totals['failed']} failed, "
+          f"{totals['skipped']} already done "
+          f"in {elapsed:.1f}s: {totals['documents'] / elapsed:.2f} docs/sec, "
+          f"{totals['pages'] / elapsed:.2f} pages/sec", file=sys.stderr)
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,748 @@
+"""Benchmarks for the extraction pipeline.
+
+Usage:
+    python benchmark.py concurrent <file.pdf> [--clients 8] [--rounds 3]
+    python benchmark.py rasterize <file.pdf> [--repeat 5] [--ocr]
+    python benchmark.py ocr-backends <file.pdf> [--repeat 3] [--psm 6]
+    python benchmark.py patterns <letter.txt>... [--repeat 200]
+    python benchmark.py fields <letter.txt>... [--repeat 200] [--copies 1]
+    python benchmark.py router <file.pdf>... [--repeat 3]
+    python benchmark.py upload <scan.pdf> [--repeat 3]
+    python benchmark.py regions <scan.pdf>... [--repeat 3]
+    python benchmark.py preprocess <scan.pdf>... [--pipelines binarize deskew,denoise,binarize]
+    python benchmark.py tables <mdindia.pdf>... [--repeat 5]
+    python benchmark.py layout <letter.pdf>... [--repeat 200]
+    python benchmark.py memory <letter.pdf> [--pages 5 20 60] [--dpi 200]
+    python benchmark.py startup [--repeat 5]
+"""
+import argparse
+import base64
+import io
+import multiprocessing
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import router
+
+# Template scripts whose DataExtractor.patterns come from a module-level compiled registry
+EXTRACTOR_SCRIPTS = ("icici_approval.py", "scannedpdf_icici.py", "scan_spam_icici.py", "care-health_approval.py")
+
+
+def report(label, latencies, wall=None):
+    """Print latency percentiles (in milliseconds) for a list of timings in seconds."""
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    line = (f"{label:<24} n={len(latencies):<4} "
+            f"p50={statistics.median(latencies) * 1000:8.1f}ms "
+            f"p95={p95 * 1000:8.1f}ms "
+            f"max={latencies[-1] * 1000:8.1f}ms")
+    if wall:
+        line += f"  throughput={len(latencies) / wall:6.2f}/s"
+    print(line)
+
+
+def run_concurrently(fn, clients, rounds):
+    """Call fn() `clients` times in parallel for `rounds` rounds; return (latencies, wall time)."""
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    latencies = []
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for _ in range(rounds):
+            latencies.extend(executor.map(timed, range(clients)))
+    return latencies, time.perf_counter() - wall_start
+
+
+def render_pdf(pdf_bytes):
+    """Rasterize every page of an in-memory PDF without touching the filesystem."""
+    import fitz
+    from ocr_engine import render_page
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [render_page(page) for page in doc]
+    finally:
+        doc.close()
+
+
+def bench_concurrent(args):
+    """Latency of /api/extract and of page rasterization under concurrent uploads."""
+    import icici
+
+    pdf_bytes = Path(args.file).read_bytes()
+    payload = {
+        "document": [{
+            "fileName": Path(args.file).name,
+            "fileContent": base64.b64encode(pdf_bytes).decode("ascii"),
+        }],
+        "preprocess": False,
+    }
+
+    def rasterize_in_memory():
+        render_pdf(pdf_bytes)
+
+    def rasterize_via_tempfile():
+        # The previous approach: spill the upload to disk and let pdf2image re-read it
+        from pdf2image import convert_from_bytes
+        convert_from_bytes(pdf_bytes)
+
+    def api_extract():
+        response = icici.app.test_client().post('/api/extract', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(response.get_data(as_text=True))
+
+    print(f"{args.clients} concurrent clients x {args.rounds} rounds on {args.file}")
+    report("rasterize (in-memory)", *run_concurrently(rasterize_in_memory, args.clients, args.rounds))
+    try:
+        report("rasterize (tempfile)", *run_concurrently(rasterize_via_tempfile, args.clients, args.rounds))
+    except ImportError:
+        print("rasterize (tempfile)     skipped: pdf2image is not installed")
+    report("/api/extract", *run_concurrently(api_extract, args.clients, args.rounds))
+
+
+def _rasterize_worker(path, mode, repeat, ocr):
+    """Rasterize (and optionally OCR) every page in a fresh process; return (s/page, peak RSS in MB)."""
+    import io
+    import fitz
+    from PIL import Image
+    from ocr_engine import ocr_image, render_page
+
+    doc = fitz.open(path)
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            if mode == "png":
+                # The previous path: RGB pixmap -> PNG bytes -> decoded PIL image
+                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                image = Image.open(io.BytesIO(pix.tobytes("png")))
+                image.load()
+            else:
+                image = render_page(page, dpi=144, grayscale=(mode == "raw-gray"))
+            if ocr:
+                ocr_image(image, config='--psm 4')
+            pages += 1
+    elapsed = time.perf_counter() - start
+    doc.close()
+    return elapsed / pages, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_rasterize(args):
+    """Per-page time and peak RSS of the PNG round-trip versus the raw pixmap handoff."""
+    context = multiprocessing.get_context("spawn")
+    print(f"{args.file}: 2x zoom, {args.repeat} passes{', with OCR' if args.ocr else ''}")
+    for mode in ("png", "raw-rgb", "raw-gray"):
+        # A fresh process per mode so peak RSS is not polluted by the previous run
+        with context.Pool(1) as pool:
+            per_page, peak_mb = pool.apply(_rasterize_worker, (args.file, mode, args.repeat, args.ocr))
+        print(f"{mode:<10} {per_page * 1000:8.1f} ms/page   peak RSS {peak_mb:8.1f} MB")
+
+
+def bench_ocr_backends(args):
+    """Per-page OCR latency of the pytesseract and persistent tesserocr backends."""
+    import fitz
+    from ocr_engine import PytesseractBackend, TesserocrBackend, render_page
+
+    doc = fitz.open(args.file)
+    images = [render_page(page, dpi=144) for page in doc]
+    doc.close()
+    config = f'--psm {args.psm}'
+
+    backends = [PytesseractBackend()]
+    try:
+        backends.append(TesserocrBackend())
+    except ImportError:
+        print("tesserocr is not installed; only pytesseract will be measured")
+
+    print(f"{args.file}: {len(images)} pages, {args.repeat} passes, {config}")
+    for backend in backends:
+        # First call pays the model load; report it separately from the steady state
+        start = time.perf_counter()
+        backend.image_to_string(images[0], 'eng', config)
+        first = time.perf_counter() - start
+        latencies = []
+        for _ in range(args.repeat):
+            for image in images:
+                start = time.perf_counter()
+                backend.image_to_string(image, 'eng', config)
+                latencies.append(time.perf_counter() - start)
+        report(backend.name, latencies)
+        print(f"{'':<24} first page {first * 1000:.1f}ms")
+
+
+def bench_patterns(args):
+    """Field-extraction throughput on already-extracted text: compiled registry versus raw strings."""
+    texts = [Path(file).read_text() for file in args.files]
+    letters = len(texts) * args.repeat
+
+    def throughput(label, fn, before_letter=None):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in texts:
+                if before_letter:
+                    before_letter()
+                fn(text)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<50} {letters / elapsed * 60:12,.0f} letters/min")
+
+    print(f"{len(texts)} letters x {args.repeat} passes")
+    for filename in EXTRACTOR_SCRIPTS:
+        patterns = [pattern for field_patterns in router.load_script(filename).PATTERNS.values()
+                    for pattern in field_patterns]
+
+        def compiled(text):
+            for pattern in patterns:
+                pattern.findall(text)
+
+        def raw(text):
+            # The previous path: every call goes through re's internal pattern cache
+            for pattern in patterns:
+                re.findall(pattern.pattern, text, pattern.flags)
+
+        throughput(f"{filename} compiled", compiled)
+        throughput(f"{filename} raw strings", raw)
+        # re's cache is shared by the whole process, so a busy server keeps evicting these
+        throughput(f"{filename} raw strings, cold re cache", raw, re.purge)
+
+    import icici
+    throughput("icici.py extract_fields_from_text", icici.extract_fields_from_text)
+
+
+class FullTextSweep:
+    """The previous field lookup: every pattern runs findall() over the whole (sliced) text."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def first(self, pattern, pos=0):
+        matches = pattern.findall(self.text[pos:])
+        return matches[0] if matches else None
+
+
+def bench_fields(args):
+    """Check the single-pass field scanner against full-text findall() on a golden corpus, and time both."""
+    texts = [Path(file).read_text() * args.copies for file in args.files]
+    letters = len(texts) * args.repeat
+    mismatches = 0
+
+    print(f"{len(texts)} letters x {args.repeat} passes, each letter repeated {args.copies}x")
+    for filename in EXTRACTOR_SCRIPTS:
+        extractor = router.load_script(filename).DataExtractor()
+        fields = list(extractor.patterns)
+
+        for file, text in zip(args.files, texts):
+            scan = extractor.scanner.scan(text)
+            sweep = FullTextSweep(text)
+            for field in fields:
+                expected = extractor.extract_field(text, field, sweep)
+                actual = extractor.extract_field(text, field, scan)
+                if actual != expected:
+                    mismatches += 1
+                    print(f"MISMATCH {filename} {file} {field}: {expected!r} != {actual!r}")
+
+        for label, make_scan in (("full-text findall", FullTextSweep), ("single-pass scanner", extractor.scanner.scan)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for text in texts:
+                    scan = make_scan(text)
+                    for field in fields:
+                        extractor.extract_field(text, field, scan)
+            elapsed = time.perf_counter() - start
+            print(f"{filename + ' ' + label:<50} {letters / elapsed * 60:12,.0f} letters/min")
+
+    print("outputs identical" if not mismatches else f"{mismatches} mismatched fields")
+    return 1 if mismatches else 0
+
+
+def bench_router(args):
+    """Per-document latency of a fresh interpreter per guessed script versus in-process routing."""
+    def subprocess_per_script(path):
+        # The previous dispatcher: guess a script, run it in a new interpreter, retry on failure
+        with router.PdfDocument(path) as document:
+            route, scanned = router.classify(document)
+        for name in route.scanned_candidates if scanned else route.candidates:
+            if name == "icici":
+                continue  # the Flask service has no command line
+            script = router.SCRIPT_DIR / router.EXTRACTORS[name].script
+            completed = subprocess.run([sys.executable, str(script), path], capture_output=True, text=True)
+            if completed.returncode == 0 and completed.stdout.strip() not in ("", "null"):
+                return
+
+    modes = [("interpreter per script", subprocess_per_script), ("in-process router", router.extract)]
+    for label, fn in modes:
+        latencies = []
+        for _ in range(args.repeat):
+            for path in args.files:
+                start = time.perf_counter()
+                fn(path)
+                latencies.append(time.perf_counter() - start)
+        report(label, latencies)
+
+
+def _upload_worker(path, mode, repeat):
+    """Post a file to the service in a fresh process; return (latencies, peak traced MB, peak RSS MB)."""
+    import os
+    # Every upload must go through decoding and extraction, not be answered from a cache
+    os.environ["RESULT_CACHE_SIZE"] = "0"
+    os.environ["OCR_PAGE_CACHE_SIZE"] = "0"
+    os.environ.pop("RESULT_CACHE_DB", None)
+    os.environ.pop("OCR_PAGE_CACHE_DB", None)
+    import icici
+
+    file_bytes = Path(path).read_bytes()
+    content_type = "application/pdf" if path.lower().endswith(".pdf") else f"image/{Path(path).suffix[1:].lower()}"
+    encoded = base64.b64encode(file_bytes).decode("ascii") if mode == "json" else None
+    client = icici.app.test_client()
+
+    def post():
+        # Fresh payload objects each time, as a real client would send them
+        if mode == "json":
+            return client.post("/api/extract", json={"document": [{"fileName": Path(path).name,
+                                                                    "fileContent": encoded}]})
+        if mode == "multipart":
+            return client.post("/api/extract/upload",
+                               data={"file": (io.BytesIO(file_bytes), Path(path).name)},
+                               content_type="multipart/form-data")
+        return client.post("/api/extract/upload", data=file_bytes, content_type=content_type)
+
+    latencies = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = post()
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(response.get_data(as_text=True))
+    peak_traced = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return latencies, peak_traced, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_upload(args):
+    """Latency and peak memory of a base64 JSON upload versus a raw or multipart body."""
+    size_mb = Path(args.file).stat().st_size / 1024 / 1024
+    print(f"{args.file}: {size_mb:.1f} MB, {args.repeat} uploads per mode")
+    context = multiprocessing.get_context("spawn")
+    for mode in ("json", "raw", "multipart"):
+        # A fresh process per mode so peak memory is not carried over from the previous one
+        with context.Pool(1) as pool:
+            latencies, peak_traced, peak_rss = pool.apply(_upload_worker, (args.file, mode, args.repeat))
+        report(mode, latencies)
+        print(f"{'':<24} peak Python heap {peak_traced:8.1f} MB   peak RSS {peak_rss:8.1f} MB")
+
+
+def bench_regions(args):
+    """Per-page OCR time of the whole first page versus only its template regions, and field agreement."""
+    from ocr_engine import ocr_pages
+    from pdf_document import PdfDocument
+    from scanned_authorization import REGIONS
+
+    extractor = router.load_script("scannedpdf_icici.py").DataExtractor()
+    boxes = [region.box for region in REGIONS]
+    config, dpi = '--psm 6', 144
+    full_times, region_times = [], []
+    fallbacks = disagreements = 0
+
+    for path in args.files:
+        with PdfDocument(path) as document:
+            # OCR directly rather than through page_text_cache, so every pass does the work
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                full_text = ocr_pages([document.render_page(0, dpi)], config=config)[0]
+                full_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                images = [document.render_page(0, dpi, clip=document.region_rect(0, box)) for box in boxes]
+                region_texts = ocr_pages(images, config=config)
+                region_times.append(time.perf_counter() - start)
+
+        expected = {field: extractor.extract_field(full_text, field) for field in extractor.patterns}
+        actual = {}
+        for region, text in zip(REGIONS, region_texts):
+            for field in region.fields:
+                actual[field] = extractor.extract_field(text, field) if text.strip() else None
+        missing = [field for field, value in actual.items() if value is None]
+        if missing:
+            fallbacks += 1
+            print(f"{path}: full-page fallback for {', '.join(missing)}")
+        for field, value in actual.items():
+            if value is not None and value != expected[field]:
+                disagreements += 1
+                print(f"{path} {field}: full page {expected[field]!r}, region {value!r}")
+
+    report("full first page", full_times)
+    report("template regions", region_times)
+    saved = 1 - statistics.median(region_times) / statistics.median(full_times)
+    print(f"median OCR time saved {saved:.0%}; {fallbacks}/{len(args.files)} letters need the fallback, "
+          f"{disagreements} fields differ from full-page OCR")
+
+
+def _legacy_preprocess(image):
+    """icici.preprocess_image before the pipeline: BGR copy, gray, threshold, 1x1 open, back to PIL."""
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    array = np.array(image)
+    if array.ndim == 3:
+        array = cv2.cvtColor(array[:, :, ::-1].copy(), cv2.COLOR_BGR2GRAY)
+    thresh = cv2.adaptiveThreshold(array, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    return Image.fromarray(cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((1, 1), np.uint8)))
+
+
+def bench_preprocess(args):
+    """Preprocessing time per page and OCR field accuracy of each pipeline on a sample set.
+
+    Expected fields for <file.pdf> are read from <file.pdf>.json (a verified extraction);
+    files without one are timed but not scored.
+    """
+    import json
+    import icici
+    from ocr_engine import ocr_pages
+    from pdf_document import PdfDocument
+    from preprocess import Pipeline
+
+    variants = [("none", None), ("legacy", _legacy_preprocess)]
+    variants += [(steps, Pipeline(steps.split(","))) for steps in args.pipelines]
+
+    samples = []
+    for path in args.files:
+        with PdfDocument(path) as document:
+            pages = [document.render_page(page_no) for page_no in range(len(document))]
+        expected_path = Path(path + ".json")
+        expected = json.loads(expected_path.read_text()) if expected_path.exists() else None
+        samples.append((path, pages, expected))
+    page_count = sum(len(pages) for _, pages, _ in samples)
+    print(f"{len(samples)} files, {page_count} pages at 200 DPI")
+
+    for label, preprocess in variants:
+        preprocess_seconds = ocr_seconds = 0.0
+        correct = total = 0
+        for path, pages, expected in samples:
+            start = time.perf_counter()
+            images = [preprocess(page) for page in pages] if preprocess else pages
+            preprocess_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            text = "".join(page_text + "\n\n" for page_text in ocr_pages(images))
+            ocr_seconds += time.perf_counter() - start
+            if expected is None:
+                continue
+            fields = icici.extract_fields_from_text(text, with_ocr=True)
+            for field, value in expected.items():
+                if field in fields and field != "Letter Type":
+                    total += 1
+                    correct += fields[field] == value
+        accuracy = f"{correct}/{total} fields ({correct / total:.0%})" if total else "no expected fields"
+        print(f"{label:<26} preprocess {preprocess_seconds / page_count * 1000:7.1f} ms/page   "
+              f"OCR {ocr_seconds / page_count * 1000:7.1f} ms/page   {accuracy}")
+
+
+def _camelot_reason(path):
+    """The previous reason lookup: camelot stream tables from the file, then pdfplumber reopening it."""
+    import camelot
+    import pdfplumber
+
+    for table in camelot.read_pdf(path, pages='1', flavor='stream', strip_text='\n'):
+        df = table.df
+        if any(col.lower().replace('.', '').strip() in ['srno', 'sr no'] for col in df.iloc[0]):
+            for _, row in df.iterrows():
+                if str(row[0]).strip() == '1':
+                    return row[1].strip()
+    with pdfplumber.open(path) as pdf:
+        pdf.pages[0].extract_text()
+    return None
+
+
+def bench_tables(args):
+    """Per-letter time of the camelot table lookup versus the word-clustered table on the open page."""
+    import pdfplumber
+    from word_table import numbered_row
+
+    def word_table_reason(path):
+        # What extract_info_from_pdf now does: one open, the page's words clustered in place
+        with pdfplumber.open(path) as pdf:
+            page = pdf.pages[0]
+            page.extract_text()
+            return numbered_row(page.extract_words())
+
+    start = time.perf_counter()
+    try:
+        import camelot  # noqa: F401
+        print(f"import camelot: {(time.perf_counter() - start) * 1000:.0f} ms (no longer paid by mdindia_approval)")
+        modes = [("camelot + reopen", _camelot_reason)]
+    except ImportError:
+        print("camelot is not installed; timing the word-clustered table only")
+        modes = []
+    modes.append(("word-clustered table", word_table_reason))
+
+    reasons = {}
+    for label, fn in modes:
+        latencies = []
+        for _ in range(args.repeat):
+            for path in args.files:
+                start = time.perf_counter()
+                reasons[label, path] = fn(path)
+                latencies.append(time.perf_counter() - start)
+        report(label, latencies)
+
+    if len(modes) > 1:
+        for path in args.files:
+            old, new = (reasons[label, path] for label, _ in modes)
+            if old != new:
+                print(f"{path}: camelot {old!r}, word table {new!r}")
+
+
+def _linear_address(words):
+    """The previous address lookup: one scan for "To,", one for the Phone/Fax line, one bucketing every word."""
+    start_y = next((w['top'] for w in words if w['text'].strip() == 'To,'), None)
+    if start_y is None:
+        return "null"
+    end_y = next((w['top'] for w in words
+                  if w['text'].strip() in ['Phone', 'Phone:', 'Fax', 'Fax:'] and w['top'] > start_y), start_y + 150)
+    lines = {}
+    for w in words:
+        if start_y < w['top'] < end_y and w['x0'] < 250:
+            lines.setdefault(round(w['top'], 1), []).append(w['text'])
+    return ', '.join(' '.join(lines[y]) for y in sorted(lines))
+
+
+def bench_layout(args):
+    """Per-page time of word extraction, of building the word index, and of an address lookup with and without it."""
+    import pdfplumber
+    from word_index import WordIndex
+
+    mdindia = router.load_script("mdindia_approval.py")
+    extraction, building, linear, indexed = [], [], [], []
+    for path in args.files:
+        with pdfplumber.open(path) as pdf:
+            page = pdf.pages[0]
+            start = time.perf_counter()
+            words = page.extract_words()
+            extraction.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            index = WordIndex.from_pdfplumber(words)
+            building.append(time.perf_counter() - start)
+
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                old = _linear_address(words)
+                linear.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                new = mdindia.extract_address_layout(page, index)
+                indexed.append(time.perf_counter() - start)
+            if old != new:
+                print(f"{path}: linear {old!r}, indexed {new!r}")
+            print(f"{path}: {len(words)} words")
+
+    report("extract_words", extraction)
+    report("build index", building)
+    report("address, linear scans", linear)
+    report("address, word index", indexed)
+
+
+def _scanned_bundle(path, pages):
+    """An image-only PDF of `pages` pages made from path's pages, each stamped so no two rasterize alike."""
+    import fitz
+
+    source = fitz.open(path)
+    bundle = fitz.open()
+    for page_no in range(pages):
+        page = source[page_no % len(source)]
+        scan = bundle.new_page(width=page.rect.width, height=page.rect.height)
+        scan.insert_image(scan.rect, pixmap=page.get_pixmap(dpi=100, colorspace=fitz.csGRAY))
+        # A few characters of native text keep the page "scanned" but make its pixels (and cache key) unique
+        scan.insert_text((20, 20), str(page_no))
+    data = bundle.tobytes()
+    source.close()
+    bundle.close()
+    return data
+
+
+def _memory_worker(path, pages, mode, dpi):
+    """Read a scanned bundle in a fresh process; return (s/page, its peak RSS in MB, OCR workers excluded)."""
+    from ocr_engine import ocr_pages, shutdown_pool
+    from pdf_document import PdfDocument
+
+    data = _scanned_bundle(path, pages)
+    start = time.perf_counter()
+    try:
+        with PdfDocument(stream=data) as document:
+            if mode == "all pages":
+                # The previous model: every page rasterized into a list before OCR starts
+                images = [document.render_page(page_no, dpi) for page_no in range(len(document))]
+                "".join(ocr_pages(images))
+            else:
+                document.extract_text(dpi=dpi)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutdown_pool()
+    return elapsed / pages, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_memory(args):
+    """Peak RSS of OCR'ing growing scanned bundles: all pages rasterized up front versus streamed."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{args.file}: image-only bundles at {args.dpi} DPI")
+    for mode in ("all pages", "streamed"):
+        for pages in args.pages:
+            # A fresh process per run so peak RSS reflects this run alone; not a multiprocessing.Pool,
+            # whose daemonic workers cannot start the OCR pool
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                per_page, peak_mb = pool.submit(_memory_worker, args.file, pages, mode, args.dpi).result()
+            print(f"{mode:<10} {pages:>4} pages {per_page * 1000:8.1f} ms/page   peak RSS {peak_mb:8.1f} MB")
+
+
+# Import-time budget (ms) per entry point; `startup` exits non-zero when one is exceeded
+STARTUP_BUDGETS = {
+    # PyMuPDF alone is most of this, and every PDF needs it
+    "router": 250,
+    "batch": 100,
+    "service (icici.app)": 400,
+    # Including the router that loads them and pdfplumber for the pdfplumber-based scripts
+    "extractor scripts": 400,
+}
+
+
+def startup_entry_points():
+    """(label, budget key, code) for every entry point a process can start from."""
+    entry_points = [
+        ("router", "router", "import router"),
+        ("batch", "batch", "import batch"),
+        ("service (icici.app)", "service (icici.app)", "import icici; icici.app"),
+    ]
+    for name, extractor in router.EXTRACTORS.items():
+        entry_points.append((name, "extractor scripts", f"import router; router.load_script({extractor.script!r})"))
+    return entry_points
+
+
+def import_times(code):
+    """Run code under -X importtime in a fresh interpreter; return (total ms, {top-level module: ms})."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=router.SCRIPT_DIR,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in completed.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"; nesting is shown by indentation
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        if not name.startswith("  "):
+            modules[name.strip()] = int(parts[1]) / 1000
+    return sum(modules.values()), modules
+
+
+def bench_startup(args):
+    """Import time of each entry point (-X importtime, best of --repeat runs) against STARTUP_BUDGETS."""
+    over_budget = 0
+    for label, budget_key, code in startup_entry_points():
+        try:
+            runs = [import_times(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{label:<26} failed: {e}")
+            over_budget += 1
+            continue
+        total, modules = min(runs, key=lambda run: run[0])
+        budget = STARTUP_BUDGETS[budget_key]
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:3])
+        status = "ok" if total <= budget else "OVER BUDGET"
+        over_budget += total > budget
+        print(f"{label:<26} {total:7.1f} ms / {budget:4d} ms  {status:<11}  heaviest: {heaviest}")
+    return 1 if over_budget else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    concurrent = subparsers.add_parser("concurrent", help=bench_concurrent.__doc__)
+    concurrent.add_argument("file", help="PDF to upload (use a scanned PDF to exercise OCR)")
+    concurrent.add_argument("--clients", type=int, default=8)
+    concurrent.add_argument("--rounds", type=int, default=3)
+    concurrent.set_defaults(func=bench_concurrent)
+
+    rasterize = subparsers.add_parser("rasterize", help=bench_rasterize.__doc__)
+    rasterize.add_argument("file", help="PDF to rasterize")
+    rasterize.add_argument("--repeat", type=int, default=5)
+    rasterize.add_argument("--ocr", action="store_true", help="also OCR each page")
+    rasterize.set_defaults(func=bench_rasterize)
+
+    ocr_backends = subparsers.add_parser("ocr-backends", help=bench_ocr_backends.__doc__)
+    ocr_backends.add_argument("file", help="PDF whose pages are OCR'd")
+    ocr_backends.add_argument("--repeat", type=int, default=3)
+    ocr_backends.add_argument("--psm", type=int, default=6)
+    ocr_backends.set_defaults(func=bench_ocr_backends)
+
+    patterns = subparsers.add_parser("patterns", help=bench_patterns.__doc__)
+    patterns.add_argument("files", nargs="+", help="letter text already extracted from PDFs")
+    patterns.add_argument("--repeat", type=int, default=200)
+    patterns.set_defaults(func=bench_patterns)
+
+    fields = subparsers.add_parser("fields", help=bench_fields.__doc__)
+    fields.add_argument("files", nargs="+", help="letter text already extracted from PDFs (the golden corpus)")
+    fields.add_argument("--repeat", type=int, default=200)
+    fields.add_argument("--copies", type=int, default=1, help="repeat each letter to simulate long multi-page letters")
+    fields.set_defaults(func=bench_fields)
+
+    routing = subparsers.add_parser("router", help=bench_router.__doc__)
+    routing.add_argument("files", nargs="+", help="PDF letters from any insurer")
+    routing.add_argument("--repeat", type=int, default=3)
+    routing.set_defaults(func=bench_router)
+
+    upload = subparsers.add_parser("upload", help=bench_upload.__doc__)
+    upload.add_argument("file", help="large scanned PDF (or image) to upload, e.g. a 20 MB scan")
+    upload.add_argument("--repeat", type=int, default=3)
+    upload.set_defaults(func=bench_upload)
+
+    regions = subparsers.add_parser("regions", help=bench_regions.__doc__)
+    regions.add_argument("files", nargs="+", help="scanned ICICI authorization letters")
+    regions.add_argument("--repeat", type=int, default=3)
+    regions.set_defaults(func=bench_regions)
+
+    preprocessing = subparsers.add_parser("preprocess", help=bench_preprocess.__doc__.splitlines()[0])
+    preprocessing.add_argument("files", nargs="+", help="scanned letters, each with an optional <file>.json")
+    preprocessing.add_argument("--pipelines", nargs="+",
+                               default=["binarize", "deskew,binarize", "deskew,denoise,binarize"],
+                               help="comma-separated preprocess.STEPS to compare")
+    preprocessing.set_defaults(func=bench_preprocess)
+
+    tables = subparsers.add_parser("tables", help=bench_tables.__doc__)
+    tables.add_argument("files", nargs="+", help="MDIndia letters with a \"Sr No\" table")
+    tables.add_argument("--repeat", type=int, default=5)
+    tables.set_defaults(func=bench_tables)
+
+    layout = subparsers.add_parser("layout", help=bench_layout.__doc__)
+    layout.add_argument("files", nargs="+", help="letters with a \"To,\" address block")
+    layout.add_argument("--repeat", type=int, default=200)
+    layout.set_defaults(func=bench_layout)
+
+    memory = subparsers.add_parser("memory", help=bench_memory.__doc__)
+    memory.add_argument("file", help="letter whose pages are repeated into scanned bundles")
+    memory.add_argument("--pages", type=int, nargs="+", default=[5, 20, 60])
+    memory.add_argument("--dpi", type=int, default=200)
+    memory.set_defaults(func=bench_memory)
+
+    startup = subparsers.add_parser("startup", help=bench_startup.__doc__)
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
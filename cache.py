@@ -0,0 +1,136 @@
+"""Bounded caches: a thread-safe in-memory LRU and an optional on-disk SQLite tier."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteCache:
+    """Persistent cache evicting entries older than max_age seconds or beyond max_entries."""
+
+    def __init__(self, path, max_entries=10000, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age and row[1] < now - self.max_age):
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.max_age:
+            self._conn.execute("DELETE FROM cache WHERE created < ?", (now - self.max_age,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        return {"entries": len(self), "max_entries": self.max_entries, "max_age": self.max_age,
+                "hits": self.hits, "misses": self.misses}
+
+
+class ResultCache:
+    """Extraction results keyed by content hash, with an LRU tier in front of an optional SQLite tier."""
+
+    def __init__(self, memory_entries=256, db_path=None, db_max_entries=10000, db_max_age=7 * 24 * 3600):
+        self.memory = LRUCache(memory_entries)
+        self.disk = SQLiteCache(db_path, db_max_entries, db_max_age) if db_path else None
+
+    @staticmethod
+    def make_key(file_bytes, *options):
+        """Hash of the decoded file bytes plus every option that changes the result."""
+        return ResultCache.digest_key(hashlib.sha256(file_bytes).hexdigest(), *options)
+
+    @staticmethod
+    def digest_key(digest, *options):
+        """make_key for a file whose sha256 hex digest was computed while it was read."""
+        return ":".join([digest] + [str(option) for option in options])
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        # Results are stored serialized so callers can't mutate the cached copy
+        return json.loads(value) if value is not None else None
+
+    def put(self, key, result):
+        value = json.dumps(result)
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self):
+        return {"memory": self.memory.stats(), "disk": self.disk.stats() if self.disk else None}
@@ -2,122 +2,114 @@ import re
 import json
 import sys
 from pathlib import Path
-import fitz  # PyMuPDF
-from PIL import Image
-import io
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from field_scanner import FieldScanner
+from ocr_engine import set_tesseract_cmd
+from pdf_document import PdfDocument
+set_tesseract_cmd(r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+
+FIELD_PATTERNS = {
+    'AL Number': [
+        r'AL\s*Number\s*:?\s*([^\s]+)',  
+        r'AL\s*:?\s*([^\s]+)',
+        r'Authorization\s+Letter\s+Number\s*:?\s*([^\s]+)'
+    ],
+    'Approved Amount': [
+        r'Total\s+Authorized\s+Amount\s*:\s*([\d,]+\.\d{2})',
+        r'Total\s+Authorized\s+Amount\s*\|\s*([\d,]+\.\d{2})',
+        r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
+        r'Sanctioned\s+Amount\s*:?\s*(\d+)'
+    ],
+    'Date of Admission': [
+        r'Expected\s+Date\s+of\s+Admission\s*:\s*(\d{2}-\w{3}-\d{4})',
+        r'Date\s+of\s+Admission\s*:\s*(\d{2}-\w{3}-\d{4})'
+    ],
+    'Date of Discharge': [
+        r'Expected\s+Date\s+of\s+Discharge\s*:\s*(\d{2}-\w{3}-\d{4})',
+        r'Date\s+of\s+Discharge\s*:\s*(\d{2}-\w{3}-\d{4})'
+    ],
+    'Name of the Patient': [
+        r'Patient\s*Name\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)',
+        r'Name\s+of\s+Patient\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)',
+        r'Patient\s*Name\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)',
+        r'Name\s+of\s+Patient\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)'
+    ],
+    'Policy No': [
+        r'Policy\s+No\s*:\s*([A-Z0-9\/\-]+)',
+        r'Policy\s+Number\s*:\s*([A-Z0-9\/\-]+)'
+    ],
+    'Policy Period': [
+        r'Policy\s*period\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})',
+        r'Policy\s+Period\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})',
+        r'Policy\s+Term\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})'
+    ],
+    'Total Bill Amount': [
+        r'Total\s+Bill\s+Amount\s*:\s*([\d,]+\.\d{2})',
+        r'Total\s+Bill\s+Amount\s*\|\s*([\d,]+\.\d{2})',
+        r'Bill\s+Amount\s*:\s*([\d,]+\.\d{2})'
+    ],
+    'UHID Number': [
+        r'Insurer\s+Id\s+of\s+the\s+Patient\s*:\s*([A-Z0-9]+)',
+        r'Insurer\s+ID\s*:\s*([A-Z0-9]+)',
+        r'Patient\s+ID\s*:\s*([A-Z0-9]+)'
+    ],
+    'Remarks': [
+        r'Authorization\s+remarks\s*:\s*(.*?)(?=\s*Hospital\s+Agreed\s+Tariff\s*:|$)',
+        r'Remarks\s*:\s*(.*?)(?=\n\n|\n\*|$)'
+    ],
+    'Date & Time': [
+        r'Authorization\s+Details:.*?\n\|.*?\n\|(.*?)\n.*?Total'
+    ]
+}
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Compiled once at import and shared by every DataExtractor instance
+PATTERNS = {
+    field: [re.compile(pattern, PATTERN_FLAGS) for pattern in patterns]
+    for field, patterns in FIELD_PATTERNS.items()
+}
+SCANNER = FieldScanner(PATTERNS)
+
+AUTHORIZATION_DETAILS_PATTERN = re.compile(r'Authorization\s+Details:(.*?)(?:\n\n|\Z)', re.DOTALL | re.IGNORECASE)
+AUTHORIZATION_DATE_PATTERN = re.compile(r'(\d{2}/[a-zA-Z]{3}/\d{4}\s+\d{2}:\d{2}:\d{2})', re.IGNORECASE)
+AUTHORIZATION_REMARKS_PATTERN = re.compile(
+    r'Authorization\s+remarks\s*:\s*(.*?)(?=\s*Hospital\s+Agreed\s+Tariff\s*:|$)',
+    re.DOTALL | re.IGNORECASE
+)
+NON_PACKAGE_SUMMARY_PATTERN = re.compile(
+    r'II\.\s*Non\s*Package\s*Case.*?Authorization\s*Summary:(.*?)(?:\n\n|\Z)',
+    re.DOTALL | re.IGNORECASE
+)
+SUMMARY_BILL_PATTERN = re.compile(r'Total\s+Bill\s+Amount\s*[:\|]?\s*([\d,]+\.\d{2})')
+SUMMARY_APPROVED_PATTERN = re.compile(r'Total\s+Authorized\s+Amount\s*[:\|]?\s*([\d,]+\.\d{2})')
+SPLIT_PATIENT_NAME_PATTERN = re.compile(r'Patient\s*Name\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)', re.DOTALL)
+PATIENT_NAME_PATTERN = re.compile(r'Patient\s*Name\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)', re.DOTALL)
 
 class DataExtractor:
     def __init__(self):
-        self.patterns = {
-            'AL Number': [
-                r'AL\s*Number\s*:?\s*([^\s]+)',  
-                r'AL\s*:?\s*([^\s]+)',
-                r'Authorization\s+Letter\s+Number\s*:?\s*([^\s]+)'
-            ],
-            'Approved Amount': [
-                r'Total\s+Authorized\s+Amount\s*:\s*([\d,]+\.\d{2})',
-                r'Total\s+Authorized\s+Amount\s*\|\s*([\d,]+\.\d{2})',
-                r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
-                r'Sanctioned\s+Amount\s*:?\s*(\d+)'
-            ],
-            'Date of Admission': [
-                r'Expected\s+Date\s+of\s+Admission\s*:\s*(\d{2}-\w{3}-\d{4})',
-                r'Date\s+of\s+Admission\s*:\s*(\d{2}-\w{3}-\d{4})'
-            ],
-            'Date of Discharge': [
-                r'Expected\s+Date\s+of\s+Discharge\s*:\s*(\d{2}-\w{3}-\d{4})',
-                r'Date\s+of\s+Discharge\s*:\s*(\d{2}-\w{3}-\d{4})'
-            ],
-            'Name of the Patient': [
-                r'Patient\s*Name\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)',
-                r'Name\s+of\s+Patient\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)',
-                r'Patient\s*Name\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)',
-                r'Name\s+of\s+Patient\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)'
-            ],
-            'Policy No': [
-                r'Policy\s+No\s*:\s*([A-Z0-9\/\-]+)',
-                r'Policy\s+Number\s*:\s*([A-Z0-9\/\-]+)'
-            ],
-            'Policy Period': [
-                r'Policy\s*period\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})',
-                r'Policy\s+Period\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})',
-                r'Policy\s+Term\s*:\s*(\d{2}-\d{2}-\d{4})\s*to\s*(\d{2}-\d{2}-\d{4})'
-            ],
-            'Total Bill Amount': [
-                r'Total\s+Bill\s+Amount\s*:\s*([\d,]+\.\d{2})',
-                r'Total\s+Bill\s+Amount\s*\|\s*([\d,]+\.\d{2})',
-                r'Bill\s+Amount\s*:\s*([\d,]+\.\d{2})'
-            ],
-            'UHID Number': [
-                r'Insurer\s+Id\s+of\s+the\s+Patient\s*:\s*([A-Z0-9]+)',
-                r'Insurer\s+ID\s*:\s*([A-Z0-9]+)',
-                r'Patient\s+ID\s*:\s*([A-Z0-9]+)'
-            ],
-            'Remarks': [
-                r'Authorization\s+remarks\s*:\s*(.*?)(?=\s*Hospital\s+Agreed\s+Tariff\s*:|$)',
-                r'Remarks\s*:\s*(.*?)(?=\n\n|\n\*|$)'
-            ],
-            'Date & Time': [
-                r'Authorization\s+Details:.*?\n\|.*?\n\|(.*?)\n.*?Total'
-            ]
-        }
+        self.page_sources = []
+        self.patterns = PATTERNS
+        self.scanner = SCANNER
     
-    def extract_hospital_address(self, page):
-        words = page.get_text("words")
-        address_lines = []
-        start_y = None
-        end_y = None
-
-        for i, w in enumerate(words):
-            if "HOSPITAL" in w[4].upper():  
-                start_y = w[3]  
-                break
-        
-        if start_y is None:
+    def extract_hospital_address(self, index):
+        """Address block under the hospital's name, from the first page's WordIndex."""
+        start = index.first(lambda w: "HOSPITAL" in w.text.upper())
+        if start is None:
             return None
+        start_y = index[start].bottom
 
-        for w in words[i+1:]:
-            if w[4].strip().isdigit() and len(w[4].strip()) == 6: 
-                end_y = w[3] + 20  
-                break
-        if end_y is None:
-            end_y = start_y + 150  
-
-        lines = {}
-        for w in words:
-            if start_y < w[1] < end_y and w[0] < 250:  
-                y = round(w[1], 1) 
-                lines.setdefault(y, []).append(w[4])
+        # The address ends at the line after its PIN code
+        pin = index.first(lambda w: w.text.strip().isdigit() and len(w.text.strip()) == 6, after=start)
+        end_y = index[pin].bottom + 20 if pin is not None else start_y + 150
 
-        sorted_lines = [lines[y] for y in sorted(lines)]
-        full_lines = [' '.join(line) for line in sorted_lines]
-        return ', '.join(full_lines).replace(',,', ',')
+        lines = index.lines(index.band(start_y, end_y, x_max=250))
+        return ', '.join(lines).replace(',,', ',')
     
-    def extract_text_from_pdf(self, pdf_path):
-        try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                
-                if not page_text.strip():
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    page_text = pytesseract.image_to_string(img, config='--psm 4')
-                
-                text += page_text + "\n"
-            
-            doc.close()
-            return text
-            
-        except Exception as e:
-            print(f"Error extracting text from PDF: {e}")
-            return ""
+    def extract_text_from_pdf(self, document):
+        # Native text where present, OCR (2x zoom = 144 DPI) only for pages without any
+        text = document.extract_text(config='--psm 4', dpi=144, min_chars=1)
+        self.page_sources = document.page_sources
+        return text
     
     def clean_extracted_value(self, value, field_name):
         if not value:
@@ -159,73 +151,65 @@ class DataExtractor:
         
         return value
     
-    def extract_field(self, text, field_name):
+    def extract_field(self, text, field_name, scan=None):
+        if scan is None:
+            scan = self.scanner.scan(text)
+
         if field_name == 'Date & Time':
-            auth_section = re.search(r'Authorization\s+Details:(.*?)(?:\n\n|\Z)', text, re.DOTALL | re.IGNORECASE)
+            auth_section = AUTHORIZATION_DETAILS_PATTERN.search(text)
             if auth_section:
                 section_text = auth_section.group(1)
-                date_matches = re.findall(
-                    r'(\d{2}/[a-zA-Z]{3}/\d{4}\s+\d{2}:\d{2}:\d{2})',
-                    section_text,
-                    re.IGNORECASE
-                )
+                date_matches = AUTHORIZATION_DATE_PATTERN.findall(section_text)
                 if date_matches:
                     return date_matches[-1]
             return None
 
         if field_name == 'Remarks':
-            remarks_match = re.search(
-                r'Authorization\s+remarks\s*:\s*(.*?)(?=\s*Hospital\s+Agreed\s+Tariff\s*:|$)', 
-                text, 
-                re.DOTALL | re.IGNORECASE
-            )
+            remarks_match = AUTHORIZATION_REMARKS_PATTERN.search(text)
             if remarks_match:
                 return remarks_match.group(1).strip()
             for pattern in self.patterns.get('Remarks', []):
-                matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-                if matches:
-                    return matches[0]
+                match = scan.first(pattern)
+                if match is not None:
+                    return match
             return None
 
         if field_name in ['Total Bill Amount', 'Approved Amount']:
-            non_package_section = re.search(r'II\.\s*Non\s*Package\s*Case.*?Authorization\s*Summary:(.*?)(?:\n\n|\Z)', text, re.DOTALL | re.IGNORECASE)
+            non_package_section = NON_PACKAGE_SUMMARY_PATTERN.search(text)
             if non_package_section:
                 section_text = non_package_section.group(1)
                 if field_name == 'Total Bill Amount':
-                    bill_match = re.search(r'Total\s+Bill\s+Amount\s*[:\|]?\s*([\d,]+\.\d{2})', section_text)
+                    bill_match = SUMMARY_BILL_PATTERN.search(section_text)
                     if bill_match:
                         return bill_match.group(1)
                 elif field_name == 'Approved Amount':
-                    approved_match = re.search(r'Total\s+Authorized\s+Amount\s*[:\|]?\s*([\d,]+\.\d{2})', section_text)
+                    approved_match = SUMMARY_APPROVED_PATTERN.search(section_text)
                     if approved_match:
                         return approved_match.group(1)
 
         patterns = self.patterns.get(field_name, [])
         for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if matches:
-                match = matches[0]
+            match = scan.first(pattern)
+            if match is not None:
                 return match
         
         return None
         
-    def extract_all_data(self, pdf_path):        
-        text = self.extract_text_from_pdf(pdf_path)
-        
+    def extract_all_data(self, document, text):
+        """Fields from the document's text (as read by extract_text_from_pdf) and the address from its first page."""
         if not text.strip():
             print("No text could be extracted from the PDF")
             return None
 
+        # One sweep locates every field label; each pattern then only runs at its own label
+        scan = self.scanner.scan(text)
         extracted_data = {}
         for field_name in self.patterns.keys():
-            value = self.extract_field(text, field_name)
+            value = self.extract_field(text, field_name, scan)
             extracted_data[field_name] = self.clean_extracted_value(value, field_name)
         
         try:
-            doc = fitz.open(pdf_path)
-            page = doc.load_page(0)  
-            extracted_data['Hospital Address'] = self.extract_hospital_address(page)
-            doc.close()
+            extracted_data['Hospital Address'] = self.extract_hospital_address(document.word_index(0))
         except Exception as e:
             print(f"Error extracting hospital address: {e}")
             extracted_data['Hospital Address'] = None
@@ -239,48 +223,55 @@ class DataExtractor:
             if not Path(pdf_path).exists():
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-            text = self.extract_text_from_pdf(pdf_path)
-            if not text.strip():
-                return None
-                
-            data = self.extract_all_data(pdf_path)
+            # One open for the text, any OCR and the address: each scanned page is OCR'd at most once
+            with PdfDocument(pdf_path) as document:
+                return self.process_document(document)
+
+        except Exception as e:
+            print(f"Error processing PDF: {e}")
+            return None
+
+    def process_document(self, document):
+        """Formatted fields of an open PdfDocument, or None."""
+        text = self.extract_text_from_pdf(document)
+        if not text.strip():
+            return None
+
+        data = self.extract_all_data(document, text)
+
+        if data:
+            formatted_data = {
+                "Letter Type": data.get('Letter Type'),
+                "AL Number": data.get('AL Number'),
+                "UHID Number": data.get('UHID Number'),
+                "Name of the Patient": data.get('Name of the Patient'),
+                "Policy No": data.get('Policy No'),
+                "Policy Period": data.get('Policy Period'),
+                "Date of Admission": data.get('Date of Admission'),
+                "Date of Discharge": data.get('Date of Discharge'),
+                "Date & Time": data.get('Date & Time'), 
+                "Remarks": data.get('Remarks'),
+                "Total Bill Amount": data.get('Total Bill Amount'),
+                "Approved Amount": data.get('Approved Amount'),
+                "Hospital Address": data.get('Hospital Address'),
+                "Page Sources": self.page_sources
+            }
             
-            if data:
-                formatted_data = {
-                    "Letter Type": data.get('Letter Type'),
-                    "AL Number": data.get('AL Number'),
-                    "UHID Number": data.get('UHID Number'),
-                    "Name of the Patient": data.get('Name of the Patient'),
-                    "Policy No": data.get('Policy No'),
-                    "Policy Period": data.get('Policy Period'),
-                    "Date of Admission": data.get('Date of Admission'),
-                    "Date of Discharge": data.get('Date of Discharge'),
-                    "Date & Time": data.get('Date & Time'), 
-                    "Remarks": data.get('Remarks'),
-                    "Total Bill Amount": data.get('Total Bill Amount'),
-                    "Approved Amount": data.get('Approved Amount'),
-                    "Hospital Address": data.get('Hospital Address')
-                }
-                
-                if not formatted_data["Name of the Patient"] or len(formatted_data["Name of the Patient"].split()) < 2:
-                    alt_match = re.search(r'Patient\s*Name\s*:\s*([^\n]+?)\n([^\n]+?)(?=\nAge\s*:|$)', text, re.DOTALL)
+            if not formatted_data["Name of the Patient"] or len(formatted_data["Name of the Patient"].split()) < 2:
+                alt_match = SPLIT_PATIENT_NAME_PATTERN.search(text)
+                if alt_match:
+                    name = ' '.join([alt_match.group(1).strip(), alt_match.group(2).strip()])
+                    name = re.sub(r'\s*Age\s*:.*$', '', name)
+                    formatted_data["Name of the Patient"] = name.strip()
+                else:
+                    alt_match = PATIENT_NAME_PATTERN.search(text)
                     if alt_match:
-                        name = ' '.join([alt_match.group(1).strip(), alt_match.group(2).strip()])
+                        name = alt_match.group(1).strip()
                         name = re.sub(r'\s*Age\s*:.*$', '', name)
                         formatted_data["Name of the Patient"] = name.strip()
-                    else:
-                        alt_match = re.search(r'Patient\s*Name\s*:\s*([^\n]+?)(?=\s*Age\s*:|$)', text, re.DOTALL)
-                        if alt_match:
-                            name = alt_match.group(1).strip()
-                            name = re.sub(r'\s*Age\s*:.*$', '', name)
-                            formatted_data["Name of the Patient"] = name.strip()
-                
-                return formatted_data
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"Error processing PDF: {e}")
+            
+            return formatted_data
+        else:
             return None
 
 def main():
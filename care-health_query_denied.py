@@ -1,89 +1,46 @@
 import re
 import json
 import sys
-import fitz  # PyMuPDF
-from PIL import Image
-import io
-import pytesseract
+from ocr_engine import set_tesseract_cmd
+from pdf_document import PdfDocument
 
 class DenialLetterExtractor:
     def __init__(self):
-        pass
+        self.page_sources = []
 
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_text_from_pdf(self, document):
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page in doc:
-                page_text = page.get_text()
-                
-                if not page_text.strip():
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    page_text = pytesseract.image_to_string(img, config='--psm 4')
-                
-                text += page_text + "\n"
-            doc.close()
+            # Native text where present, OCR (2x zoom = 144 DPI) only for pages without any
+            text = document.extract_text(config='--psm 4', dpi=144, min_chars=1)
+            self.page_sources = document.page_sources
             return text
             
         except Exception as e:
             print(f"Error extracting text from PDF: {e}", file=sys.stderr)
             return ""
 
-    def extract_address_layout(self, pdf_path):
+    def extract_address_layout(self, document):
         try:
-            doc = fitz.open(pdf_path)
-            page = doc[0]  
-            words = page.get_text("words")
-            
-            address_lines = []
-            start_y = None
-            end_y = None
-            stop_processing = False
+            index = document.word_index(0)
 
-            # Find "To,"
-            for w in words:
-                if w[4].strip() == 'To,': 
-                    start_y = w[3]  
-                    break
-            if start_y is None:
+            start = index.find('To,')
+            if start is None:
                 return None
+            start_y = index[start].bottom
 
-            for w in words:
-                if w[4].strip().startswith('Subject') and w[3] > start_y:
-                    end_y = w[1]  
-                    break
-            if end_y is None:
-                end_y = start_y + 150
+            subject = index.find_prefix('Subject', where=lambda w: w.bottom > start_y)
+            end_y = index[subject].top if subject is not None else start_y + 150
 
-            lines = {}
-            for w in words:
-                if 'Inlias' in w[4] or ('ID' in w[4] and ':' in w[4]):
-                    stop_processing = True
-                    continue
-                    
-                if stop_processing:
-                    continue
-                    
-                if start_y < w[1] < end_y and w[0] < 250:  
-                    y = round(w[1], 1)
-                    lines.setdefault(y, []).append(w[4])
+            # Nothing from the "Inlias ID" label on belongs to the address
+            stop = index.first(lambda w: 'Inlias' in w.text or ('ID' in w.text and ':' in w.text))
 
-            sorted_lines = [lines[y] for y in sorted(lines)]
-            full_lines = [' '.join(line) for line in sorted_lines]
-            
-            address = ', '.join(full_lines)
-            address = address.rstrip(', ')
+            lines = index.lines(index.band(start_y, end_y, x_max=250, before=stop))
+            address = ', '.join(lines).rstrip(', ')
             return address if address else None
             
         except Exception as e:
             print(f"Error extracting address layout: {e}", file=sys.stderr)
             return None
-        finally:
-            if 'doc' in locals():
-                doc.close()
 
     def extract_al_number(self, text):
         try:
@@ -246,14 +203,26 @@ class DenialLetterExtractor:
             return None
 
     def process_denial_letter(self, pdf_path):
-        text = self.extract_text_from_pdf(pdf_path)
+        try:
+            document = PdfDocument(pdf_path)
+        except Exception as e:
+            print(f"Error extracting text from PDF: {e}", file=sys.stderr)
+            return None
+
+        # One open for the text, any OCR and the address: each scanned page is OCR'd at most once
+        with document:
+            return self.process_document(document)
+
+    def process_document(self, document):
+        """Fields of an open PdfDocument's denial, non-registration or deficiency letter, or None."""
+        text = self.extract_text_from_pdf(document)
         if not text.strip():
             return None
 
         first_line = text.split('\n')[0].strip()
 
         if first_line.lower().startswith("denial letter"):
-            hospital_address = self.extract_address_layout(pdf_path)
+            hospital_address = self.extract_address_layout(document)
             al_number = self.extract_al_number(text)
             patient_name = self.extract_patient_name(text)
             member_id, policy_number = self.extract_table_values(text)
@@ -266,7 +235,8 @@ class DenialLetterExtractor:
                 "Name of the Patient": patient_name,
                 "Policy Number": policy_number,
                 "Hospital Address": hospital_address,
-                "Reason": reason
+                "Reason": reason,
+                "Page Sources": self.page_sources
             }
         elif "NON - REGISTRATION OF CLAIM" in first_line:
             patient_name = self.extract_non_registration_patient_name(text)
@@ -278,9 +248,10 @@ class DenialLetterExtractor:
                 "Name of the Patient": patient_name,
                 "Hospital Address": hospital_address,
                 "Reason": reason,
+                "Page Sources": self.page_sources,
             }
         elif "Deficiency Letter" in first_line:
-            hospital_address = self.extract_address_layout(pdf_path)
+            hospital_address = self.extract_address_layout(document)
             al_number = self.extract_al_number(text)
             patient_name = self.extract_deficiency_patient_name(text)
             reason = self.extract_deficiency_reason(text)
@@ -291,10 +262,12 @@ class DenialLetterExtractor:
                 "Hospital Address": hospital_address,
                 "Name of the Patient": patient_name,
                 "Reason": reason,
+                "Page Sources": self.page_sources,
             }
         else:
             return None
 
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: python denial_extractor.py <path_to_pdf>", file=sys.stderr)
@@ -309,5 +282,5 @@ def main():
         print("null")
     
 if __name__ == "__main__":
-    pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+    set_tesseract_cmd(r"C:\Program Files\Tesseract-OCR\tesseract.exe")
     main()
\ No newline at end of file
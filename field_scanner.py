@@ -0,0 +1,122 @@
+"""Single-pass field scanner for the DataExtractor pattern tables.
+
+Every field pattern starts with a label ("AL Number", "Policy No", "UHID"...).
+Instead of letting each fallback pattern rescan the whole letter, the text is
+lowercased once, the offsets of each label are found with str.find, and each
+value pattern is only tried, anchored, at the positions of its own label.
+"""
+import re
+from bisect import bisect_left
+
+# Characters that may appear in the literal label a pattern starts with
+LITERAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ")
+
+# Non-ASCII characters re.IGNORECASE matches against ASCII letters but str.lower() does not map to them
+CASEFOLD_EXCEPTIONS = re.compile("[\u0130\u0131\u017f\u212a]")
+
+
+def _has_top_level_alternation(pattern):
+    """True if the pattern is an alternation at its outermost level (e.g. "foo|bar")."""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def anchor_literal(pattern):
+    """The literal label every match of pattern starts with, lowercased, or None if there is none."""
+    if _has_top_level_alternation(pattern):
+        return None
+    end = 0
+    while end < len(pattern) and pattern[end] in LITERAL_CHARS:
+        end += 1
+    # A quantifier after the run applies to its last character, which may then be absent
+    if end < len(pattern) and pattern[end] in "?*{":
+        end -= 1
+    literal = pattern[:end].lower()
+    return literal if literal.strip() else None
+
+
+def match_value(match):
+    """The value findall() would have returned for this match."""
+    groups = match.groups(default="")
+    if not groups:
+        return match.group(0)
+    return groups[0] if len(groups) == 1 else groups
+
+
+class FieldScanner:
+    """Anchor labels for every pattern in a {field: [compiled pattern]} table."""
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        self.literals = {}
+        for field_patterns in patterns.values():
+            for pattern in field_patterns:
+                self.literals[pattern] = anchor_literal(pattern.pattern)
+        # Case-insensitive even for case-sensitive patterns: anchors only need to be a superset
+        self.label_patterns = {
+            label: re.compile("(?=" + re.escape(label) + ")", re.IGNORECASE)
+            for label in set(self.literals.values()) if label
+        }
+
+    def scan(self, text):
+        return FieldScan(self, text)
+
+
+class FieldScan:
+    """Label positions found in one text, and first-match lookups that only try those positions."""
+
+    def __init__(self, scanner, text):
+        self.scanner = scanner
+        self.text = text
+        lowered = text.lower()
+        # Offsets into the lowercased copy are only valid if lowering kept every character in place
+        self.lowered = lowered if len(lowered) == len(text) and not CASEFOLD_EXCEPTIONS.search(text) else None
+        self._positions = {}
+
+    def positions(self, label):
+        """Sorted start offsets of label in the text, found on first use."""
+        if label not in self._positions:
+            if self.lowered is None:
+                found = [match.start() for match in self.scanner.label_patterns[label].finditer(self.text)]
+            else:
+                found = []
+                pos = self.lowered.find(label)
+                while pos != -1:
+                    found.append(pos)
+                    pos = self.lowered.find(label, pos + 1)
+            self._positions[label] = found
+        return self._positions[label]
+
+    def search(self, pattern, pos=0):
+        """Equivalent to pattern.search(text, pos) for patterns that don't look behind their start."""
+        label = self.scanner.literals.get(pattern)
+        if label is None:
+            return pattern.search(self.text, pos)
+        positions = self.positions(label)
+        for start in positions[bisect_left(positions, pos):]:
+            match = pattern.match(self.text, start)
+            if match:
+                return match
+        return None
+
+    def first(self, pattern, pos=0):
+        """findall(text[pos:])[0] without scanning the whole text, or None when nothing matches."""
+        match = self.search(pattern, pos)
+        return match_value(match) if match else None
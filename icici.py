@@ -1,17 +1,176 @@
-from flask import Flask, request, jsonify
-import pytesseract
-from pdf2image import convert_from_path
-import fitz  # PyMuPDF
 import re
 from datetime import datetime
 import os
+import time
 import base64
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from PIL import Image
-import numpy as np
-import cv2
+from ocr_engine import check_page_pixels, ocr_call_count, ocr_image, page_text_cache
+from line_index import LineIndex
+from pdf_document import EARLY_EXIT, PdfDocument
+from cache import ResultCache
+from preprocess import pipeline_for
+from jobs import CallbackNotAllowed, JobQueue, QueueFull
 
-app = Flask(__name__)
+# (rule, methods, view) of every endpoint, added to the Flask app by create_app()
+ROUTES = []
+
+def route(rule, methods):
+    """Record a view for create_app(); like app.route(), but importing this module doesn't import Flask."""
+    def register(view):
+        ROUTES.append((rule, methods, view))
+        return view
+    return register
+
+# Bump whenever extraction logic changes so cached results from older code are not served
+EXTRACTOR_VERSION = "3"
+
+result_cache = ResultCache(
+    memory_entries=int(os.environ.get("RESULT_CACHE_SIZE", 256)),
+    db_path=os.environ.get("RESULT_CACHE_DB") or None,
+    db_max_entries=int(os.environ.get("RESULT_CACHE_DB_MAX_ENTRIES", 10000)),
+    db_max_age=int(os.environ.get("RESULT_CACHE_DB_MAX_AGE", 7 * 24 * 3600))
+)
+
+def compile_patterns(patterns, flags=re.IGNORECASE):
+    """Compile an ordered list of fallback patterns once, at import."""
+    return [re.compile(pattern, flags) for pattern in patterns]
+
+def compile_date_patterns(labels):
+    """Compile the date patterns tried for each label, in the order they are tried."""
+    patterns = []
+    for label in labels:
+        patterns.extend([
+            fr"{label}\s*:\s*(\d{{1,2}}[-\s]?[A-Za-z]{{3}}[-\s]?\d{{2,4}})",
+            fr"{label}\s*:\s*(\d{{1,2}}[-/\s]\d{{1,2}}[-/\s]\d{{2,4}})",
+            fr"{label}\s+(\d{{1,2}}[-\s]?[A-Za-z]{{3}}[-\s]?\d{{2,4}})"
+        ])
+    return compile_patterns(patterns)
+
+# Pattern registry: every regex used by the extractors, compiled once at import
+
+AUTHORIZATION_TITLE_PATTERN = re.compile(r"Authorization\s+Letter\s+to\s+the\s+Hospital", re.IGNORECASE)
+QUERY_TITLE_PATTERN = re.compile(r"ADDITIONAL\s+INFORMATION\s+REQUEST\s+FORM", re.IGNORECASE)
+DENIAL_TITLE_PATTERNS = compile_patterns([r"DENIAL\s+OF\s+CASHLESS\s+ACCESS", r"Rejection\s+Letter"])
+
+POLICY_PERIOD_LABEL_PATTERN = re.compile(r"Policy\s+Period", re.IGNORECASE)
+POLICY_PERIOD_VALUE_PATTERN = re.compile(r"Policy\s+Period\s*:?\s*(.*)", re.IGNORECASE)
+DATE_RANGE_PATTERN = re.compile(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-\d{4})", re.IGNORECASE)
+PARTIAL_DATE_RANGE_PATTERN = re.compile(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-)", re.IGNORECASE)
+INCOMPLETE_DATE_RANGE_PATTERN = re.compile(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-)$", re.IGNORECASE)
+FINAL_DATE_RANGE_PATTERN = re.compile(r"(\d{1,2}-[A-Za-z]{3}-\d{4})\s+to\s+(\d{1,2}-[A-Za-z]{3}-\d{4})", re.IGNORECASE)
+SINGLE_DATE_PATTERN = re.compile(r"(\d{1,2}-[A-Za-z]{3}-\d{4})")
+LEADING_YEAR_PATTERN = re.compile(r"^(\d{4})")
+DIGIT_PATTERN = re.compile(r"\d")
+TO_SPACING_PATTERN = re.compile(r"\s*to\s*")
+TRAILING_HYPHEN_PATTERN = re.compile(r"-\s*$")
+
+AUTH_AL_PATTERNS = compile_patterns([
+    r"AL\s*Number\s*:\s*([^\s\n]+)",
+    r"AL\s*Number\s*[:#]\s*([0-9-]+)",
+    r"AL\s*No\.?\s*[:#]?\s*([0-9-]+)",
+    r"AL\s*Number[:#]?\s*([0-9-]+)",
+    r"AL\s*Number[:#]?\s*([^\n\r]+)"
+])
+AUTH_OCR_NAME_PATTERNS = compile_patterns([
+    r"Name\s+of\s+the\s+Patient\s*:\s*([^:\n]+?)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
+    r"Patient\s+Name\s*:\s*([^:\n]+?)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
+    r"Name\s+of\s+the\s+Patient\s+([A-Z][A-Z\s]+)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
+    r"Name\s+of\s+the\s+Patient\s*:\s*([^\n]+)",
+    r"Patient\s+Name\s*:\s*([^\n]+)"
+])
+AUTH_NAME_PATTERNS = compile_patterns([
+    r"Name\s+of\s+the\s+Patient\s*:\s*([^:\n]+)",
+    r"Patient\s+Name\s*:\s*([^:\n]+)",
+    r"Patient\s*:\s*([^:\n]+)",
+    r"Name\s+of\s+Patient\s*:\s*([^:\n]+)"
+])
+AUTH_UHID_PATTERNS = compile_patterns([
+    r"UHID\s*Number\s*:\s*([^\s\n:]+)",
+    r"UHID\s*No\.?\s*:\s*([^\s\n:]+)",
+    r"UHID\s*:\s*([^\s\n:]+)",
+    r"UHID\s*Number\s*[:#]\s*([^\n\r:]+)"
+])
+AUTH_POLICY_PATTERNS = compile_patterns([
+    r"Policy\s*No\s*:\s*([^\s\n:]+)",
+    r"Policy\s*Number\s*:\s*([^\s\n:]+)",
+    r"Policy\s*:\s*([^\s\n:]+)",
+    r"Policy\s*No\.?\s*[:#]\s*([^\n\r:]+)",
+    r"Policy\s*No\s+([0-9/X]+)"
+])
+AUTH_TOTAL_PATTERNS = compile_patterns([
+    r"Total\s+Bill\s+Amount\s*:\s*([\d,]+)",
+    r"Total\s+Bill\s*:\s*([\d,]+)",
+    r"Total\s+Amount\s*:\s*([\d,]+)",
+    r"Bill\s+Amount\s*:\s*([\d,]+)",
+    r"Total\s+Bill\s+Amount\s+([\d,]+)"
+])
+TOTAL_BILL_LABEL_PATTERN = re.compile(r"Total\s+Bill\s+Amount", re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(r"[\d,]+")
+AUTH_APPROVED_PATTERNS = compile_patterns([
+    r"guarantee\s+for\s+payment\s+of\s+Rs\s*([\d,]+)",
+    r"payment\s+of\s+Rs\s*([\d,]+)",
+    r"Approved\s+Amount\s*:\s*([\d,]+)",
+    r"Final\s+Approved\s+Amount\s*[:#]?\s*([\d,]+)",
+    r"Rs\s*([\d,]+)\s+\(in words\)"
+])
+ADMISSION_DATE_PATTERNS = compile_date_patterns(["Date of Admission", "Admission Date", "DOA"])
+DISCHARGE_DATE_PATTERNS = compile_date_patterns(["Date of Discharge", "Discharge Date", "DOD"])
+REMARKS_LABEL_PATTERN = re.compile(r"Remarks\s*:", re.IGNORECASE)
+REMARKS_BOUNDARY_PATTERN = re.compile("For any cashless queries", re.IGNORECASE)
+REMARKS_END_PATTERN = re.compile(
+    r"(\n\s*\n|\nNote:|\nImportant Note:|Terms and Conditions of Authorization)",
+    re.IGNORECASE | re.DOTALL
+)
+NON_MEDICAL_PATTERNS = compile_patterns([
+    r"Non-Medical\s+Expenses.*?\(Please.*?\)(.+?)(?:\n\n|\n\s*\n|$)",
+    r"Rs\.\s*([\d,]+)[-/]?\s*Deducted\s+as\s+Non\s+medical\s+expenses"
+], re.IGNORECASE | re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+LEADING_PUNCTUATION_PATTERN = re.compile(r"^[:\s-]+")
+
+# Query and denied letters share the same header block
+CLAIM_NAME_PATTERNS = compile_patterns([
+    r"Claim\s+of\s*:?\s*([^\n]+)",
+    r"Claim\s+of\s+([^\n]+)",
+    r"Name\s+of\s+the\s+Patient\s*:\s*([^\n]+)",
+    r"Patient\s+Name\s*:\s*([^\n]+)"
+])
+CLAIM_UHID_PATTERNS = compile_patterns([
+    r"UHID\s*:?\s*([^\n]+)",
+    r"UHID\s+([^\n]+)",
+    r"UHID\s*Number\s*:\s*([^\n]+)"
+])
+CLAIM_POLICY_PATTERNS = compile_patterns([
+    r"Policy\s*Number\s*:?\s*([^\n]+)",
+    r"Policy\s*No\s*:?\s*([^\n]+)",
+    r"Policy\s*Number\s+([^\n]+)"
+])
+CLAIM_AL_PATTERNS = compile_patterns([
+    r"AL\s*Number\s*:?\s*([^\n]+)",
+    r"AL\s*No\s*:?\s*([^\n]+)",
+    r"AL\s*Number\s+([^\n]+)"
+])
+QUERY_ADMISSION_PATTERNS = compile_patterns([
+    r"Date\s+of\s+Admission\s*:?\s*([^\n]+)",
+    r"Admission\s+Date\s*:?\s*([^\n]+)",
+    r"DOA\s*:?\s*([^\n]+)"
+])
+QUERY_REMARKS_PATTERN = re.compile(
+    r"REMARKS\s*:(.+?)(?:Any\s+Other\s+document|We\s+request\s+you|$)",
+    re.IGNORECASE | re.DOTALL
+)
+QUERY_TABLE_HEADER_PATTERN = re.compile(r"Sr\s*No\s*Query\s*Description", re.IGNORECASE)
+FIRST_REASON_PATTERN = re.compile(r"1\s+([^0-9\n]+?)(?=\s+2\s+|\n\s*2\s+|Description|\n\n|$)")
+DENIAL_REASON_SECTION_PATTERN = re.compile(
+    r"mentioned\s+herein\s+below(.+?)(?:Important\s+Note|$)",
+    re.IGNORECASE | re.DOTALL
+)
+DENIAL_TABLE_HEADER_PATTERN = re.compile(r"Sr\s*No\s*Reason\s*Description", re.IGNORECASE)
+TABLE_REASON_PATTERN = re.compile(r"(\d+)\s+([^0-9\n]+?)(?=\s+\d+\.\s+|\n\s*\d+\s+|Description|\n\n|$)")
+NUMBERED_LINE_PATTERN = re.compile(r"^\s*(\d+)\s+(.+)$")
 
 def normalize_text(s):
     """Normalize text by replacing special characters and whitespace."""
@@ -19,68 +178,26 @@ def normalize_text(s):
         return None
     return s.replace('\u00A0', ' ').replace('­', '-').replace('–', '-').replace('—', '-').strip()
 
-def preprocess_image(image):
-    """Apply preprocessing to improve OCR accuracy."""
-    try:
-        # Convert PIL image to OpenCV format
-        open_cv_image = np.array(image) 
-        if len(open_cv_image.shape) == 3:
-            open_cv_image = open_cv_image[:, :, ::-1].copy() # Convert RGB to BGR
-        
-        # Convert to grayscale
-        if len(open_cv_image.shape) == 3:
-            gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = open_cv_image
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                      cv2.THRESH_BINARY, 11, 2)
-        
-        # Noise removal
-        kernel = np.ones((1, 1), np.uint8)
-        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-        
-        # Convert back to PIL format
-        return Image.fromarray(opening)
-    except Exception as e:
-        print(f"Warning: Image preprocessing failed: {e}. Using original image.")
-        return image
+# Applied to scanned pages and images when a request asks for preprocessing
+preprocess_image = pipeline_for("ICICI Lombard")
 
-def is_scanned_pdf(pdf_stream):
-    """Determine if a PDF is scanned (image-based) or contains extractable text."""
-    try:
-        doc = fitz.open(stream=pdf_stream, filetype="pdf")
-        text_content = ""
-        for page in doc:
-            text_content += page.get_text()
-        doc.close()
-        
-        # If there's very little text or no text, it's likely a scanned PDF
-        if len(text_content.strip()) < 100:
-            return True
-        return False
-    except Exception as e:
-        print(f"Error checking PDF type: {e}")
-        # Default to treating as scanned if we can't determine
-        return True
-
-def identify_letter_type(text):
+def identify_letter_type(text, lines=None):
     """Identify letter type based on the first few lines of text."""
     # Extract first few lines
-    lines = text.split('\n')
-    first_lines = ' '.join(lines[:20])  # Consider first 20 lines to catch the title
+    if lines is None:
+        lines = LineIndex(text, normalize_text)
+    first_lines = ' '.join(lines.lines[:20])  # Consider first 20 lines to catch the title
     
     # Check for authorization letter
-    if re.search(r"Authorization\s+Letter\s+to\s+the\s+Hospital", first_lines, re.IGNORECASE):
+    if AUTHORIZATION_TITLE_PATTERN.search(first_lines):
         return "Authorization Letter"
     
     # Check for query letter
-    if re.search(r"ADDITIONAL\s+INFORMATION\s+REQUEST\s+FORM", first_lines, re.IGNORECASE):
+    if QUERY_TITLE_PATTERN.search(first_lines):
         return "Query Letter"
     
     # Check for denied letter
-    if re.search(r"DENIAL\s+OF\s+CASHLESS\s+ACCESS", first_lines, re.IGNORECASE) or re.search(r"Rejection\s+Letter", first_lines, re.IGNORECASE):
+    if any(pattern.search(first_lines) for pattern in DENIAL_TITLE_PATTERNS):
         return "Denied Letter"
     
     # Default if no specific type is identified
@@ -108,134 +225,128 @@ def clean_patient_name(name_text):
     
     return name_text
 
-def extract_policy_period(text, debug=False):
+def extract_policy_period(text, debug=False, lines=None):
     """Extract policy period from text with improved handling for multi-line periods."""
-    lines = text.split("\n")
+    if lines is None:
+        lines = LineIndex(text, normalize_text)
     policy_period_value = None
     
-    # First pass: Look for complete policy period on a single line
-    for i, line in enumerate(lines):
-        normalized_line = normalize_text(line)
-        # Look for the line containing "Policy Period"
-        if re.search(r"Policy\s+Period", normalized_line, re.IGNORECASE):
-            if debug: print(f"DEBUG: Found potential Policy Period line {i}: ", repr(normalized_line))
+    # First pass: Look for complete policy period on the lines containing "Policy Period"
+    for i in lines.lines_matching(POLICY_PERIOD_LABEL_PATTERN):
+        normalized_line = lines[i]
+        if debug: print(f"DEBUG: Found potential Policy Period line {i}: ", repr(normalized_line))
+        
+        # Extract the value part after "Policy Period" (and optional colon)
+        match = POLICY_PERIOD_VALUE_PATTERN.search(normalized_line)
+        if match:
+            current_value = match.group(1).strip()
+            if debug: print(f"DEBUG: Initial value from line {i}: ", repr(current_value))
             
-            # Extract the value part after "Policy Period" (and optional colon)
-            match = re.search(r"Policy\s+Period\s*:?\s*(.*)", normalized_line, re.IGNORECASE)
-            if match:
-                current_value = match.group(1).strip()
-                if debug: print(f"DEBUG: Initial value from line {i}: ", repr(current_value))
+            # If the value is empty or just contains a colon, check the next line
+            if not current_value or current_value == ":":
+                if debug: print(f"DEBUG: Empty value on line {i}, checking next line")
+                
+                # Look at the next non-empty line
+                next_line_index = lines.next_non_empty(i)
                 
-                # If the value is empty or just contains a colon, check the next line
-                if not current_value or current_value == ":":
-                    if debug: print(f"DEBUG: Empty value on line {i}, checking next line")
+                if next_line_index < len(lines):
+                    next_line = lines[next_line_index]
+                    if debug: print(f"DEBUG: Next non-empty line {next_line_index}: ", repr(next_line))
                     
-                    # Look at the next non-empty line
-                    next_line_index = i + 1
-                    while next_line_index < len(lines) and not lines[next_line_index].strip():
-                        next_line_index += 1
+                    # Check if the next line contains a date range
+                    date_range_match = DATE_RANGE_PATTERN.search(next_line)
+                    if date_range_match:
+                        policy_period_value = date_range_match.group(1)
+                        if debug: print(f"DEBUG: Found complete date range on next line: ", repr(policy_period_value))
+                        break
                     
-                    if next_line_index < len(lines):
-                        next_line = normalize_text(lines[next_line_index])
-                        if debug: print(f"DEBUG: Next non-empty line {next_line_index}: ", repr(next_line))
+                    # Check if the next line contains a partial date range
+                    partial_match = PARTIAL_DATE_RANGE_PATTERN.search(next_line)
+                    if partial_match:
+                        partial_value = partial_match.group(1)
+                        if debug: print(f"DEBUG: Found partial date range on next line: ", repr(partial_value))
                         
-                        # Check if the next line contains a date range
-                        date_range_match = re.search(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-\d{4})", next_line, re.IGNORECASE)
-                        if date_range_match:
-                            policy_period_value = date_range_match.group(1)
-                            if debug: print(f"DEBUG: Found complete date range on next line: ", repr(policy_period_value))
-                            break
+                        # Look for the year on the line after that
+                        year_line_index = lines.next_non_empty(next_line_index)
                         
-                        # Check if the next line contains a partial date range
-                        partial_match = re.search(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-)", next_line, re.IGNORECASE)
-                        if partial_match:
-                            partial_value = partial_match.group(1)
-                            if debug: print(f"DEBUG: Found partial date range on next line: ", repr(partial_value))
+                        if year_line_index < len(lines):
+                            year_line = lines[year_line_index]
+                            if debug: print(f"DEBUG: Checking line {year_line_index} for year: ", repr(year_line))
                             
-                            # Look for the year on the line after that
-                            year_line_index = next_line_index + 1
-                            while year_line_index < len(lines) and not lines[year_line_index].strip():
-                                year_line_index += 1
-                            
-                            if year_line_index < len(lines):
-                                year_line = normalize_text(lines[year_line_index])
-                                if debug: print(f"DEBUG: Checking line {year_line_index} for year: ", repr(year_line))
-                                
-                                # Check if the line starts with a 4-digit year
-                                year_match = re.match(r"^(\d{4})", year_line)
-                                if year_match:
-                                    year = year_match.group(1)
-                                    policy_period_value = partial_value + year 
-                                    if debug: print(f"DEBUG: Combined with year from line {year_line_index}: ", repr(policy_period_value))
-                                    break
-                        
-                        # If no date pattern found, use the entire next line as a fallback
-                        if not policy_period_value and re.search(r"\d", next_line):  # Only if it contains at least one digit
-                            policy_period_value = next_line
-                            if debug: print(f"DEBUG: Using entire next line as fallback: ", repr(policy_period_value))
-                            break
-                
-                # Check if the value looks like a complete date range
-                complete_match = re.search(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-\d{4})", current_value, re.IGNORECASE)
-                if complete_match:
-                    policy_period_value = complete_match.group(1)
-                    if debug: print(f"DEBUG: Complete value found on line {i}: ", repr(policy_period_value))
-                    break  # Found complete value, stop searching
-                
-                # Check if the value looks like 'DD-MMM-YYYY to DD-MMM-' (incomplete)
-                incomplete_match = re.match(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-)$", current_value, re.IGNORECASE)
+                            # Check if the line starts with a 4-digit year
+                            year_match = LEADING_YEAR_PATTERN.match(year_line)
+                            if year_match:
+                                year = year_match.group(1)
+                                policy_period_value = partial_value + year 
+                                if debug: print(f"DEBUG: Combined with year from line {year_line_index}: ", repr(policy_period_value))
+                                break
+                    
+                    # If no date pattern found, use the entire next line as a fallback
+                    if not policy_period_value and DIGIT_PATTERN.search(next_line):  # Only if it contains at least one digit
+                        policy_period_value = next_line
+                        if debug: print(f"DEBUG: Using entire next line as fallback: ", repr(policy_period_value))
+                        break
+            
+            # Check if the value looks like a complete date range
+            complete_match = DATE_RANGE_PATTERN.search(current_value)
+            if complete_match:
+                policy_period_value = complete_match.group(1)
+                if debug: print(f"DEBUG: Complete value found on line {i}: ", repr(policy_period_value))
+                break  # Found complete value, stop searching
+            
+            # Check if the value looks like 'DD-MMM-YYYY to DD-MMM-' (incomplete)
+            incomplete_match = INCOMPLETE_DATE_RANGE_PATTERN.match(current_value)
+            
+            if incomplete_match or current_value.endswith("-"):
+                if debug: print(f"DEBUG: Value on line {i} appears incomplete: ", repr(current_value))
                 
-                if incomplete_match or current_value.endswith("-"):
-                    if debug: print(f"DEBUG: Value on line {i} appears incomplete: ", repr(current_value))
+                # Look ahead for the year on subsequent lines
+                for j in range(i+1, min(i+5, len(lines))):  # Check up to 5 lines ahead
+                    next_line = lines[j]
+                    if debug: print(f"DEBUG: Checking line {j} for year: ", repr(next_line))
                     
-                    # Look ahead for the year on subsequent lines
-                    for j in range(i+1, min(i+5, len(lines))):  # Check up to 5 lines ahead
-                        next_line = normalize_text(lines[j])
-                        if debug: print(f"DEBUG: Checking line {j} for year: ", repr(next_line))
+                    # Check if the next line starts with a 4-digit year
+                    year_match = LEADING_YEAR_PATTERN.match(next_line)
+                    if year_match:
+                        year = year_match.group(1)
+                        if debug: print(f"DEBUG: Found year on line {j}: ", repr(year))
                         
-                        # Check if the next line starts with a 4-digit year
-                        year_match = re.match(r"^(\d{4})", next_line)
-                        if year_match:
-                            year = year_match.group(1)
-                            if debug: print(f"DEBUG: Found year on line {j}: ", repr(year))
-                            
-                            # Combine: ensure trailing hyphen exists before appending year
-                            base_value = current_value.strip()
-                            if not base_value.endswith("-"):
-                                base_value += "-"
-                            policy_period_value = base_value + year
-                            if debug: print(f"DEBUG: Combined value with year: ", repr(policy_period_value))
-                            break  # Found year, stop searching ahead
-                        
-                        # Also check if the line contains the full date (sometimes the entire "to DATE" part is on next line)
-                        date_match = re.search(r"(\d{1,2}-[A-Za-z]{3}-\d{4})", next_line)
-                        if date_match and "to" not in current_value:
-                            end_date = date_match.group(1)
-                            if debug: print(f"DEBUG: Found end date on line {j}: ", repr(end_date))
-                            
-                            # Check if current_value already has a date
-                            if re.search(r"\d{1,2}-[A-Za-z]{3}-\d{4}", current_value):
-                                policy_period_value = f"{current_value.strip()} to {end_date}"
-                                if debug: print(f"DEBUG: Combined with end date: ", repr(policy_period_value))
-                                break
+                        # Combine: ensure trailing hyphen exists before appending year
+                        base_value = current_value.strip()
+                        if not base_value.endswith("-"):
+                            base_value += "-"
+                        policy_period_value = base_value + year
+                        if debug: print(f"DEBUG: Combined value with year: ", repr(policy_period_value))
+                        break  # Found year, stop searching ahead
                     
-                    # If we found a combined value, stop the outer loop too
-                    if policy_period_value:
-                        break
-                else:
-                    # If it doesn't match the specific incomplete pattern, store it as a fallback
-                    # Only store if it contains digits to avoid storing labels like "Policy Period:"
-                    if re.search(r"\d", current_value):
-                        policy_period_value = current_value
-                        if debug: print(f"DEBUG: Using value as fallback: ", repr(policy_period_value))
-                    # Don't break here, continue searching in case a better match exists
+                    # Also check if the line contains the full date (sometimes the entire "to DATE" part is on next line)
+                    date_match = SINGLE_DATE_PATTERN.search(next_line)
+                    if date_match and "to" not in current_value:
+                        end_date = date_match.group(1)
+                        if debug: print(f"DEBUG: Found end date on line {j}: ", repr(end_date))
+                        
+                        # Check if current_value already has a date
+                        if SINGLE_DATE_PATTERN.search(current_value):
+                            policy_period_value = f"{current_value.strip()} to {end_date}"
+                            if debug: print(f"DEBUG: Combined with end date: ", repr(policy_period_value))
+                            break
+                
+                # If we found a combined value, stop the outer loop too
+                if policy_period_value:
+                    break
+            else:
+                # If it doesn't match the specific incomplete pattern, store it as a fallback
+                # Only store if it contains digits to avoid storing labels like "Policy Period:"
+                if DIGIT_PATTERN.search(current_value):
+                    policy_period_value = current_value
+                    if debug: print(f"DEBUG: Using value as fallback: ", repr(policy_period_value))
+                # Don't break here, continue searching in case a better match exists
     
     # Second pass: If we didn't find a policy period with the label, look for date patterns
     if not policy_period_value:
-        for i, line in enumerate(lines):
-            normalized_line = normalize_text(line)
+        for i in lines.lines_matching(DATE_RANGE_PATTERN):
             # Look for a pattern like "DD-MMM-YYYY to DD-MMM-YYYY"
-            date_range_match = re.search(r"(\d{1,2}-[A-Za-z]{3}-\d{4}\s+to\s+\d{1,2}-[A-Za-z]{3}-\d{4})", normalized_line, re.IGNORECASE)
+            date_range_match = DATE_RANGE_PATTERN.search(lines[i])
             if date_range_match:
                 policy_period_value = date_range_match.group(1)
                 if debug: print(f"DEBUG: Found date range without label on line {i}: ", repr(policy_period_value))
@@ -244,11 +355,11 @@ def extract_policy_period(text, debug=False):
     # Final cleanup
     if policy_period_value:
         # Ensure spacing around 'to'
-        policy_period_value = re.sub(r"\s*to\s*", " to ", policy_period_value).strip()
+        policy_period_value = TO_SPACING_PATTERN.sub(" to ", policy_period_value).strip()
         # Remove trailing hyphens if any resulted from normalization or incomplete extraction
-        policy_period_value = re.sub(r"-\s*$", "", policy_period_value).strip()
+        policy_period_value = TRAILING_HYPHEN_PATTERN.sub("", policy_period_value).strip()
         # Ensure the final format is DD-MMM-YYYY to DD-MMM-YYYY
-        final_match = re.match(r"(\d{1,2}-[A-Za-z]{3}-\d{4})\s+to\s+(\d{1,2}-[A-Za-z]{3}-\d{4})", policy_period_value, re.IGNORECASE)
+        final_match = FINAL_DATE_RANGE_PATTERN.match(policy_period_value)
         if final_match:
             policy_period_value = f"{final_match.group(1)} to {final_match.group(2)}"
         else:
@@ -261,42 +372,23 @@ def extract_policy_period(text, debug=False):
         
     return policy_period_value
 
-def extract_authorization_letter_fields(text, with_ocr=False):
+def extract_authorization_letter_fields(text, with_ocr=False, lines=None):
     """Extract fields specific to Authorization Letter."""
+    if lines is None:
+        lines = LineIndex(text, normalize_text)
     # Extract AL Number
     al_number = None
-    al_patterns = [
-        r"AL\s*Number\s*:\s*([^\s\n]+)",
-        r"AL\s*Number\s*[:#]\s*([0-9-]+)",
-        r"AL\s*No\.?\s*[:#]?\s*([0-9-]+)",
-        r"AL\s*Number[:#]?\s*([0-9-]+)",
-        r"AL\s*Number[:#]?\s*([^\n\r]+)"
-    ]
-    for pattern in al_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUTH_AL_PATTERNS:
+        match = pattern.search(text)
         if match:
             al_number = match.group(1).strip()
             break
 
     # Extract patient name
     patient_name = None
-    if with_ocr:
-        name_patterns = [
-            r"Name\s+of\s+the\s+Patient\s*:\s*([^:\n]+?)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
-            r"Patient\s+Name\s*:\s*([^:\n]+?)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
-            r"Name\s+of\s+the\s+Patient\s+([A-Z][A-Z\s]+)(?=\s{2,}|\t|Policy|UHID|Co-Pay|$)",
-            r"Name\s+of\s+the\s+Patient\s*:\s*([^\n]+)",
-            r"Patient\s+Name\s*:\s*([^\n]+)"
-        ]
-    else:
-        name_patterns = [
-            r"Name\s+of\s+the\s+Patient\s*:\s*([^:\n]+)",
-            r"Patient\s+Name\s*:\s*([^:\n]+)",
-            r"Patient\s*:\s*([^:\n]+)",
-            r"Name\s+of\s+Patient\s*:\s*([^:\n]+)"
-        ]
+    name_patterns = AUTH_OCR_NAME_PATTERNS if with_ocr else AUTH_NAME_PATTERNS
     for pattern in name_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = pattern.search(text)
         if match:
             raw_name = match.group(1).strip()
             patient_name = clean_patient_name(raw_name)
@@ -304,70 +396,41 @@ def extract_authorization_letter_fields(text, with_ocr=False):
 
     # Extract UHID Number
     uhid_number = None
-    uhid_patterns = [
-        r"UHID\s*Number\s*:\s*([^\s\n:]+)",
-        r"UHID\s*No\.?\s*:\s*([^\s\n:]+)",
-        r"UHID\s*:\s*([^\s\n:]+)",
-        r"UHID\s*Number\s*[:#]\s*([^\n\r:]+)"
-    ]
-    for pattern in uhid_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUTH_UHID_PATTERNS:
+        match = pattern.search(text)
         if match:
             uhid_number = match.group(1).strip()
             break
 
     # Extract Policy Number
     policy_no = None
-    policy_patterns = [
-        r"Policy\s*No\s*:\s*([^\s\n:]+)",
-        r"Policy\s*Number\s*:\s*([^\s\n:]+)",
-        r"Policy\s*:\s*([^\s\n:]+)",
-        r"Policy\s*No\.?\s*[:#]\s*([^\n\r:]+)",
-        r"Policy\s*No\s+([0-9/X]+)"
-    ]
-    for pattern in policy_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUTH_POLICY_PATTERNS:
+        match = pattern.search(text)
         if match:
             policy_no = match.group(1).strip()
             break
 
     # Extract Total Bill Amount
     total_amount = None
-    total_patterns = [
-        r"Total\s+Bill\s+Amount\s*:\s*([\d,]+)",
-        r"Total\s+Bill\s*:\s*([\d,]+)",
-        r"Total\s+Amount\s*:\s*([\d,]+)",
-        r"Bill\s+Amount\s*:\s*([\d,]+)",
-        r"Total\s+Bill\s+Amount\s+([\d,]+)"
-    ]
-    for pattern in total_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUTH_TOTAL_PATTERNS:
+        match = pattern.search(text)
         if match:
             total_amount = match.group(1).strip()
             break
     if not total_amount:
-        lines = text.split("\n")
-        for i, line in enumerate(lines):
-            if re.search(r"Total\s+Bill\s+Amount", line, re.IGNORECASE):
-                for j in range(i, min(i+3, len(lines))):
-                    amount_match = re.search(r"[\d,]+", lines[j])
-                    if amount_match:
-                        total_amount = amount_match.group(0).strip()
-                        break
-                if total_amount:
+        for i in lines.lines_matching(TOTAL_BILL_LABEL_PATTERN):
+            for j in range(i, min(i+3, len(lines))):
+                amount_match = AMOUNT_PATTERN.search(lines[j])
+                if amount_match:
+                    total_amount = amount_match.group(0).strip()
                     break
+            if total_amount:
+                break
 
     # Extract Approved Amount
     approved_amount = None
-    approved_patterns = [
-        r"guarantee\s+for\s+payment\s+of\s+Rs\s*([\d,]+)",
-        r"payment\s+of\s+Rs\s*([\d,]+)",
-        r"Approved\s+Amount\s*:\s*([\d,]+)",
-        r"Final\s+Approved\s+Amount\s*[:#]?\s*([\d,]+)",
-        r"Rs\s*([\d,]+)\s+\(in words\)"
-    ]
-    for pattern in approved_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in AUTH_APPROVED_PATTERNS:
+        match = pattern.search(text)
         if match:
             approved_amount = match.group(1).strip()
             break
@@ -397,19 +460,10 @@ def extract_authorization_letter_fields(text, with_ocr=False):
                 pass
         return date_str
 
-    def extract_date(label_patterns):
+    def extract_date(date_patterns):
         """Extract date using multiple patterns."""
-        for label in label_patterns:
-            pattern = fr"{label}\s*:\s*(\d{{1,2}}[-\s]?[A-Za-z]{{3}}[-\s]?\d{{2,4}})"
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return format_date(match.group(1))
-            pattern = fr"{label}\s*:\s*(\d{{1,2}}[-/\s]\d{{1,2}}[-/\s]\d{{2,4}})"
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return format_date(match.group(1))
-            pattern = fr"{label}\s+(\d{{1,2}}[-\s]?[A-Za-z]{{3}}[-\s]?\d{{2,4}})"
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in date_patterns:
+            match = pattern.search(text)
             if match:
                 return format_date(match.group(1))
         return None
@@ -421,28 +475,19 @@ def extract_authorization_letter_fields(text, with_ocr=False):
         return num_str.replace(",", "").strip()
 
     # Extract dates
-    admission_date = extract_date([
-        "Date of Admission", 
-        "Admission Date", 
-        "DOA"
-    ])
-    discharge_date = extract_date([
-        "Date of Discharge", 
-        "Discharge Date", 
-        "DOD"
-    ])
+    admission_date = extract_date(ADMISSION_DATE_PATTERNS)
+    discharge_date = extract_date(DISCHARGE_DATE_PATTERNS)
 
     # Extract Remarks
     remarks_text = None 
-    boundary_marker = "For any cashless queries"
-    remarks_start_match = re.search(r"Remarks\s*:", text, re.IGNORECASE)
+    remarks_start_match = REMARKS_LABEL_PATTERN.search(text)
     
     if remarks_start_match:
         remarks_content_start_index = remarks_start_match.end()
-        boundary_match = re.search(boundary_marker, text[remarks_content_start_index:], re.IGNORECASE)
+        boundary_match = REMARKS_BOUNDARY_PATTERN.search(text, remarks_content_start_index)
         
         if boundary_match:
-            boundary_index_absolute = remarks_content_start_index + boundary_match.start()
+            boundary_index_absolute = boundary_match.start()
             line_start_index = text.rfind("\n", 0, boundary_index_absolute)
             remarks_content_end_index = line_start_index + 1 if line_start_index != -1 else remarks_content_start_index
             if remarks_content_end_index < remarks_content_start_index:
@@ -450,19 +495,15 @@ def extract_authorization_letter_fields(text, with_ocr=False):
             remarks_text = text[remarks_content_start_index:remarks_content_end_index].strip()
         else:
             remaining_text = text[remarks_content_start_index:]
-            end_match = re.search(r"(\n\s*\n|\nNote:|\nImportant Note:|Terms and Conditions of Authorization)", remaining_text, re.IGNORECASE | re.DOTALL)
+            end_match = REMARKS_END_PATTERN.search(remaining_text)
             if end_match:
                 remarks_text = remaining_text[:end_match.start()].strip()
             else:
                 remarks_text = remaining_text.strip()
 
     if not remarks_text:
-        non_medical_patterns = [
-            r"Non-Medical\s+Expenses.*?\(Please.*?\)(.+?)(?:\n\n|\n\s*\n|$)",
-            r"Rs\.\s*([\d,]+)[-/]?\s*Deducted\s+as\s+Non\s+medical\s+expenses"
-        ]
-        for idx, pattern in enumerate(non_medical_patterns):
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        for idx, pattern in enumerate(NON_MEDICAL_PATTERNS):
+            match = pattern.search(text)
             if match:
                 if idx == 0 and len(match.groups()) > 0 and match.group(1) and match.group(1).strip():
                      remarks_text = match.group(1).strip()
@@ -472,11 +513,11 @@ def extract_authorization_letter_fields(text, with_ocr=False):
                      break
 
     if remarks_text:
-        remarks_text = re.sub(r"\s+", " ", remarks_text).strip()
-        remarks_text = re.sub(r"^[:\s-]+", "", remarks_text).strip()
+        remarks_text = WHITESPACE_PATTERN.sub(" ", remarks_text).strip()
+        remarks_text = LEADING_PUNCTUATION_PATTERN.sub("", remarks_text).strip()
 
     # Extract Policy Period
-    policy_period = extract_policy_period(text)
+    policy_period = extract_policy_period(text, lines=lines)
     
     # Compile results for Authorization Letter
     results = {
@@ -495,94 +536,65 @@ def extract_authorization_letter_fields(text, with_ocr=False):
     
     return results
 
-def extract_query_letter_fields(text, with_ocr=False):
+def extract_query_letter_fields(text, with_ocr=False, lines=None):
     """Extract fields specific to Query Letter."""
+    if lines is None:
+        lines = LineIndex(text, normalize_text)
     # Extract patient name (Claim of)
     patient_name = None
-    name_patterns = [
-        r"Claim\s+of\s*:?\s*([^\n]+)",
-        r"Claim\s+of\s+([^\n]+)",
-        r"Name\s+of\s+the\s+Patient\s*:\s*([^\n]+)",
-        r"Patient\s+Name\s*:\s*([^\n]+)"
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_NAME_PATTERNS:
+        match = pattern.search(text)
         if match:
             patient_name = match.group(1).strip()
             break
     
     # Extract UHID
     uhid_number = None
-    uhid_patterns = [
-        r"UHID\s*:?\s*([^\n]+)",
-        r"UHID\s+([^\n]+)",
-        r"UHID\s*Number\s*:\s*([^\n]+)"
-    ]
-    
-    for pattern in uhid_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_UHID_PATTERNS:
+        match = pattern.search(text)
         if match:
             uhid_number = match.group(1).strip()
             break
     
     # Extract Policy Number
     policy_no = None
-    policy_patterns = [
-        r"Policy\s*Number\s*:?\s*([^\n]+)",
-        r"Policy\s*No\s*:?\s*([^\n]+)",
-        r"Policy\s*Number\s+([^\n]+)"
-    ]
-    
-    for pattern in policy_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_POLICY_PATTERNS:
+        match = pattern.search(text)
         if match:
             policy_no = match.group(1).strip()
             break
     
     # Extract Policy Period with improved handling for multi-line periods
-    policy_period = extract_policy_period(text)
+    policy_period = extract_policy_period(text, lines=lines)
     
     # Extract Date of Admission
     admission_date = None
-    date_patterns = [
-        r"Date\s+of\s+Admission\s*:?\s*([^\n]+)",
-        r"Admission\s+Date\s*:?\s*([^\n]+)",
-        r"DOA\s*:?\s*([^\n]+)"
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in QUERY_ADMISSION_PATTERNS:
+        match = pattern.search(text)
         if match:
             admission_date = match.group(1).strip()
             break
     
     # Extract AL Number
     al_number = None
-    al_patterns = [
-        r"AL\s*Number\s*:?\s*([^\n]+)",
-        r"AL\s*No\s*:?\s*([^\n]+)",
-        r"AL\s*Number\s+([^\n]+)"
-    ]
-    
-    for pattern in al_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_AL_PATTERNS:
+        match = pattern.search(text)
         if match:
             al_number = match.group(1).strip()
             break
     
     # Extract Reasons from table - ONLY THE REASON COLUMN
     remarks_section = ""
-    remarks_match = re.search(r"REMARKS\s*:(.+?)(?:Any\s+Other\s+document|We\s+request\s+you|$)", text, re.IGNORECASE | re.DOTALL)
+    remarks_match = QUERY_REMARKS_PATTERN.search(text)
     if remarks_match:
         remarks_section = remarks_match.group(1).strip()
     
     reasons = []
     
-    table_header_match = re.search(r"Sr\s*No\s*Query\s*Description", remarks_section, re.IGNORECASE)
+    table_header_match = QUERY_TABLE_HEADER_PATTERN.search(remarks_section)
     if table_header_match:
         table_text = remarks_section[table_header_match.end():]
-        reason_matches = re.findall(r"(\d+)\s+([^0-9\n]+?)(?=\s+\d+\.\s+|\n\s*\d+\s+|Description|\n\n|$)", table_text)
+        reason_matches = TABLE_REASON_PATTERN.findall(table_text)
         
         for num, reason in reason_matches:
             reason = reason.strip()
@@ -605,16 +617,16 @@ def extract_query_letter_fields(text, with_ocr=False):
                 reasons.append(f"{i}. {query}")
     
     if not reasons:
-        lines = remarks_section.split('\n')
+        remark_lines = remarks_section.split('\n')
         current_num = None
         current_reason = None
         
-        for line in lines:
+        for line in remark_lines:
             line = line.strip()
             if not line:
                 continue
                 
-            num_match = re.match(r"^\s*(\d+)\s+(.+)$", line)
+            num_match = NUMBERED_LINE_PATTERN.match(line)
             if num_match:
                 if current_num and current_reason:
                     reasons.append(f"{current_num}. {current_reason}")
@@ -631,7 +643,7 @@ def extract_query_letter_fields(text, with_ocr=False):
                 break
     
     if reasons and not any(r.startswith("1.") for r in reasons):
-        first_reason_match = re.search(r"1\s+([^0-9\n]+?)(?=\s+2\s+|\n\s*2\s+|Description|\n\n|$)", remarks_section)
+        first_reason_match = FIRST_REASON_PATTERN.search(remarks_section)
         if first_reason_match:
             first_reason = first_reason_match.group(1).strip()
             if "Description" in first_reason:
@@ -639,7 +651,7 @@ def extract_query_letter_fields(text, with_ocr=False):
             reasons.insert(0, f"1. {first_reason}")
     
     if reasons and not any(r.startswith("1.") for r in reasons):
-        for i, line in enumerate(text.split('\n')):
+        for line in lines:
             if "Past Medical" in line or "Medical History" in line:
                 reasons.insert(0, "1. Past Medical/Surgical History")
                 break
@@ -683,64 +695,41 @@ def extract_query_letter_fields(text, with_ocr=False):
     
     return results
 
-def extract_denied_letter_fields(text, with_ocr=False):
+def extract_denied_letter_fields(text, with_ocr=False, lines=None):
     """Extract fields specific to Denied Letter."""
+    if lines is None:
+        lines = LineIndex(text, normalize_text)
     # Extract patient name (Claim of)
     patient_name = None
-    name_patterns = [
-        r"Claim\s+of\s*:?\s*([^\n]+)",
-        r"Claim\s+of\s+([^\n]+)",
-        r"Name\s+of\s+the\s+Patient\s*:\s*([^\n]+)",
-        r"Patient\s+Name\s*:\s*([^\n]+)"
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_NAME_PATTERNS:
+        match = pattern.search(text)
         if match:
             patient_name = match.group(1).strip()
             break
     
     # Extract UHID
     uhid_number = None
-    uhid_patterns = [
-        r"UHID\s*:?\s*([^\n]+)",
-        r"UHID\s+([^\n]+)",
-        r"UHID\s*Number\s*:\s*([^\n]+)"
-    ]
-    
-    for pattern in uhid_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_UHID_PATTERNS:
+        match = pattern.search(text)
         if match:
             uhid_number = match.group(1).strip()
             break
     
     # Extract Policy Number
     policy_no = None
-    policy_patterns = [
-        r"Policy\s*Number\s*:?\s*([^\n]+)",
-        r"Policy\s*No\s*:?\s*([^\n]+)",
-        r"Policy\s*Number\s+([^\n]+)"
-    ]
-    
-    for pattern in policy_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_POLICY_PATTERNS:
+        match = pattern.search(text)
         if match:
             policy_no = match.group(1).strip()
             break
     
     # Extract Policy Period with improved handling for multi-line periods
-    policy_period = extract_policy_period(text)
+    policy_period = extract_policy_period(text, lines=lines)
     
     # Extract AL Number
     al_number = None
-    al_patterns = [
-        r"AL\s*Number\s*:?\s*([^\n]+)",
-        r"AL\s*No\s*:?\s*([^\n]+)",
-        r"AL\s*Number\s+([^\n]+)"
-    ]
-    
-    for pattern in al_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in CLAIM_AL_PATTERNS:
+        match = pattern.search(text)
         if match:
             al_number = match.group(1).strip()
             break
@@ -749,14 +738,14 @@ def extract_denied_letter_fields(text, with_ocr=False):
     reasons = []
     
     reason_section = ""
-    reason_match = re.search(r"mentioned\s+herein\s+below(.+?)(?:Important\s+Note|$)", text, re.IGNORECASE | re.DOTALL)
+    reason_match = DENIAL_REASON_SECTION_PATTERN.search(text)
     if reason_match:
         reason_section = reason_match.group(1).strip()
     
-    table_header_match = re.search(r"Sr\s*No\s*Reason\s*Description", reason_section, re.IGNORECASE)
+    table_header_match = DENIAL_TABLE_HEADER_PATTERN.search(reason_section)
     if table_header_match:
         table_text = reason_section[table_header_match.end():]
-        reason_matches = re.findall(r"(\d+)\s+([^0-9\n]+?)(?=\s+\d+\.\s+|\n\s*\d+\s+|Description|\n\n|$)", table_text)
+        reason_matches = TABLE_REASON_PATTERN.findall(table_text)
         
         for num, reason in reason_matches:
             reason = reason.strip()
@@ -766,13 +755,11 @@ def extract_denied_letter_fields(text, with_ocr=False):
                 reasons.append(f"{num}. {reason}")
     
     if not reasons:
-        lines = text.split('\n')
         current_num = None
         current_reason = None
         in_table = False
         
-        for i, line in enumerate(lines):
-            line = line.strip()
+        for line in lines:
             if not line:
                 continue
             
@@ -781,7 +768,7 @@ def extract_denied_letter_fields(text, with_ocr=False):
                 continue
             
             if in_table:
-                num_match = re.match(r"^\s*(\d+)\s+(.+)$", line)
+                num_match = NUMBERED_LINE_PATTERN.match(line)
                 if num_match:
                     if current_num and current_reason:
                         reasons.append(f"{current_num}. {current_reason}")
@@ -798,9 +785,9 @@ def extract_denied_letter_fields(text, with_ocr=False):
                     break
     
     if not reasons:
-        for i, line in enumerate(text.split('\n')):
+        for line in lines:
             if "General Terms" in line or "Pre-Existing" in line or "Exclusion" in line:
-                reason_text = line.strip()
+                reason_text = line
                 if "Description" in reason_text:
                     reason_text = reason_text.split("Description")[0].strip()
                 if reason_text and len(reason_text) > 10:
@@ -823,78 +810,95 @@ def extract_denied_letter_fields(text, with_ocr=False):
 def extract_fields_from_text(text, with_ocr=False):
     """Extract fields from text content based on letter type."""
     text = normalize_text(text)
+    # Normalized once; every multi-line lookup below goes through this index
+    lines = LineIndex(text, normalize_text)
     
     # Identify letter type
-    letter_type = identify_letter_type(text)
+    letter_type = identify_letter_type(text, lines)
     
     # Extract fields based on letter type
     if letter_type == "Authorization Letter":
-        return extract_authorization_letter_fields(text, with_ocr)
+        return extract_authorization_letter_fields(text, with_ocr, lines)
     elif letter_type == "Query Letter":
-        return extract_query_letter_fields(text, with_ocr)
+        return extract_query_letter_fields(text, with_ocr, lines)
     elif letter_type == "Denied Letter":
-        return extract_denied_letter_fields(text, with_ocr)
+        return extract_denied_letter_fields(text, with_ocr, lines)
     else:
-        return extract_authorization_letter_fields(text, with_ocr)
+        return extract_authorization_letter_fields(text, with_ocr, lines)
 
-def extract_from_printed_pdf(pdf_stream):
-    """Extract text from a printed PDF with extractable text."""
-    try:
-        doc = fitz.open(stream=pdf_stream, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        
-        return extract_fields_from_text(text, with_ocr=False)
-    except Exception as e:
-        print(f"Error extracting from printed PDF: {e}")
-        return {"error": str(e)}
+# Fields each letter type must have before the remaining scanned pages are left unread
+REQUIRED_FIELDS = {
+    "Authorization Letter": ["AL Number", "Name of the Patient", "UHID Number", "Policy No", "Policy Period",
+                             "Date of Admission", "Date of Discharge", "Total Bill Amount", "Approved Amount",
+                             "Remarks"],
+    "Query Letter": ["Name of the Patient", "UHID Number", "Policy No", "Policy Period", "Date of Admission",
+                     "AL Number", "Reason"],
+    "Denied Letter": ["Name of the Patient", "UHID Number", "Policy No", "Policy Period", "AL Number", "Reason"]
+}
+
+# The end marker of each letter type's open-ended section (remarks or reasons); until it has been read,
+# a value taken up to the end of the text so far may continue on the next page
+SECTION_END_PATTERNS = {
+    "Authorization Letter": re.compile(
+        r"Remarks\s*:.*?(?:For any cashless queries|\n\s*\n|\nNote:|\nImportant Note:|Terms and Conditions of Authorization)",
+        re.IGNORECASE | re.DOTALL
+    ),
+    "Query Letter": re.compile(r"REMARKS\s*:.+?(?:Any\s+Other\s+document|We\s+request\s+you)",
+                               re.IGNORECASE | re.DOTALL),
+    "Denied Letter": re.compile(r"mentioned\s+herein\s+below.+?Important\s+Note", re.IGNORECASE | re.DOTALL)
+}
 
-def extract_from_scanned_pdf(pdf_stream, preprocess=False):
-    """Extract text from a scanned PDF using OCR."""
+def has_required_fields(results, text):
+    """True once every required field of the detected letter type has a value and its
+    open-ended section has ended within text (a page break alone doesn't end it)."""
+    letter_type = results.get("Letter Type")
+    if not all(results.get(field) for field in REQUIRED_FIELDS.get(letter_type, [])):
+        return False
+    end_pattern = SECTION_END_PATTERNS.get(letter_type)
+    return end_pattern is None or end_pattern.search(text.rstrip()) is not None
+
+def extract_from_pdf(document, preprocess=False, max_workers=None):
+    """Extract fields from a PDF, using native text where present and OCR only for scanned pages."""
     try:
-        # Save the stream to a temporary file (pdf2image requires a file path)
-        with open("temp.pdf", "wb") as f:
-            f.write(pdf_stream.getbuffer())
-        
-        # Convert PDF to images
-        images = convert_from_path("temp.pdf")
-        
-        # Remove temporary file
-        os.remove("temp.pdf")
-        
-        # Extract text from each page using OCR
-        full_text = ""
-        for i, image in enumerate(images):
-            if preprocess:
-                processed_image = preprocess_image(image)
-            else:
-                processed_image = image
-            
-            page_text = pytesseract.image_to_string(
-                processed_image, 
-                lang='eng',
-                config='--oem 3 --psm 6'
-            )
-            full_text += page_text + "\n\n"
-        
-        return extract_fields_from_text(full_text, with_ocr=True)
+        def extract(text):
+            # OCR-tuned patterns apply when the first page (where the fields live) was OCR'd
+            with_ocr = bool(document.page_sources) and document.page_sources[0] == "ocr"
+            return extract_fields_from_text(text, with_ocr=with_ocr)
+
+        # Native pages are joined as extracted; OCR'd pages (200 DPI) are followed by a blank line.
+        # With OCR_EARLY_EXIT=1, scanned pages are OCR'd in order and the rest skipped once the letter's
+        # fields are all found and its remarks or reasons section has ended
+        results = document.extract_incrementally(
+            extract,
+            has_required_fields,
+            lang='eng',
+            config='--oem 3 --psm 6',
+            preprocess=preprocess_image if preprocess else None,
+            max_workers=max_workers,
+            separator="",
+            ocr_separator="\n\n"
+        )
+        results["Page Sources"] = document.page_sources
+        results["Pages Skipped"] = document.page_sources.count("skipped")
+        return results
     except Exception as e:
-        print(f"Error extracting from scanned PDF: {e}")
+        print(f"Error extracting from PDF: {e}")
         return {"error": str(e)}
 
 def extract_from_image(image_stream, preprocess=False):
     """Extract text from an image file using OCR."""
     try:
+        from PIL import Image
         image = Image.open(image_stream)
+        # Only the header has been read so far: refuse oversized images before decoding them
+        check_page_pixels(*image.size)
         
         if preprocess:
             processed_image = preprocess_image(image)
         else:
             processed_image = image
         
-        text = pytesseract.image_to_string(
+        text = ocr_image(
             processed_image, 
             lang='eng',
             config='--oem 3 --psm 6'
@@ -905,55 +909,324 @@ def extract_from_image(image_stream, preprocess=False):
         print(f"Error extracting from image: {e}")
         return {"error": str(e)}
 
-def extract_from_stream(file_stream, file_type, preprocess=False):
+def extract_from_stream(file_stream, file_type, preprocess=False, max_workers=None):
     """Extract information from a file stream."""
     if file_type == 'pdf':
-        if is_scanned_pdf(file_stream):
-            return extract_from_scanned_pdf(file_stream, preprocess)
-        else:
-            return extract_from_printed_pdf(file_stream)
-    elif file_type in ['png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp', 'gif']:
+        # Open and parse the PDF once; every stage below reuses the same document
+        try:
+            # A spooled upload has no getvalue(); read() yields the same bytes from the start
+            data = file_stream.getvalue() if hasattr(file_stream, 'getvalue') else file_stream.read()
+            document = PdfDocument(stream=data)
+        except Exception as e:
+            print(f"Error opening PDF: {e}")
+            return {"error": str(e)}
+        with document:
+            return extract_from_pdf(document, preprocess, max_workers)
+    elif file_type in IMAGE_TYPES:
         return extract_from_image(file_stream, preprocess)
     else:
         return {"error": f"Unsupported file format: {file_type}"}
 
-@app.route('/api/extract', methods=['POST'])
-def api_extract():
+def extract_with_cache(key, file_stream, file_type, preprocess=False, max_workers=None):
+    """Serve the cached result for key, or extract file_stream and cache what it yields."""
+    result = result_cache.get(key)
+    if result is None:
+        result = extract_from_stream(file_stream, file_type, preprocess, max_workers)
+        if "error" not in result:
+            result_cache.put(key, result)
+    return result
+
+def extract_cached(file_bytes, file_type, preprocess=False, max_workers=None):
+    """Extract information from file bytes, reusing the result for identical uploads."""
+    key = ResultCache.make_key(file_bytes, file_type, bool(preprocess), EXTRACTOR_VERSION, EARLY_EXIT)
+    return extract_with_cache(key, BytesIO(file_bytes), file_type, preprocess, max_workers)
+
+# Uploads to /api/extract/upload stay in memory up to this size and spill to a temporary file beyond it
+UPLOAD_SPOOL_SIZE = int(os.environ.get("UPLOAD_SPOOL_SIZE", 8 * 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 100 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+IMAGE_TYPES = ['png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp', 'gif']
+
+# Raw request bodies are typed by their Content-Type header
+CONTENT_TYPES = {
+    'application/pdf': 'pdf',
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/tiff': 'tiff',
+    'image/bmp': 'bmp',
+    'image/gif': 'gif'
+}
+
+def file_type_from_name(file_name):
+    """File type for an upload's name, or None when its extension is not supported."""
+    file_ext = file_name.split('.')[-1].lower() if '.' in file_name else ''
+    if file_ext == 'pdf' or file_ext in IMAGE_TYPES:
+        return file_ext
+    return None
+
+class UploadTooLarge(Exception):
+    pass
+
+def spool_upload(stream, max_size=MAX_UPLOAD_SIZE):
+    """Read an upload stream in chunks, hashing it on the way, into a file that can be read again.
+
+    A seekable stream (a multipart part the server already spooled) is just hashed and
+    rewound; anything else is copied into a spooled buffer. Returns (file at its start,
+    sha256 hex digest); raises UploadTooLarge past max_size.
+    """
+    seekable = stream.seekable()
+    spooled = stream if seekable else tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    digest = hashlib.sha256()
+    size = 0
     try:
-        data = request.get_json()
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+            digest.update(chunk)
+            if not seekable:
+                spooled.write(chunk)
+    except Exception:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+def extract_upload(stream, file_type, preprocess=False, max_workers=None):
+    """Extract an upload read straight from its stream, reusing the result for identical uploads."""
+    spooled, digest = spool_upload(stream)
+    with spooled:
+        key = ResultCache.digest_key(digest, file_type, bool(preprocess), EXTRACTOR_VERSION, EARLY_EXIT)
+        return extract_with_cache(key, spooled, file_type, preprocess, max_workers)
+
+# Upper bound on documents of one request extracted at the same time
+DOCUMENT_PARALLELISM = int(os.environ.get("DOCUMENT_PARALLELISM", 4))
+
+def parse_document(document):
+    """Validate one entry of the 'document' list; return (document, None) or (None, error message)."""
+    if not isinstance(document, dict):
+        return None, "Invalid document entry"
+
+    file_content_base64 = document.get('fileContent')
+    if not file_content_base64:
+        return None, "Missing 'fileContent' in document"
+
+    file_name = document.get('fileName', '')
+    file_type = file_type_from_name(file_name)
+    if file_type is None:
+        return None, "Unsupported file type"
+
+    return {"file_name": file_name, "file_content": file_content_base64, "file_type": file_type}, None
 
-        if not data or 'document' not in data or not data['document']:
-            return jsonify({"error": "Missing or invalid 'document' field"}), 400
+def parse_extract_request(data):
+    """Validate an extraction request body; return (run_extract_request kwargs, None) or (None, error message).
 
-        file_content_base64 = data['document'][0].get('fileContent')
-        if not file_content_base64:
-            return jsonify({"error": "Missing 'fileContent' in document"}), 400
+    Invalid entries of a multi-document request are kept, with their error, so they can be reported in place.
+    """
+    if not data or 'document' not in data or not isinstance(data['document'], list) or not data['document']:
+        return None, "Missing or invalid 'document' field"
+    
+    # Optional per-request OCR parallelism (clamped to the server-wide cap)
+    max_workers = data.get('maxWorkers')
+    if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+        return None, "'maxWorkers' must be a positive integer"
+
+    # Optional number of this request's documents extracted at once (clamped to DOCUMENT_PARALLELISM)
+    max_parallel = data.get('maxParallel')
+    if max_parallel is not None and (not isinstance(max_parallel, int) or max_parallel < 1):
+        return None, "'maxParallel' must be a positive integer"
+
+    documents = []
+    for document in data['document']:
+        parsed, error = parse_document(document)
+        if error:
+            file_name = document.get('fileName', '') if isinstance(document, dict) else ''
+            parsed = {"file_name": file_name, "error": error}
+        documents.append(parsed)
+    
+    return {
+        "documents": documents,
+        # Get preprocessing flag (default to False)
+        "preprocess": data.get('preprocess', False),
+        "max_workers": max_workers,
+        "max_parallel": min(max_parallel or DOCUMENT_PARALLELISM, DOCUMENT_PARALLELISM)
+    }, None
 
-        file_name = data['document'][0].get('fileName', '')
-        file_ext = file_name.split('.')[-1].lower() if '.' in file_name else ''
+def extract_document(document, preprocess=False, max_workers=None):
+    """Extract one parsed document, decoding its upload only when it is about to be processed."""
+    file_bytes = base64.b64decode(document["file_content"])
+    return extract_cached(file_bytes, document["file_type"], preprocess, max_workers)
+
+def extract_documents(documents, preprocess=False, max_workers=None, max_parallel=DOCUMENT_PARALLELISM):
+    """Extract documents concurrently; entries keep request order and carry their own error and timing."""
+    def run(document):
+        entry = {"fileName": document["file_name"]}
+        start = time.perf_counter()
+        if "error" in document:
+            entry["error"] = document["error"]
+        else:
+            try:
+                result = extract_document(document, preprocess, max_workers)
+                if "error" in result:
+                    entry["error"] = result["error"]
+                else:
+                    entry["result"] = result
+            except Exception as e:
+                entry["error"] = str(e)
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(documents))) as executor:
+        return list(executor.map(run, documents))
+
+def run_extract_request(documents, preprocess=False, max_workers=None, max_parallel=DOCUMENT_PARALLELISM):
+    """Response body for an extraction request: the result itself for one document, a list for several."""
+    if len(documents) == 1:
+        if "error" in documents[0]:
+            return {"error": documents[0]["error"]}
+        return extract_document(documents[0], preprocess, max_workers)
+    return {"documents": extract_documents(documents, preprocess, max_workers, max_parallel)}
+
+# Background extraction for /api/jobs; the OCR inside each job still shares the global OCR pool
+job_queue = JobQueue(
+    run_extract_request,
+    workers=int(os.environ.get("JOB_WORKERS", 4)),
+    max_queued=int(os.environ.get("JOB_QUEUE_SIZE", 100)),
+    max_finished=int(os.environ.get("JOB_RESULTS_KEPT", 1000)),
+    # Comma-separated hosts a job's callbackUrl may point at; unset, callbacks are refused
+    callback_hosts=[host.strip() for host in os.environ.get("JOB_CALLBACK_HOSTS", "").split(",") if host.strip()]
+)
+JOB_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", 5))
+
+@route('/api/extract', methods=['POST'])
+def api_extract():
+    from flask import jsonify, request
+    try:
+        kwargs, error = parse_extract_request(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
+
+        # A single invalid document is a bad request; in a batch it is reported in its own entry
+        documents = kwargs["documents"]
+        if len(documents) == 1 and "error" in documents[0]:
+            return jsonify({"error": documents[0]["error"]}), 400
         
-        # Decode base64 content
-        file_bytes = base64.b64decode(file_content_base64)
-        file_stream = BytesIO(file_bytes)
+        # Process the files (identical re-uploads are served from the result cache)
+        result = run_extract_request(**kwargs)
         
-        # Determine file type
-        if file_ext in ['pdf']:
-            file_type = 'pdf'
-        elif file_ext in ['png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp', 'gif']:
-            file_type = file_ext
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@route('/api/extract/upload', methods=['POST'])
+def api_extract_upload():
+    """Extract a file sent as the raw request body (typed by Content-Type) or as multipart field 'file'.
+
+    Options come from the query string (or the form, for multipart): ?preprocess=true&maxWorkers=2.
+    """
+    from flask import jsonify, request
+    try:
+        # Before request.files/request.form, which would parse and spool the whole body first
+        if request.content_length is not None and request.content_length > MAX_UPLOAD_SIZE:
+            return jsonify({"error": f"Upload exceeds {MAX_UPLOAD_SIZE} bytes"}), 413
+
+        options = request.args
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({"error": "Missing 'file' in multipart upload"}), 400
+            file_type = file_type_from_name(upload.filename or '')
+            stream = upload.stream
+            options = request.form
         else:
+            file_type = CONTENT_TYPES.get(request.mimetype) or file_type_from_name(request.args.get('fileName', ''))
+            stream = request.stream
+        if file_type is None:
             return jsonify({"error": "Unsupported file type"}), 400
-        
-        # Get preprocessing flag (default to False)
-        preprocess = data.get('preprocess', False)
-        
-        # Process the file
-        result = extract_from_stream(file_stream, file_type, preprocess)
-        
+
+        preprocess = options.get('preprocess', 'false').lower() in ('1', 'true', 'yes')
+        max_workers = options.get('maxWorkers')
+        if max_workers is not None:
+            if not max_workers.isdigit() or int(max_workers) < 1:
+                return jsonify({"error": "'maxWorkers' must be a positive integer"}), 400
+            max_workers = int(max_workers)
+
+        try:
+            result = extract_upload(stream, file_type, preprocess, max_workers)
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+
         return jsonify(result)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queue an extraction and return its job id at once; 429 when the queue is full."""
+    from flask import jsonify, request
+    try:
+        data = request.get_json()
+        kwargs, error = parse_extract_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        documents = kwargs["documents"]
+        if len(documents) == 1 and "error" in documents[0]:
+            return jsonify({"error": documents[0]["error"]}), 400
+
+        try:
+            job = job_queue.submit(kwargs, data.get('callbackUrl'))
+        except CallbackNotAllowed as e:
+            return jsonify({"error": str(e)}), 400
+        except QueueFull as e:
+            response = jsonify({"error": str(e)})
+            response.headers['Retry-After'] = str(JOB_RETRY_AFTER)
+            return response, 429
+
+        return jsonify({"jobId": job.id, "status": job.status, "statusUrl": f"/api/jobs/{job.id}"}), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@route('/api/jobs/stats', methods=['GET'])
+def api_job_stats():
+    from flask import jsonify
+    return jsonify(job_queue.stats())
+
+@route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """Status of a job, with its result (or error) once finished."""
+    from flask import jsonify
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job.to_dict())
+
+@route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    from flask import jsonify
+    return jsonify({"results": result_cache.stats(), "ocr_pages": page_text_cache.stats(),
+                    "ocr_calls": ocr_call_count()})
+
+def create_app():
+    """The Flask app serving every recorded route; Flask is only imported here."""
+    from flask import Flask
+    flask_app = Flask(__name__)
+    for rule, methods, view in ROUTES:
+        flask_app.add_url_rule(rule, view_func=view, methods=methods)
+    return flask_app
+
+def __getattr__(name):
+    # `icici.app` (WSGI servers, benchmarks) builds the app on first access, so loading this
+    # module just for extract_from_pdf (router, batch workers) never imports Flask
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
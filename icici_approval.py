@@ -2,83 +2,90 @@ import re
 import json
 import sys
 from pathlib import Path
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-import io
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from field_scanner import FieldScanner
+from ocr_engine import set_tesseract_cmd
+from pdf_document import PdfDocument
+set_tesseract_cmd(r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+
+FIELD_PATTERNS = {
+    'AL Number': [
+        r'AL\s*Number\s*:?\s*([^\s]+)',  
+        r'AL\s*:?\s*([^\s]+)',
+        r'Authorization\s+Letter\s+Number\s*:?\s*([^\s]+)'
+    ],
+    'Approved Amount': [
+        r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
+        r'Amount\s+(?:to\s+be\s+)?(?:sanctioned|approved)\s*:?\s*[Rs\.\s]*(\d+)',
+        r'guarantee\s+for\s+payment\s+of\s+Rs\s*(\d+)',
+        r'Sanctioned\s+Amount\s*:?\s*(\d+)'
+    ],
+    'Date of Admission': [
+        r'Date\s+of\s+Admission\s*:?\s*([^\n:]+)'
+    ],
+    'Date of Discharge': [
+        r'Date\s+of\s+Discharge\s*:?\s*([^\n:]+)',
+        r'Discharge\s+Date\s*:?\s*([^\n:]+)'
+    ],
+    'Name of the Patient': [
+        r'Name\s+of\s+(?:the\s+)?Patient\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)',
+        r'Patient\s+Name\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)',
+        r'Patient\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)'
+    ],
+    'Policy No': [
+        r'Policy\s+No\s*:?\s*([A-Z0-9\/\-]+)',
+        r'Policy\s+Number\s*:?\s*([A-Z0-9\/\-]+)'
+    ],
+    'Policy Period': [
+        r'Policy\s+Period\s*:?\s*((?:(?!\n\s*Date\s+of)[\s\S])+)',
+        r'Policy\s+Term\s*:?\s*((?:(?!\n\s*Date\s+of)[\s\S])+)'
+    ],
+    'Total Bill Amount': [
+        r'Total\s+Bill\s+Amount\s*:?\s*(\d+)',
+        r'Estimated\s+(?:Bill\s+)?Amount\s*:?\s*(\d+)',
+        r'Bill\s+Amount\s*:?\s*(\d+)'
+    ],
+    'UHID Number': [
+        r'UHID\s+Number\s*:?\s*([A-Z0-9]+)',
+        r'UHID\s*:?\s*([A-Z0-9]+)',
+        r'Hospital\s+ID\s*:?\s*([A-Z0-9]+)'
+    ],
+    'Remarks': [
+        r'Remarks\s*:?\s*\n([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
+        r'Remarks\s*:?\s*([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
+        r'Pre\s*authorization\s+request\s+is\s+approved[^.]*\.[^.]*\.[^.]*\.',
+        r'Remarks\s*:?\s*([^:]+?)(?:\n(?:[A-Z][a-z]+\s+related|Network|Hospital|Amount|Event|Final))'
+        r'Remarks\s*:?\s*\n([\s\S]*?)(?=\s*For any cashless queries)'
+    ]
+}
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL
+
+# Compiled once at import and shared by every DataExtractor instance
+PATTERNS = {
+    field: [re.compile(pattern, PATTERN_FLAGS) for pattern in patterns]
+    for field, patterns in FIELD_PATTERNS.items()
+}
+SCANNER = FieldScanner(PATTERNS)
+
+POLICY_PERIOD_LINE_PATTERN = re.compile(r'Policy\s+Period\s*:?.*?\n', re.IGNORECASE)
+
+REMARKS_STOP_KEYWORDS = r'(?:For any cashless queries|Note:|Important Note|Important\b|Address|Terms and Conditions|$)'
+REMARKS_PATTERNS = [
+    re.compile(rf'Remarks\s*:?\s*\n([\s\S]*?)(?=\s*{REMARKS_STOP_KEYWORDS})', re.IGNORECASE),
+    re.compile(rf'Remarks\s*:?\s*([^\n]*?)(?=\s*{REMARKS_STOP_KEYWORDS})', re.IGNORECASE)
+]
 
 class DataExtractor:
     def __init__(self):
-        self.patterns = {
-            'AL Number': [
-                r'AL\s*Number\s*:?\s*([^\s]+)',  
-                r'AL\s*:?\s*([^\s]+)',
-                r'Authorization\s+Letter\s+Number\s*:?\s*([^\s]+)'
-            ],
-            'Approved Amount': [
-                r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
-                r'Amount\s+(?:to\s+be\s+)?(?:sanctioned|approved)\s*:?\s*[Rs\.\s]*(\d+)',
-                r'guarantee\s+for\s+payment\s+of\s+Rs\s*(\d+)',
-                r'Sanctioned\s+Amount\s*:?\s*(\d+)'
-            ],
-            'Date of Admission': [
-                r'Date\s+of\s+Admission\s*:?\s*([^\n:]+)'
-            ],
-            'Date of Discharge': [
-                r'Date\s+of\s+Discharge\s*:?\s*([^\n:]+)',
-                r'Discharge\s+Date\s*:?\s*([^\n:]+)'
-            ],
-            'Name of the Patient': [
-                r'Name\s+of\s+(?:the\s+)?Patient\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)',
-                r'Patient\s+Name\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)',
-                r'Patient\s*:?\s*([A-Z\s\.]+?)(?:\n|UHID|Age|Gender)'
-            ],
-            'Policy No': [
-                r'Policy\s+No\s*:?\s*([A-Z0-9\/\-]+)',
-                r'Policy\s+Number\s*:?\s*([A-Z0-9\/\-]+)'
-            ],
-            'Policy Period': [
-                        r'Policy\s+Period\s*:?\s*((?:(?!\n\s*Date\s+of)[\s\S])+)',
-                        r'Policy\s+Term\s*:?\s*((?:(?!\n\s*Date\s+of)[\s\S])+)'
-            ],
-            'Total Bill Amount': [
-                r'Total\s+Bill\s+Amount\s*:?\s*(\d+)',
-                r'Estimated\s+(?:Bill\s+)?Amount\s*:?\s*(\d+)',
-                r'Bill\s+Amount\s*:?\s*(\d+)'
-            ],
-            'UHID Number': [
-                r'UHID\s+Number\s*:?\s*([A-Z0-9]+)',
-                r'UHID\s*:?\s*([A-Z0-9]+)',
-                r'Hospital\s+ID\s*:?\s*([A-Z0-9]+)'
-            ],
-            'Remarks': [
-                r'Remarks\s*:?\s*\n([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
-                r'Remarks\s*:?\s*([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
-                r'Pre\s*authorization\s+request\s+is\s+approved[^.]*\.[^.]*\.[^.]*\.',
-                r'Remarks\s*:?\s*([^:]+?)(?:\n(?:[A-Z][a-z]+\s+related|Network|Hospital|Amount|Event|Final))'
-                r'Remarks\s*:?\s*\n([\s\S]*?)(?=\s*For any cashless queries)'
-            ]
-        }
+        self.page_sources = []
+        self.patterns = PATTERNS
+        self.scanner = SCANNER
     
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_text_from_pdf(self, document):
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                
-                if not page_text.strip():
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    page_text = pytesseract.image_to_string(img, config='--psm 4')
-                
-                text += page_text + "\n"
-            
-            doc.close()
+            # Native text where present, OCR (2x zoom = 144 DPI) only for pages without any
+            text = document.extract_text(config='--psm 4', dpi=144, min_chars=1)
+            self.page_sources = document.page_sources
             return text
             
         except Exception as e:
@@ -126,56 +133,54 @@ class DataExtractor:
         
         return value
     
-    def extract_field(self, text, field_name):
+    def extract_field(self, text, field_name, scan=None):
         patterns = self.patterns.get(field_name, [])
 
         if field_name == 'Remarks':
             return self.extract_remarks(text)
 
+        if scan is None:
+            scan = self.scanner.scan(text)
+
+        start = 0
         if field_name in ['Date of Admission', 'Date of Discharge']:
-            policy_match = re.search(r'Policy\s+Period\s*:?.*?\n', text, re.IGNORECASE)
+            policy_match = POLICY_PERIOD_LINE_PATTERN.search(text)
             if policy_match:
-                text = text[policy_match.end():]
+                start = policy_match.end()
 
         for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
-            if matches:
+            match = scan.first(pattern, start)
+            if match is not None:
                 #print(f"Pattern {i+1} matched: {pattern}")
-                #print(f"Raw match: {matches[0]}")
-                value = self.clean_extracted_value(matches[0], field_name)
+                #print(f"Raw match: {match}")
+                value = self.clean_extracted_value(match, field_name)
                 if value:
                     return value
 
         return None
         
     def extract_remarks(self, text):
-        stop_keywords = r'(?:For any cashless queries|Note:|Important Note|Important\b|Address|Terms and Conditions|$)'
-        pattern1 = rf'Remarks\s*:?\s*\n([\s\S]*?)(?=\s*{stop_keywords})'
-        match = re.search(pattern1, text, re.IGNORECASE)
-        if match:
-            remarks = match.group(1).strip()
-            remarks = re.sub(r'\s+', ' ', remarks)
-            return remarks
-
-        pattern2 = rf'Remarks\s*:?\s*([^\n]*?)(?=\s*{stop_keywords})'
-        match = re.search(pattern2, text, re.IGNORECASE)
-        if match:
-            remarks = match.group(1).strip()
-            remarks = re.sub(r'\s+', ' ', remarks)
-            return remarks
+        for pattern in REMARKS_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                remarks = match.group(1).strip()
+                remarks = re.sub(r'\s+', ' ', remarks)
+                return remarks
 
         return None
        
-    def extract_all_data(self, pdf_path):        
-        text = self.extract_text_from_pdf(pdf_path)
+    def extract_all_data(self, document):
+        text = self.extract_text_from_pdf(document)
         
         if not text.strip():
             print("No text could be extracted from the PDF")
             return None
 
+        # One sweep locates every field label; each pattern then only runs at its own label
+        scan = self.scanner.scan(text)
         extracted_data = {}
         for field_name in self.patterns.keys():
-            extracted_data[field_name] = self.extract_field(text, field_name)
+            extracted_data[field_name] = self.extract_field(text, field_name, scan)
         
         extracted_data['Letter Type'] = 'Authorization Letter'
         
@@ -186,31 +191,37 @@ class DataExtractor:
             if not Path(pdf_path).exists():
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
             
-            data = self.extract_all_data(pdf_path)
-            
-            if data:
-                formatted_data = {
-                    "AL Number": data.get('AL Number'),
-                    "Approved Amount": data.get('Approved Amount'),
-                    "Date of Admission": data.get('Date of Admission'),
-                    "Date of Discharge": data.get('Date of Discharge'),
-                    "Letter Type": data.get('Letter Type'),
-                    "Name of the Patient": data.get('Name of the Patient'),
-                    "Policy No": data.get('Policy No'),
-                    "Policy Period": data.get('Policy Period'),
-                    "Remarks": data.get('Remarks'),
-                    "Total Bill Amount": data.get('Total Bill Amount'),
-                    "UHID Number": data.get('UHID Number')
-                }
-                
-                return formatted_data
-            else:
-                return None
-                
+            with PdfDocument(pdf_path) as document:
+                return self.process_document(document)
+
         except Exception as e:
             print(f"Error processing PDF: {e}")
             return None
 
+    def process_document(self, document):
+        """Formatted fields of an open PdfDocument, or None."""
+        data = self.extract_all_data(document)
+
+        if data:
+            formatted_data = {
+                "AL Number": data.get('AL Number'),
+                "Approved Amount": data.get('Approved Amount'),
+                "Date of Admission": data.get('Date of Admission'),
+                "Date of Discharge": data.get('Date of Discharge'),
+                "Letter Type": data.get('Letter Type'),
+                "Name of the Patient": data.get('Name of the Patient'),
+                "Policy No": data.get('Policy No'),
+                "Policy Period": data.get('Policy Period'),
+                "Remarks": data.get('Remarks'),
+                "Total Bill Amount": data.get('Total Bill Amount'),
+                "UHID Number": data.get('UHID Number'),
+                "Page Sources": self.page_sources
+            }
+            
+            return formatted_data
+        else:
+            return None
+
 def main():
     if len(sys.argv) == 2:
         pdf_path = sys.argv[1]
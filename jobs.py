@@ -0,0 +1,184 @@
+"""Bounded job queue: extraction requests run on background worker threads and are polled by id."""
+import json
+import queue
+import statistics
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+
+class QueueFull(Exception):
+    pass
+
+
+class CallbackNotAllowed(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kwargs, callback_url=None):
+        self.id = uuid.uuid4().hex
+        self.kwargs = kwargs
+        self.callback_url = callback_url
+        self.status = "queued"
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.callback_error = None
+
+    def to_dict(self):
+        job = {"jobId": self.id, "status": self.status, "submittedAt": self.submitted,
+               "startedAt": self.started, "finishedAt": self.finished}
+        if self.status == "done":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        if self.callback_error:
+            job["callbackError"] = self.callback_error
+        return job
+
+
+class JobQueue:
+    """Runs handler(**kwargs) for each job on a fixed set of threads, rejecting work beyond max_queued."""
+
+    def __init__(self, handler, workers=4, max_queued=100, max_finished=1000, callback_timeout=10,
+                 callback_hosts=()):
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.callback_timeout = callback_timeout
+        # Hosts a callback URL may name; none means callbacks are refused, so clients can't make the
+        # server POST results to arbitrary hosts (including ones only reachable from its network)
+        self.callback_hosts = {host.lower() for host in callback_hosts}
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        # Seconds each recent job spent queued before a worker picked it up
+        self._waits = deque(maxlen=1000)
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _start(self):
+        # Threads start on first use so importing the app (or the debug reloader) doesn't spawn them
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def check_callback(self, callback_url):
+        """Raise CallbackNotAllowed unless callback_url is an http(s) URL on one of callback_hosts."""
+        from urllib.parse import urlsplit
+        if not isinstance(callback_url, str) or not callback_url.startswith(('http://', 'https://')):
+            raise CallbackNotAllowed("'callbackUrl' must be an http(s) URL")
+        try:
+            host = urlsplit(callback_url).hostname
+        except ValueError:
+            host = None
+        if not host or host.lower() not in self.callback_hosts:
+            raise CallbackNotAllowed(f"'callbackUrl' host {host!r} is not an allowed callback host")
+
+    def submit(self, kwargs, callback_url=None):
+        """Queue a job and return it; raise CallbackNotAllowed for a callback_url off the allowlist
+        and QueueFull when max_queued jobs are already waiting."""
+        if callback_url is not None:
+            self.check_callback(callback_url)
+        self._start()
+        job = Job(kwargs, callback_url)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self.rejected += 1
+            raise QueueFull(f"{self.max_queued} jobs already queued")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                job.status = "running"
+                job.started = time.time()
+                self._waits.append(job.started - job.submitted)
+                self.running += 1
+            try:
+                result = self.handler(**job.kwargs)
+                if isinstance(result, dict) and "error" in result:
+                    job.status, job.error = "failed", result["error"]
+                else:
+                    job.status, job.result = "done", result
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+            job.finished = time.time()
+            # Don't hold the uploaded file for as long as the result is kept
+            job.kwargs = None
+            with self._lock:
+                self.running -= 1
+                if job.status == "done":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._evict_finished()
+            if job.callback_url:
+                self._notify(job)
+            self._queue.task_done()
+
+    def _evict_finished(self):
+        # Oldest jobs first; queued and running jobs are never dropped
+        excess = len(self._jobs) - self.max_finished
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    def _notify(self, job):
+        """POST the finished job to its callback URL; failures are recorded on the job, not retried.
+
+        Redirects are not followed: they could lead off the allowed callback hosts.
+        """
+        import urllib.request
+
+        class NoRedirect(urllib.request.HTTPRedirectHandler):
+            def redirect_request(self, *args, **kwargs):
+                return None
+
+        body = json.dumps(job.to_dict()).encode("utf-8")
+        callback = urllib.request.Request(job.callback_url, data=body, method="POST",
+                                          headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.build_opener(NoRedirect).open(callback, timeout=self.callback_timeout) as response:
+                response.read()
+        except Exception as e:
+            job.callback_error = str(e)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "queued": self._queue.qsize(),
+                "max_queued": self.max_queued,
+                "workers": self.workers,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_seconds": {
+                    "p50": statistics.median(waits) if waits else None,
+                    "p95": waits[min(len(waits) - 1, int(round(0.95 * (len(waits) - 1))))] if waits else None,
+                    "max": waits[-1] if waits else None,
+                },
+            }
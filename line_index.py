@@ -0,0 +1,54 @@
+"""Line index over a letter's text, built once and shared by every multi-line field extractor."""
+from bisect import bisect_right
+
+
+class LineIndex:
+    def __init__(self, text, normalize=str.strip):
+        self.lines = [normalize(line) for line in text.split("\n")]
+        # The normalized lines joined back, so one regex sweep can find candidate lines
+        self.text = "\n".join(self.lines)
+        self.offsets = []
+        offset = 0
+        for line in self.lines:
+            self.offsets.append(offset)
+            offset += len(line) + 1
+        # next_non_empty[i]: first non-empty line after line i, or len(self) if there is none
+        self.next_non_empty_lines = [len(self.lines)] * len(self.lines)
+        following = len(self.lines)
+        for i in range(len(self.lines) - 1, -1, -1):
+            self.next_non_empty_lines[i] = following
+            if self.lines[i]:
+                following = i
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, line_no):
+        return self.lines[line_no]
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def next_non_empty(self, line_no):
+        """Index of the first non-empty line after line_no, or len(self) if there is none."""
+        return self.next_non_empty_lines[line_no]
+
+    def line_at(self, offset):
+        """Index of the line containing a character offset of self.text."""
+        return bisect_right(self.offsets, offset) - 1
+
+    def lines_matching(self, pattern):
+        """Yield, in order, the index of every line in which pattern.search(line) succeeds.
+
+        One finditer() over the whole text finds candidates; a match found per line is
+        either reported by it or overlapped by an earlier reported match, so only the
+        lines those matches touch are confirmed individually.
+        """
+        next_line = 0
+        for match in pattern.finditer(self.text):
+            first = max(self.line_at(match.start()), next_line)
+            last = self.line_at(max(match.end() - 1, match.start()))
+            for line_no in range(first, last + 1):
+                if pattern.search(self.lines[line_no]):
+                    yield line_no
+            next_line = max(next_line, last + 1)
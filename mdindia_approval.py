@@ -1,72 +1,58 @@
-import camelot
 import pdfplumber
 import re
 import json
 import sys
+from word_index import WordIndex
+from word_table import numbered_row
 
-def extract_address_layout(page):
-    words = page.extract_words()
-    address_lines = []
-    start_y = None
-    end_y = None
-
-    for w in words:
-        if w['text'].strip() == 'To,':
-            start_y = w['top']
-            break
-    if start_y is None:
+def extract_address_layout(page, index=None):
+    """The address block under "To,", up to the Phone/Fax line, from the page's word index."""
+    if index is None:
+        index = WordIndex.from_pdfplumber(page.extract_words())
+
+    start = index.find('To,')
+    if start is None:
         return "null"
+    start_y = index[start].top
 
-    for w in words:
-        if w['text'].strip() in ['Phone', 'Phone:', 'Fax', 'Fax:'] and w['top'] > start_y:
-            end_y = w['top']
-            break
-    if end_y is None:
-        end_y = start_y + 150
+    end = index.find(['Phone', 'Phone:', 'Fax', 'Fax:'], where=lambda w: w.top > start_y)
+    end_y = index[end].top if end is not None else start_y + 150
 
-    lines = {}
-    for w in words:
-        if start_y < w['top'] < end_y and w['x0'] < 250:
-            y = round(w['top'], 1)
-            lines.setdefault(y, []).append(w['text'])
+    return ', '.join(index.lines(index.band(start_y, end_y, x_max=250)))
 
-    sorted_lines = [lines[y] for y in sorted(lines)]
-    full_lines = [' '.join(line) for line in sorted_lines]
-    return ', '.join(full_lines)
+REASON_PATTERNS = [
+    re.compile(r"Sr\.?No\.?\s*Particular\(s\)\s*1\s*(.+?)(?:Thanking|Authorized|$)", re.IGNORECASE | re.DOTALL),
+    re.compile(r"Sr\s*No\.?\s*1\s*Reason\(s\)\s*(.+?)(?:Explanation|As per|$)", re.IGNORECASE | re.DOTALL)
+]
+DENIAL_REASON_PATTERN = re.compile(r"following reasons:\s*(.+?)(?:Explanation|As per|Note|$)", re.IGNORECASE | re.DOTALL)
 
-def extract_reason_from_pdf(pdf_path):
+def extract_reason(page, text, words=None):
+    """Row 1 of the page's "Sr No" table, read from its words, else the first reason found in its text."""
     try:
-        tables = camelot.read_pdf(pdf_path, pages='1', flavor='stream', strip_text='\n')
-        for table in tables:
-            df = table.df
-            if any(col.lower().replace('.','').strip() in ['srno', 'sr no'] for col in df.iloc[0]):
-                for i, row in df.iterrows():
-                    if str(row[0]).strip() == '1':
-                        if len(row) > 1:
-                            return row[1].strip()
-                        else:
-                            return " ".join([str(x) for x in row if str(x).strip() and not str(x).strip().isdigit()])
+        reason = numbered_row(words if words is not None else page.extract_words())
+        if reason:
+            return reason
     except Exception as e:
-        print(f"camelot error: {e}")
+        print(f"table error: {e}")
+
+    for pattern in REASON_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            reason = match.group(1).strip()
+            reason = ' '.join(reason.split())
+            return reason
+            
+    denial_match = DENIAL_REASON_PATTERN.search(text)
+    if denial_match:
+        return denial_match.group(1).strip()
+
+    return "null"
 
+def extract_reason_from_pdf(pdf_path):
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text()
-            
-            pattern1 = re.compile(r"Sr\.?No\.?\s*Particular\(s\)\s*1\s*(.+?)(?:Thanking|Authorized|$)", re.IGNORECASE | re.DOTALL)
-            pattern2 = re.compile(r"Sr\s*No\.?\s*1\s*Reason\(s\)\s*(.+?)(?:Explanation|As per|$)", re.IGNORECASE | re.DOTALL)
-    
-            for pattern in [pattern1, pattern2]:
-                match = pattern.search(text)
-                if match:
-                    reason = match.group(1).strip()
-                    reason = ' '.join(reason.split())
-                    return reason
-                    
-            denial_match = re.search(r"following reasons:\s*(.+?)(?:Explanation|As per|Note|$)", text, re.IGNORECASE | re.DOTALL)
-            if denial_match:
-                return denial_match.group(1).strip()
-                
+            page = pdf.pages[0]
+            return extract_reason(page, page.extract_text())
     except Exception as e:
         print(f"pdfplumber error: {e}")
 
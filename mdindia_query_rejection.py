@@ -2,71 +2,61 @@ import pdfplumber
 import re
 import json
 import sys
+from word_index import WordIndex
+from word_table import numbered_rows
 
-def extract_address_layout(page):
-    words = page.extract_words()
-    address_lines = []
-    start_y = None
-    end_y = None
-    stop_processing = False
-
-    # Find "To,"
-    for w in words:
-        if w['text'].strip() == 'To,':
-            start_y = w['top']
-            break
-    if start_y is None:
+def extract_address_layout(page, index=None):
+    """The address block under "To,", up to the Phone/Fax line or the "Inlias ID" label, from the page's word index."""
+    if index is None:
+        index = WordIndex.from_pdfplumber(page.extract_words())
+
+    start = index.find('To,')
+    if start is None:
         return "null"
+    start_y = index[start].top
+
+    end = index.find(['Phone', 'Phone:', 'Fax', 'Fax:'], where=lambda w: w.top > start_y)
+    end_y = index[end].top if end is not None else start_y + 150
+
+    # Stop processing once we hit "Inlias ID"
+    stop = index.first(lambda w: 'Inlias' in w.text or ('ID' in w.text and ':' in w.text))
+
+    address = ', '.join(index.lines(index.band(start_y, end_y, x_max=250, before=stop)))
 
-    # Find end marker (Phone/Fax)
-    for w in words:
-        if w['text'].strip() in ['Phone', 'Phone:', 'Fax', 'Fax:'] and w['top'] > start_y:
-            end_y = w['top']
-            break
-    if end_y is None:
-        end_y = start_y + 150
-
-    lines = {}
-    for w in words:
-        # Stop processing if we hit "Inlias ID"
-        if 'Inlias' in w['text'] or ('ID' in w['text'] and ':' in w['text']):
-            stop_processing = True
-            continue
-            
-        if stop_processing:
-            continue
-            
-        if start_y < w['top'] < end_y and w['x0'] < 250:
-            y = round(w['top'], 1)
-            lines.setdefault(y, []).append(w['text'])
-
-    sorted_lines = [lines[y] for y in sorted(lines)]
-    full_lines = [' '.join(line) for line in sorted_lines]
-    
-    # Join and clean the address
-    address = ', '.join(full_lines)
-    
     # Final cleanup to remove any trailing commas or spaces
     address = address.rstrip(', ')
-    
+
     return address if address else "null"
 
-def extract_reason_from_pdf(pdf_path):
+def extract_reason(page, text, words=None):
+    """Every row of the page's "Sr No" table, read from its words, else the numbered lines of its text."""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text()
+        rows = numbered_rows(words if words is not None else page.extract_words())
+        if rows and rows[0][1]:
+            # Joined as the text fallback below reads them: row 1's text, then "2 ...", "3 ..." and so on
+            return ' '.join([rows[0][1]] + [f"{serial} {text}" for serial, text in rows[1:]])
+    except Exception as e:
+        print(f"table error: {e}")
 
-            # Match line starting with 1 and followed by the reason
-            reason_match = re.search(r'\b1\s+(.+?)(?=Thanking|Authorized|Explanation|As per|Note|$)', text, re.DOTALL | re.IGNORECASE)
-            if reason_match:
-                reason = reason_match.group(1).strip()
-                reason = ' '.join(reason.split())
-                return reason
+    # Match line starting with 1 and followed by the reason
+    reason_match = re.search(r'\b1\s+(.+?)(?=Thanking|Authorized|Explanation|As per|Note|$)', text, re.DOTALL | re.IGNORECASE)
+    if reason_match:
+        reason = reason_match.group(1).strip()
+        reason = ' '.join(reason.split())
+        return reason
 
-            # Backup: check for "following reasons"
-            denial_match = re.search(r"following reasons:\s*(.+?)(?:Explanation|As per|Note|$)", text, re.IGNORECASE | re.DOTALL)
-            if denial_match:
-                return denial_match.group(1).strip()
+    # Backup: check for "following reasons"
+    denial_match = re.search(r"following reasons:\s*(.+?)(?:Explanation|As per|Note|$)", text, re.IGNORECASE | re.DOTALL)
+    if denial_match:
+        return denial_match.group(1).strip()
+
+    return "null"
+
+def extract_reason_from_pdf(pdf_path):
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            page = pdf.pages[0]
+            return extract_reason(page, page.extract_text())
 
     except Exception as e:
         print(f"pdfplumber error: {e}")
@@ -87,8 +77,10 @@ def extract_info_from_pdf(pdf_path):
         with pdfplumber.open(pdf_path) as pdf:
             page = pdf.pages[0]
             text = page.extract_text()
+            # Extracted once and shared by the address and the reason table
+            words = page.extract_words()
 
-            extracted_data["Hospital Address"] = extract_address_layout(page)
+            extracted_data["Hospital Address"] = extract_address_layout(page, WordIndex.from_pdfplumber(words))
 
             # Patient Name
             match = re.search(r"Patient\s*Name\s*:\s*([^\n]+)", text, re.IGNORECASE)
@@ -119,7 +111,8 @@ def extract_info_from_pdf(pdf_path):
             if match:
                 extracted_data["CCN"] = match.group(1).strip()
 
-            extracted_data["Reason"] = extract_reason_from_pdf(pdf_path)
+            # Read from the page already open rather than opening the file again
+            extracted_data["Reason"] = extract_reason(page, text, words)
 
     except Exception as e:
         print(f"Warning: {str(e)}", file=sys.stderr)
@@ -0,0 +1,303 @@
+"""Shared OCR engine: runs page OCR across a process pool with a host-wide cap.
+
+OCR itself goes through a backend: tesserocr (Tesseract's C API, loaded once
+and kept alive per worker thread) when installed, otherwise pytesseract, which
+starts a tesseract process per page. Set OCR_BACKEND=pytesseract|tesserocr to
+force one.
+
+pytesseract and PIL are imported on first use, so extracting a PDF whose
+pages all carry native text never loads them.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import fitz  # PyMuPDF
+
+from cache import ResultCache
+
+# Global cap on concurrent OCR pages for the whole process (all requests together)
+MAX_WORKERS = max(1, int(os.environ.get("OCR_MAX_WORKERS", os.cpu_count() or 1)))
+
+DEFAULT_LANG = 'eng'
+DEFAULT_CONFIG = '--oem 3 --psm 6'
+DEFAULT_DPI = 200
+# Largest page, in pixels at the requested DPI, that render_page() will rasterize; 0 disables the check
+MAX_PAGE_PIXELS = int(os.environ.get("OCR_MAX_PAGE_PIXELS", 50_000_000))
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_WORKERS)
+_backend = None
+_backend_lock = threading.Lock()
+# Tesseract executable for the pytesseract backend; None leaves pytesseract's default (tesseract on PATH)
+_tesseract_cmd = os.environ.get("TESSERACT_CMD") or None
+# Pages this process has sent to the OCR backend (page_text_cache hits are not counted)
+_ocr_calls = 0
+_ocr_calls_lock = threading.Lock()
+
+# Page text shared by every extractor: a rendered page OCR'd with the same settings is read once
+page_text_cache = ResultCache(
+    memory_entries=int(os.environ.get("OCR_PAGE_CACHE_SIZE", 512)),
+    db_path=os.environ.get("OCR_PAGE_CACHE_DB") or None,
+    db_max_entries=int(os.environ.get("OCR_PAGE_CACHE_DB_MAX_ENTRIES", 50000)),
+    db_max_age=int(os.environ.get("OCR_PAGE_CACHE_DB_MAX_AGE", 30 * 24 * 3600))
+)
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+def check_page_pixels(width, height):
+    """Raise DocumentTooLarge for a page (or image) of more than MAX_PAGE_PIXELS pixels."""
+    if MAX_PAGE_PIXELS and width * height > MAX_PAGE_PIXELS:
+        raise DocumentTooLarge(f"Page of {int(width)}x{int(height)} pixels exceeds {MAX_PAGE_PIXELS} pixels")
+
+
+def parse_config(config):
+    """Split a tesseract command-line config into (oem, psm, {variable: value})."""
+    oem = psm = None
+    variables = {}
+    tokens = config.split()
+    for i, token in enumerate(tokens[:-1]):
+        value = tokens[i + 1]
+        if token == '--oem':
+            oem = int(value)
+        elif token == '--psm':
+            psm = int(value)
+        elif token == '-c' and '=' in value:
+            name, _, setting = value.partition('=')
+            variables[name] = setting
+    return oem, psm, variables
+
+
+def set_tesseract_cmd(path):
+    """Use this tesseract executable for the pytesseract backend, without importing pytesseract now."""
+    global _tesseract_cmd
+    _tesseract_cmd = path
+    if "pytesseract" in sys.modules:
+        sys.modules["pytesseract"].pytesseract.tesseract_cmd = path
+
+
+class PytesseractBackend:
+    """Runs the tesseract executable once per image."""
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        if _tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = _tesseract_cmd
+        self.pytesseract = pytesseract
+
+    def image_to_string(self, image, lang, config):
+        return self.pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+class TesserocrBackend:
+    """Keeps initialized Tesseract API handles alive, one per thread and (lang, oem, psm)."""
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.local = threading.local()
+
+    def api(self, lang, config):
+        oem, psm, variables = parse_config(config)
+        apis = self.local.__dict__.setdefault("apis", {})
+        key = (lang, oem, psm)
+        if key not in apis:
+            options = {"lang": lang}
+            if oem is not None:
+                options["oem"] = oem
+            if psm is not None:
+                options["psm"] = psm
+            apis[key] = self.tesserocr.PyTessBaseAPI(**options)
+        api = apis[key]
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        return api
+
+    def image_to_string(self, image, lang, config):
+        api = self.api(lang, config)
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+def get_backend():
+    """Return this process's OCR backend, created once and reused for every page."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            choice = os.environ.get("OCR_BACKEND", "auto").lower()
+            if choice in ("auto", "tesserocr"):
+                try:
+                    _backend = TesserocrBackend()
+                except ImportError:
+                    if choice == "tesserocr":
+                        raise
+            if _backend is None:
+                _backend = PytesseractBackend()
+        return _backend
+
+
+def _init_worker(tesseract_cmd):
+    """Prepare a pool worker: single-threaded tesseract and the parent's executable path."""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if tesseract_cmd:
+        set_tesseract_cmd(tesseract_cmd)
+
+
+def _get_pool():
+    """Return the shared OCR process pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Spawned, not forked: the pool starts lazily inside a threaded server, and a fork
+            # taken while another thread holds a lock (backend, caches) can deadlock the worker
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_tesseract_cmd,)
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared OCR pool's workers; the next OCR starts a new pool.
+
+    Needed before a multiprocessing child exits, which would otherwise wait on the idle workers forever.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _count_ocr_calls(pages=1):
+    global _ocr_calls
+    with _ocr_calls_lock:
+        _ocr_calls += pages
+
+
+def ocr_call_count():
+    """Pages OCR'd by this process so far; compare two readings to count the OCR of one call."""
+    return _ocr_calls
+
+
+def _ocr_worker(image, lang, config):
+    """OCR a single image with this process's backend (also runs inside pool workers)."""
+    return get_backend().image_to_string(image, lang, config)
+
+
+def render_page(page, dpi=DEFAULT_DPI, grayscale=True, clip=None):
+    """Rasterize a PyMuPDF page (or only the clip rectangle of it) to a PIL image entirely in memory.
+
+    The pixmap's raw sample buffer is wrapped directly (no PNG encode/decode);
+    grayscale without alpha keeps it at one byte per pixel, which is all OCR needs.
+    """
+    from PIL import Image
+    rect = page.rect if clip is None else clip
+    check_page_pixels(rect.width * dpi / 72, rect.height * dpi / 72)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False, clip=clip)
+    mode = "L" if grayscale else "RGB"
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+
+
+def preprocess_name(preprocess):
+    """Stable name of a preprocessing callable for cache keys; pipelines name themselves by their steps."""
+    if preprocess is None:
+        return None
+    return getattr(preprocess, "cache_name", None) or f"{preprocess.__module__}.{preprocess.__qualname__}"
+
+
+def page_cache_key(image, lang, config, dpi=None, preprocess=None):
+    """Cache key for a rendered page: its pixels plus every setting that changes the OCR text."""
+    return ResultCache.make_key(image.tobytes(), image.mode, image.size, lang, config, dpi,
+                                preprocess_name(preprocess))
+
+
+def _ocr_in_process(image, lang, config):
+    _count_ocr_calls()
+    with _slots:
+        return _ocr_worker(image, lang, config)
+
+
+def ocr_image(image, lang=DEFAULT_LANG, config=DEFAULT_CONFIG):
+    """OCR a single image in the calling process through page_text_cache, counted against the global cap."""
+    key = page_cache_key(image, lang, config)
+    text = page_text_cache.get(key)
+    if text is None:
+        text = _ocr_in_process(image, lang, config)
+        page_text_cache.put(key, text)
+    return text
+
+
+def iter_ocr_pages(images, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, max_workers=None):
+    """OCR page images in parallel, yielding their text in page order as it becomes available.
+
+    images may be any iterable, e.g. a generator rasterizing one page at a time: it is
+    only advanced when a worker is free, so at most max_workers images (clamped to
+    MAX_WORKERS, which bounds all callers together) are held at once. Nothing is cached
+    here: callers such as PdfDocument key page_text_cache with their own settings.
+    """
+    workers = min(max_workers or MAX_WORKERS, MAX_WORKERS)
+    if hasattr(images, "__len__"):
+        workers = min(workers, len(images))
+    if workers <= 1:
+        for image in images:
+            yield _ocr_in_process(image, lang, config)
+        return
+
+    pool = None
+    in_flight = {}
+    # Texts finished ahead of an earlier page, until that page is yielded
+    texts = {}
+    next_page = 0
+    try:
+        for i, image in enumerate(images):
+            while len(in_flight) >= workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    texts[in_flight.pop(future)] = future.result()
+            while next_page in texts:
+                yield texts.pop(next_page)
+                next_page += 1
+
+            if pool is None:
+                # Started on the first page that needs OCR, not for a generator that yields none
+                pool = _get_pool()
+            _slots.acquire()
+            try:
+                future = pool.submit(_ocr_worker, image, lang, config)
+            except Exception:
+                _slots.release()
+                raise
+            future.add_done_callback(lambda _: _slots.release())
+            _count_ocr_calls()
+            in_flight[future] = i
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                texts[in_flight.pop(future)] = future.result()
+            while next_page in texts:
+                yield texts.pop(next_page)
+                next_page += 1
+    finally:
+        # A consumer that stops early (e.g. early-exit OCR) doesn't leave queued pages to run
+        for future in in_flight:
+            if future.cancel():
+                _count_ocr_calls(-1)
+
+
+def ocr_pages(images, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, max_workers=None):
+    """OCR page images in parallel and return their text in page order (see iter_ocr_pages)."""
+    return list(iter_ocr_pages(images, lang, config, max_workers))
@@ -0,0 +1,255 @@
+"""A PDF opened once per request, with per-page text cached for every extractor stage.
+
+Pages are rasterized and OCR'd as a stream: a page is rendered only when an OCR
+worker is free to take it, and its image is released once read, so memory is
+bounded by the OCR window rather than by the page count.
+"""
+import os
+from collections import deque
+
+import fitz  # PyMuPDF
+
+from ocr_engine import (DEFAULT_CONFIG, DEFAULT_DPI, DEFAULT_LANG, MAX_WORKERS, DocumentTooLarge,
+                        iter_ocr_pages, ocr_pages, page_cache_key, page_text_cache, preprocess_name, render_page)
+from word_index import WordIndex
+
+# Pages with less native text than this are treated as scanned
+MIN_TEXT_CHARS = 100
+
+# Documents with more pages than this are refused when opened; 0 disables the check
+# (the per-page pixel limit is ocr_engine.MAX_PAGE_PIXELS)
+MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 500))
+
+# Early-exit OCR (extract_incrementally), opt-in with OCR_EARLY_EXIT=1: scanned pages are OCR'd
+# ahead, up to max_workers at once, and checked in order as they arrive; reading stops (and the pages
+# still in flight are cancelled) once the caller judges its fields complete from at least
+# OCR_EARLY_EXIT_MIN_PAGES pages. Off by default: every page is read (and OCR'd).
+EARLY_EXIT = os.environ.get("OCR_EARLY_EXIT", "0") == "1"
+EARLY_EXIT_MIN_PAGES = int(os.environ.get("OCR_EARLY_EXIT_MIN_PAGES", 1))
+
+
+class PdfDocument:
+    def __init__(self, path=None, stream=None):
+        if stream is not None:
+            self.doc = fitz.open(stream=stream, filetype="pdf")
+        else:
+            self.doc = fitz.open(path)
+        # File the document was opened from (None for a stream), for readers that open it themselves
+        self.path = path
+        if MAX_PAGES and len(self.doc) > MAX_PAGES:
+            pages = len(self.doc)
+            self.doc.close()
+            raise DocumentTooLarge(f"Document of {pages} pages exceeds {MAX_PAGES} pages")
+        self._page_texts = {}
+        # OCR text per (page, settings) and word index per page, so no stage reads a page twice
+        self._ocr_texts = {}
+        self._word_indexes = {}
+        # Per-page routing decision of the last extract_text() call: "text" or "ocr"
+        self.page_sources = []
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.doc.close()
+
+    def page(self, page_no):
+        return self.doc.load_page(page_no)
+
+    def page_text(self, page_no):
+        """Native text of a page, extracted at most once."""
+        if page_no not in self._page_texts:
+            self._page_texts[page_no] = self.page(page_no).get_text()
+        return self._page_texts[page_no]
+
+    def word_index(self, page_no):
+        """WordIndex of a page's native words, built at most once."""
+        if page_no not in self._word_indexes:
+            self._word_indexes[page_no] = WordIndex.from_fitz(self.page(page_no))
+        return self._word_indexes[page_no]
+
+    @property
+    def text(self):
+        return "".join(self.page_text(page_no) for page_no in range(len(self)))
+
+    def page_needs_ocr(self, page_no, min_chars=MIN_TEXT_CHARS):
+        """A page needs OCR when it has no native text, or too little and an image to read."""
+        text = self.page_text(page_no).strip()
+        if not text:
+            return True
+        return len(text) < min_chars and bool(self.page(page_no).get_images())
+
+    def render_page(self, page_no, dpi=DEFAULT_DPI, grayscale=True, clip=None):
+        return render_page(self.page(page_no), dpi, grayscale, clip)
+
+    def region_rect(self, page_no, box):
+        """Page rectangle for a box given as (x0, y0, x1, y1) fractions of the page's width and height."""
+        rect = self.page(page_no).rect
+        x0, y0, x1, y1 = box
+        return fitz.Rect(rect.x0 + x0 * rect.width, rect.y0 + y0 * rect.height,
+                         rect.x0 + x1 * rect.width, rect.y0 + y1 * rect.height)
+
+    def ocr_page(self, page_no, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI, preprocess=None):
+        """OCR a single page, sharing page_text_cache entries with extract_text()."""
+        return self.ocr_page_texts([page_no], lang, config, dpi, preprocess)[page_no]
+
+    def ocr_regions(self, page_no, boxes, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI,
+                    preprocess=None, max_workers=None):
+        """OCR only the given boxes of a page (see region_rect), in parallel; returns their texts in order.
+
+        Each box is rasterized on its own from the page, so nothing outside the boxes is rendered or read.
+        """
+        texts = [None] * len(boxes)
+        pending = []
+        for i, box in enumerate(boxes):
+            image = self.render_page(page_no, dpi, clip=self.region_rect(page_no, box))
+            key = page_cache_key(image, lang, config, dpi, preprocess)
+            text = page_text_cache.get(key)
+            if text is None:
+                pending.append((i, key, image))
+            else:
+                texts[i] = text
+
+        images = [preprocess(image) if preprocess else image for _, _, image in pending]
+        for (i, key, _), text in zip(pending, ocr_pages(images, lang, config, max_workers)):
+            page_text_cache.put(key, text)
+            texts[i] = text
+        return texts
+
+    def iter_ocr_page_texts(self, page_nos, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI,
+                            preprocess=None, max_workers=None):
+        """OCR whole pages in parallel, through page_text_cache, yielding (page_no, text) in order.
+
+        Each page is rendered only when an OCR worker can take it, and dropped once sent,
+        so at most max_workers page images are alive however many pages there are. Pages
+        this document already OCR'd with the same settings are neither rendered nor looked up again.
+        """
+        page_nos = list(page_nos)
+        if not page_nos:
+            return
+        settings = (lang, config, dpi, preprocess_name(preprocess))
+        # [page_no, cache key, text] per page rendered so far, in order; text is None while being OCR'd
+        pages = deque()
+
+        def images():
+            for page_no in page_nos:
+                key = None
+                text = self._ocr_texts.get((page_no,) + settings)
+                if text is None:
+                    # Pages already OCR'd with these settings (e.g. by another template) skip OCR entirely
+                    image = self.render_page(page_no, dpi)
+                    key = page_cache_key(image, lang, config, dpi, preprocess)
+                    text = page_text_cache.get(key)
+                pages.append([page_no, key, text])
+                if text is None:
+                    yield preprocess(image) if preprocess else image
+                    image = None
+
+        def ready():
+            while pages and pages[0][2] is not None:
+                page_no, _, text = pages.popleft()
+                self._ocr_texts[(page_no,) + settings] = text
+                yield page_no, text
+
+        # No more workers than pages, so a single page is OCR'd without starting the pool
+        ocr_texts = iter_ocr_pages(images(), lang, config, min(max_workers or MAX_WORKERS, len(page_nos)))
+        try:
+            for text in ocr_texts:
+                # Texts come back in the order their images were handed over
+                page = next(page for page in pages if page[2] is None)
+                page[2] = text
+                page_text_cache.put(page[1], text)
+                yield from ready()
+            yield from ready()
+        finally:
+            ocr_texts.close()
+
+    def ocr_page_texts(self, page_nos, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI,
+                       preprocess=None, max_workers=None):
+        """OCR whole pages in parallel, through page_text_cache; returns {page_no: text}."""
+        return dict(self.iter_ocr_page_texts(page_nos, lang, config, dpi, preprocess, max_workers))
+
+    def iter_text(self, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI,
+                  min_chars=MIN_TEXT_CHARS, preprocess=None, max_workers=None,
+                  separator="\n", ocr_separator=None):
+        """Yield each page's text (with its separator) in order, OCR'ing nothing before the first scanned page.
+
+        From the first page that needs OCR, it and every later one that does are streamed
+        through iter_ocr_page_texts(): up to max_workers pages are OCR'd ahead while earlier
+        ones are consumed, and closing the generator cancels the rest. self.page_sources
+        grows as pages are yielded, so it covers exactly the pages consumed so far.
+        """
+        if ocr_separator is None:
+            ocr_separator = separator
+        self.page_sources = []
+        ocr_texts = None
+        try:
+            for page_no in range(len(self)):
+                if not self.page_needs_ocr(page_no, min_chars):
+                    self.page_sources.append("text")
+                    yield self.page_text(page_no) + separator
+                    continue
+                if ocr_texts is None:
+                    scanned = [next_page for next_page in range(page_no, len(self))
+                               if self.page_needs_ocr(next_page, min_chars)]
+                    ocr_texts = self.iter_ocr_page_texts(scanned, lang, config, dpi, preprocess, max_workers)
+                _, text = next(ocr_texts)
+                self.page_sources.append("ocr")
+                yield text + ocr_separator
+        finally:
+            if ocr_texts is not None:
+                ocr_texts.close()
+
+    def extract_text(self, lang=DEFAULT_LANG, config=DEFAULT_CONFIG, dpi=DEFAULT_DPI,
+                     min_chars=MIN_TEXT_CHARS, preprocess=None, max_workers=None,
+                     separator="\n", ocr_separator=None):
+        """Hybrid page router: native text where present, OCR only for the pages that need it.
+
+        The decision for each page is recorded in self.page_sources. Each page's text is
+        followed by separator, or by ocr_separator (when given) if the page was OCR'd.
+        """
+        return "".join(self.iter_text(lang, config, dpi, min_chars, preprocess, max_workers,
+                                      separator, ocr_separator))
+
+    def extract_incrementally(self, extract, is_complete, min_pages=None, **text_options):
+        """Early-exit extraction: run extract(text so far) as pages arrive in order, and stop
+        reading once is_complete(result, text so far) holds and min_pages have been read.
+
+        A value matched up to the end of the text read so far may continue on a later page,
+        so is_complete() should only accept fields whose end marker it has seen in the text.
+        Scanned pages keep the OCR pool busy (see iter_text()); those still in flight when
+        reading stops are cancelled. Pages never read are recorded as "skipped" in
+        self.page_sources. text_options are passed to iter_text(). Unless OCR_EARLY_EXIT=1
+        this is extract(self.extract_text()).
+        """
+        if not EARLY_EXIT:
+            return extract(self.extract_text(**text_options))
+        if min_pages is None:
+            min_pages = EARLY_EXIT_MIN_PAGES
+        # Joined only when extract() runs, not once per page
+        texts = []
+        result = None
+        pages = self.iter_text(**text_options)
+        for page_no, page_text in enumerate(pages):
+            texts.append(page_text)
+            result = None
+            # Native pages cost nothing to read, so stopping is only worth it before an OCR page
+            next_page = page_no + 1
+            if next_page < min_pages or next_page == len(self) or not self.page_needs_ocr(
+                    next_page, text_options.get("min_chars", MIN_TEXT_CHARS)):
+                continue
+            text = "".join(texts)
+            result = extract(text)
+            if is_complete(result, text):
+                pages.close()
+                break
+        if result is None:
+            result = extract("".join(texts))
+        self.page_sources += ["skipped"] * (len(self) - len(self.page_sources))
+        return result
@@ -0,0 +1,115 @@
+"""Image preprocessing for OCR: a pipeline of steps over one grayscale array, chosen per insurer.
+
+Pages are already rasterized grayscale (see ocr_engine.render_page), so a
+pipeline starts from a single 8-bit array and each step hands the next the
+array it produced; the image is converted back to PIL once, at the end.
+OpenCV and NumPy are imported on the first call, so selecting a pipeline
+(as icici.py does at import) costs nothing until a page is preprocessed.
+"""
+import os
+
+# Largest skew (degrees) deskew() looks for, and the resolution of its search
+MAX_SKEW = float(os.environ.get("PREPROCESS_MAX_SKEW", 5))
+SKEW_STEP = 0.5
+# Width the page is scaled down to while estimating skew
+SKEW_SAMPLE_WIDTH = 800
+
+
+def to_gray(image):
+    """8-bit grayscale array of a PIL image; "L" images are not converted again.
+
+    Colour goes through OpenCV's RGB-to-gray, as the old icici preprocessing did:
+    PIL's convert("L") rounds differently and shifts some pixels by one level.
+    """
+    import numpy as np
+    if image.mode == "L":
+        return np.asarray(image)
+    import cv2
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY)
+
+
+def _rotate(gray, angle, border=255):
+    import cv2
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+
+
+def skew_angle(gray, max_angle=MAX_SKEW, step=SKEW_STEP):
+    """Rotation that best aligns the text lines with the rows, by projection profile on a small copy."""
+    import cv2
+    import numpy as np
+    scale = min(1.0, SKEW_SAMPLE_WIDTH / gray.shape[1])
+    sample = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    ink = cv2.threshold(sample, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+    best_angle, best_score = 0.0, None
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        # Aligned lines give rows that are either full of ink or empty: the largest variance
+        score = _rotate(ink, angle, border=0).sum(axis=1, dtype=np.int64).var()
+        if best_score is None or score > best_score:
+            best_angle, best_score = round(float(angle), 2), score
+    return best_angle
+
+
+def deskew(gray):
+    angle = skew_angle(gray)
+    return _rotate(gray, angle) if angle else gray
+
+
+def denoise(gray):
+    import cv2
+    # Removes isolated specks from scanning without blurring stroke edges
+    return cv2.medianBlur(gray, 3)
+
+
+def binarize(gray):
+    import cv2
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+
+STEPS = {
+    "deskew": deskew,
+    "denoise": denoise,
+    "binarize": binarize,
+}
+
+
+class Pipeline:
+    """Callable applying the named steps to a PIL image; errors propagate instead of returning the input."""
+
+    def __init__(self, steps):
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {', '.join(unknown)}")
+        self.steps = list(steps)
+        # Identifies the pipeline in OCR cache keys (see ocr_engine.preprocess_name)
+        self.cache_name = f"{__name__}.Pipeline({','.join(self.steps)})"
+
+    def __call__(self, image):
+        from PIL import Image
+        gray = to_gray(image)
+        for step in self.steps:
+            gray = STEPS[step](gray)
+        return Image.fromarray(gray)
+
+    def __repr__(self):
+        return f"Pipeline({self.steps!r})"
+
+
+# Steps used for each insurer's scans when preprocessing is requested
+INSURER_STEPS = {
+    # What icici.preprocess_image has always done
+    "ICICI Lombard": ["binarize"],
+}
+DEFAULT_STEPS = ["binarize"]
+
+
+def pipeline_for(insurer):
+    """The insurer's pipeline; PREPROCESS_<INSURER> (e.g. PREPROCESS_ICICI_LOMBARD=deskew,denoise,binarize) overrides it."""
+    override = os.environ.get("PREPROCESS_" + "_".join(insurer.upper().split()))
+    if override:
+        return Pipeline([step.strip() for step in override.split(",") if step.strip()])
+    return Pipeline(INSURER_STEPS.get(insurer, DEFAULT_STEPS))
@@ -0,0 +1,218 @@
+"""Single entry point for every extractor: classify a letter from its first page, then dispatch in-process.
+
+Usage:
+    python router.py <file.pdf> [--extractor NAME]
+"""
+import argparse
+import importlib.util
+import json
+import re
+import sys
+import threading
+from pathlib import Path
+
+from pdf_document import PdfDocument
+from template_regions import REGIONS_ENABLED
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+def load_script(filename):
+    """Import one of the extractor scripts by file name, once (several are not valid module names)."""
+    with _modules_lock:
+        if filename not in _modules:
+            path = SCRIPT_DIR / filename
+            spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _modules[filename] = module
+        return _modules[filename]
+
+
+def run_data_extractor(module, document):
+    return module.DataExtractor().process_document(document)
+
+
+def run_denial_extractor(module, document):
+    return module.DenialLetterExtractor().process_document(document)
+
+
+def run_info_extractor(module, document):
+    # pdfplumber scripts: they open the file themselves
+    return module.extract_info_from_pdf(document.path)
+
+
+def run_icici_service(module, document):
+    return module.extract_from_pdf(document)
+
+
+class Extractor:
+    def __init__(self, name, script, run, insurer, letter_types):
+        self.name = name
+        self.script = script
+        self.run = run
+        self.insurer = insurer
+        self.letter_types = letter_types
+
+    def extract(self, document):
+        return self.run(load_script(self.script), document)
+
+
+class Route:
+    def __init__(self, name, markers, candidates, scanned_candidates=None):
+        self.name = name
+        self.markers = markers
+        # Extractors tried in order until one returns a usable result
+        self.candidates = candidates
+        self.scanned_candidates = scanned_candidates or candidates
+
+
+EXTRACTORS = {}
+
+
+def register(name, script, run, insurer, letter_types=()):
+    """Add an extractor to the registry under name."""
+    EXTRACTORS[name] = Extractor(name, script, run, insurer, letter_types)
+    return EXTRACTORS[name]
+
+
+register("icici", "icici.py", run_icici_service, "ICICI Lombard",
+         ("Authorization Letter", "Query Letter", "Denied Letter"))
+register("icici_approval", "icici_approval.py", run_data_extractor, "ICICI Lombard", ("Authorization Letter",))
+register("scannedpdf_icici", "scannedpdf_icici.py", run_data_extractor, "ICICI Lombard", ("Authorization Letter",))
+register("scan_spam_icici", "scan_spam_icici.py", run_data_extractor, "ICICI Lombard", ("Authorization Letter",))
+register("care-health_approval", "care-health_approval.py", run_data_extractor, "Care Health", ("Approval Letter",))
+register("care-health_query_denied", "care-health_query_denied.py", run_denial_extractor, "Care Health",
+         ("Denied", "Query"))
+register("mdindia_approval", "mdindia_approval.py", run_info_extractor, "MDIndia", ("Approval",))
+register("mdindia_query_rejection", "mdindia_query_rejection.py", run_info_extractor, "MDIndia",
+         ("Query Letter", "Authorization Denied"))
+register("star_query_denied", "star_query_denied.py", run_info_extractor, "Star Health",
+         ("Query Letter", "Denial Letter"))
+# Same extractor as star_query_denied; only reachable by name
+register("spam", "spam.py", run_info_extractor, "Star Health", ("Query Letter", "Denial Letter"))
+
+ROUTES = [
+    Route("icici_authorization", [r"Authorization\s+Letter\s+to\s+the\s+Hospital"],
+          ["icici_approval", "icici"], ["scannedpdf_icici", "scan_spam_icici", "icici"]),
+    Route("icici_query", [r"ADDITIONAL\s+INFORMATION\s+REQUEST\s+FORM"], ["icici"]),
+    Route("icici_denial", [r"DENIAL\s+OF\s+CASHLESS\s+ACCESS", r"Rejection\s+Letter"], ["icici"]),
+    Route("care_health_approval",
+          [r"Insurer\s+Id\s+of\s+the\s+Patient", r"Total\s+Authorized\s+Amount", r"Authorization\s+remarks",
+           r"Hospital\s+Agreed\s+Tariff"],
+          ["care-health_approval"]),
+    Route("care_health_query_denied",
+          [r"\A\s*denial\s+letter", r"\A[^\n]*NON - REGISTRATION OF CLAIM", r"\A[^\n]*Deficiency\s+Letter"],
+          ["care-health_query_denied"]),
+    Route("mdindia_approval", [r"Cashless\s+Authorisation\s+Letter", r"MD\s+ID\s+No", r"Rohini\s+ID"],
+          ["mdindia_approval"]),
+    Route("mdindia_query_rejection", [r"MDI\s*ID\s*No", r"DENIAL\s+OF\s+AUTHORIZATION\s+LETTER", r"CCN\s*:"],
+          ["mdindia_query_rejection"]),
+    Route("star", [r"Unable\s+to\s+Admit\s+Claim", r"Pre-Authorisation\s+Query", r"Claim\s+Intimation\s+Number",
+                   r"Star\s+Health"],
+          ["star_query_denied"]),
+]
+
+# Used when no marker is found; icici.py falls back to its own letter-type heuristics
+DEFAULT_ROUTE = Route("unknown", [], ["icici"])
+
+# Top band of a scanned first page, where letters print their title, OCR'd alone to classify the
+# scan when template regions are enabled (the whole page would leave nothing for regions to save)
+CLASSIFY_HEADER_BOX = (0.0, 0.0, 1.0, 0.25)
+
+
+def compile_markers(routes):
+    """One alternation of every route's markers, so classifying a page is a single sweep."""
+    marker_routes = {}
+    patterns = []
+    for route in routes:
+        for marker in route.markers:
+            group = f"m{len(patterns)}"
+            marker_routes[group] = route
+            patterns.append(f"(?P<{group}>{marker})")
+    return re.compile("|".join(patterns), re.IGNORECASE), marker_routes
+
+
+MARKER_PATTERN, MARKER_ROUTES = compile_markers(ROUTES)
+
+
+def classify_text(text):
+    """Pick the route whose markers occur most often in text (earlier routes win ties)."""
+    hits = {}
+    for match in MARKER_PATTERN.finditer(text):
+        route = MARKER_ROUTES[match.lastgroup]
+        hits[route.name] = hits.get(route.name, 0) + 1
+    if not hits:
+        return DEFAULT_ROUTE
+    return max(ROUTES, key=lambda route: hits.get(route.name, 0))
+
+
+def classify(document):
+    """Return (route, scanned) from the first page: native text, or OCR if the page is scanned."""
+    if not len(document):
+        return DEFAULT_ROUTE, False
+    if not document.page_needs_ocr(0):
+        return classify_text(document.page_text(0)), False
+    if REGIONS_ENABLED:
+        route = classify_text(document.ocr_regions(0, [CLASSIFY_HEADER_BOX], config='--psm 6', dpi=144)[0])
+        if route is not DEFAULT_ROUTE:
+            return route, True
+    # Same settings as scannedpdf_icici, so its extraction reuses this page's OCR from the cache
+    return classify_text(document.ocr_page(0, config='--psm 6', dpi=144)), True
+
+
+# Keys every extractor fills in whatever the letter says; they don't count as extracted fields
+METADATA_KEYS = {"Letter Type", "Page Sources", "Pages Skipped"}
+
+
+def is_usable(result):
+    """A result with no error and at least one field value ("null" is how some scripts spell none)."""
+    if not result or "error" in result:
+        return False
+    return any(value not in (None, "", "null") for key, value in result.items() if key not in METADATA_KEYS)
+
+
+def extract(pdf_path, extractor=None):
+    """Extract a letter in-process with the named extractor, or the ones its first page routes to."""
+    with PdfDocument(pdf_path) as document:
+        return extract_document(document, extractor)
+
+
+def extract_document(document, extractor=None):
+    """extract() for an open PdfDocument, which classification and every candidate extractor share."""
+    if extractor:
+        candidates = [extractor]
+    else:
+        route, scanned = classify(document)
+        candidates = route.scanned_candidates if scanned else route.candidates
+
+    for name in candidates:
+        try:
+            result = EXTRACTORS[name].extract(document)
+        except Exception as e:
+            print(f"Warning: {name} failed: {e}", file=sys.stderr)
+            continue
+        if is_usable(result):
+            return {"Extractor": name, **result}
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help="PDF letter to extract")
+    parser.add_argument("--extractor", choices=sorted(EXTRACTORS), help="skip classification and use this extractor")
+    args = parser.parse_args()
+
+    result = extract(args.file, args.extractor)
+    if result:
+        print(json.dumps(result, indent=4, ensure_ascii=False))
+    else:
+        print("null")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Extraction shared by the scanned ICICI authorization letter scripts (scannedpdf_icici, scan_spam_icici).
+
+Each script keeps its own field patterns. This reads the template regions of a
+scanned first page, then whole pages only for the fields the regions missed.
+"""
+import re
+
+from template_regions import REGIONS_ENABLED, extract_regions, template_regions
+
+# Where the fields sit on the first page of the letter template
+REGIONS = template_regions("ICICI Lombard", "Authorization Letter")
+
+# Labels that end the remarks; until one has been read, remarks found so far may go on to the next page
+REMARKS_END_PATTERN = re.compile(
+    r'Remarks\s*:?.*?(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless|Terms\s+and\s+Conditions)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+class ScannedAuthorizationExtractor:
+    """Mixin for a DataExtractor with patterns, scanner and extract_field(text, field_name, scan=None)."""
+
+    def use_regions(self, document):
+        """Scanned first page, when template regions are enabled (see template_regions.REGIONS_ENABLED)."""
+        return REGIONS_ENABLED and bool(REGIONS) and len(document) > 0 and document.page_needs_ocr(0, min_chars=1)
+
+    def extract_fields(self, text, field_names):
+        """Values of the given fields in text, or None if there is no text at all."""
+        if not text.strip():
+            return None
+        # One sweep locates every field label; each pattern then only runs at its own label
+        scan = self.scanner.scan(text)
+        return {field_name: self.extract_field(text, field_name, scan) for field_name in field_names}
+
+    def has_all_fields(self, found, text):
+        """Every field found, and the remarks (when wanted) ended within text rather than at a page break."""
+        if found is None or any(value is None for value in found.values()):
+            return False
+        return "Remarks" not in found or REMARKS_END_PATTERN.search(text.rstrip()) is not None
+
+    def extract_all_data(self, document):
+        """Fields of an open PdfDocument, or None if no text could be extracted."""
+        extracted_data = {}
+        # Scanned letters: OCR only the template regions, and the full pages only for fields they miss
+        if self.use_regions(document):
+            extracted_data = extract_regions(document, REGIONS, self.extract_field, config='--psm 6', dpi=144)
+            self.page_sources = ["regions"] + ["skipped"] * (len(document) - 1)
+
+        missing = [field_name for field_name in self.patterns.keys() if extracted_data.get(field_name) is None]
+        if missing:
+            # Pages are read in order; with OCR_EARLY_EXIT=1, OCR stops once every missing field has been found
+            found = document.extract_incrementally(
+                lambda text: self.extract_fields(text, missing),
+                self.has_all_fields,
+                config='--psm 6', dpi=144, min_chars=1
+            )
+            self.page_sources = document.page_sources
+
+            if found is None:
+                print("No text could be extracted from the PDF")
+                return None
+            extracted_data.update(found)
+
+        extracted_data['Letter Type'] = 'Authorization Letter'
+
+        return extracted_data
@@ -2,88 +2,89 @@ import re
 import json
 import sys
 from pathlib import Path
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-import io
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-
-class DataExtractor:
+from field_scanner import FieldScanner
+from ocr_engine import set_tesseract_cmd
+from pdf_document import PdfDocument
+from scanned_authorization import ScannedAuthorizationExtractor
+set_tesseract_cmd(r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+
+FIELD_PATTERNS = {
+    'AL Number': [
+        r'AL\s+Number\s*:?\s*([A-Z0-9\-/]+)',
+        r'Authorization\s+Letter\s+Number\s*:?\s*([A-Z0-9\-/]+)',
+        r'AL\s+No\s*:?\s*([A-Z0-9\-/]+)',
+        r'AL\s+ID\s*:?\s*([A-Z0-9\-/]+)',
+        r'AL\s*:?\s*([A-Z0-9\-/]+)'
+    ],
+    'Approved Amount': [
+        r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
+        r'Amount\s+(?:to\s+be\s+)?(?:sanctioned|approved)\s*:?\s*[Rs\.\s]*(\d+)',
+        r'guarantee\s+for\s+payment\s+of\s+Rs\s*(\d+)',
+        r'Sanctioned\s+Amount\s*:?\s*(\d+)'
+    ],
+    'Date of Admission': [
+        r'Date\s+of\s+Admission\s*:?\s*([^\n:]*?(?:2025|25))'
+    ],
+    'Date of Discharge': [
+        r'Date\s+of\s+Discharge\s*:?\s*([^\n:]*?(?:2025|25))',
+        r'Discharge\s+Date\s*:?\s*([^\n:]*?(?:2025|25))'
+    ],
+    'Name of the Patient': [
+        r'Name\s+of\s+(?:the\s+)?Patient\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)',
+        r'Patient\s+Name\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)',
+        r'Patient\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)'
+    ],
+    'Policy No': [
+        r'Policy\s+No\s*:?\s*([A-Z0-9\/\-]+)',
+        r'Policy\s+Number\s*:?\s*([A-Z0-9\/\-]+)'
+    ],
+    'Policy Period': [
+        r'Policy\s+Period\s*:?\s*([^:\n]*?(?:2025|25))',
+        r'Policy\s+Term\s*:?\s*([^:\n]*?(?:2025|25))'
+    ],
+    'Total Bill Amount': [
+        r'Total\s+Bill\s+Amount\s*:?\s*(\d+)',
+        r'Estimated\s+(?:Bill\s+)?Amount\s*:?\s*(\d+)',
+        r'Bill\s+Amount\s*:?\s*(\d+)'
+    ],
+    'UHID Number': [
+        r'UHID\s+Number\s*:?\s*([A-Z0-9]+)',
+        r'UHID\s*:?\s*([A-Z0-9]+)',
+        r'Hospital\s+ID\s*:?\s*([A-Z0-9]+)'
+    ],
+    'Remarks': [
+        r'Remarks\s*:?\s*\n([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
+        r'Remarks\s*:?\s*([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
+        r'Pre\s*authorization\s+request\s+is\s+approved[^.]*\.[^.]*\.[^.]*\.',
+        r'Remarks\s*:?\s*([^:]+?)(?:\n(?:[A-Z][a-z]+\s+related|Network|Hospital|Amount|Event|Final))'
+    ]
+}
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL
+
+# Compiled once at import and shared by every DataExtractor instance
+PATTERNS = {
+    field: [re.compile(pattern, PATTERN_FLAGS) for pattern in patterns]
+    for field, patterns in FIELD_PATTERNS.items()
+}
+SCANNER = FieldScanner(PATTERNS)
+
+POLICY_PERIOD_LINE_PATTERN = re.compile(r'Policy\s+Period\s*:?.*?\n', re.IGNORECASE)
+
+REMARKS_APPROVED_PATTERN = re.compile(
+    r'Remarks\s*:?.*?\n?(Pre\s*authorization\s+request\s+is\s+approved.*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless|Terms\s+and\s+Conditions))',
+    PATTERN_FLAGS
+)
+REMARKS_GENERIC_PATTERN = re.compile(
+    r'Remarks\s*:?.*?([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless|Terms\s+and\s+Conditions))',
+    PATTERN_FLAGS
+)
+
+class DataExtractor(ScannedAuthorizationExtractor):
     def __init__(self):
-        self.patterns = {
-            'AL Number': [
-                r'AL\s+Number\s*:?\s*([A-Z0-9\-/]+)',
-                r'Authorization\s+Letter\s+Number\s*:?\s*([A-Z0-9\-/]+)',
-                r'AL\s+No\s*:?\s*([A-Z0-9\-/]+)',
-                r'AL\s+ID\s*:?\s*([A-Z0-9\-/]+)',
-                r'AL\s*:?\s*([A-Z0-9\-/]+)'
-            ],
-            'Approved Amount': [
-                r'Final\s+(?:Sanctioned|Approved)\s+Amount\s*:?\s*(\d+)',
-                r'Amount\s+(?:to\s+be\s+)?(?:sanctioned|approved)\s*:?\s*[Rs\.\s]*(\d+)',
-                r'guarantee\s+for\s+payment\s+of\s+Rs\s*(\d+)',
-                r'Sanctioned\s+Amount\s*:?\s*(\d+)'
-            ],
-            'Date of Admission': [
-                r'Date\s+of\s+Admission\s*:?\s*([^\n:]*?(?:2025|25))'
-            ],
-            'Date of Discharge': [
-                r'Date\s+of\s+Discharge\s*:?\s*([^\n:]*?(?:2025|25))',
-                r'Discharge\s+Date\s*:?\s*([^\n:]*?(?:2025|25))'
-            ],
-            'Name of the Patient': [
-                r'Name\s+of\s+(?:the\s+)?Patient\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)',
-                r'Patient\s+Name\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)',
-                r'Patient\s*:?\s*([A-Z][a-zA-Z\s\.]{2,50})(?=\s+UHID|\s+Age|\s+Gender)'
-            ],
-            'Policy No': [
-                r'Policy\s+No\s*:?\s*([A-Z0-9\/\-]+)',
-                r'Policy\s+Number\s*:?\s*([A-Z0-9\/\-]+)'
-            ],
-            'Policy Period': [
-                r'Policy\s+Period\s*:?\s*([^:\n]*?(?:2025|25))',
-                r'Policy\s+Term\s*:?\s*([^:\n]*?(?:2025|25))'
-            ],
-            'Total Bill Amount': [
-                r'Total\s+Bill\s+Amount\s*:?\s*(\d+)',
-                r'Estimated\s+(?:Bill\s+)?Amount\s*:?\s*(\d+)',
-                r'Bill\s+Amount\s*:?\s*(\d+)'
-            ],
-            'UHID Number': [
-                r'UHID\s+Number\s*:?\s*([A-Z0-9]+)',
-                r'UHID\s*:?\s*([A-Z0-9]+)',
-                r'Hospital\s+ID\s*:?\s*([A-Z0-9]+)'
-            ],
-            'Remarks': [
-                r'Remarks\s*:?\s*\n([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
-                r'Remarks\s*:?\s*([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless))',
-                r'Pre\s*authorization\s+request\s+is\s+approved[^.]*\.[^.]*\.[^.]*\.',
-                r'Remarks\s*:?\s*([^:]+?)(?:\n(?:[A-Z][a-z]+\s+related|Network|Hospital|Amount|Event|Final))'
-            ]
-        }
-
-    def extract_text_from_pdf(self, pdf_path):
-        try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-
-                if not page_text.strip():
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    page_text = pytesseract.image_to_string(img, config='--psm 6')
-
-                text += page_text + "\n"
-
-            doc.close()
-            return text
-
-        except Exception as e:
-            print(f"Error extracting text from PDF: {e}")
-            return ""
+        self.page_sources = []
+        self.patterns = PATTERNS
+        self.scanner = SCANNER
 
     def clean_extracted_value(self, value, field_name):
         if not value:
@@ -122,36 +123,38 @@ class DataExtractor:
 
         return value
 
-    def extract_field(self, text, field_name):
+    def extract_field(self, text, field_name, scan=None):
         patterns = self.patterns.get(field_name, [])
 
         if field_name == 'Remarks':
             return self.extract_remarks(text)
 
+        if scan is None:
+            scan = self.scanner.scan(text)
+
+        start = 0
         if field_name in ['Date of Admission', 'Date of Discharge']:
-            policy_match = re.search(r'Policy\s+Period\s*:?.*?\n', text, re.IGNORECASE)
+            policy_match = POLICY_PERIOD_LINE_PATTERN.search(text)
             if policy_match:
-                text = text[policy_match.end():]
+                start = policy_match.end()
 
         for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
-            if matches:
-                value = self.clean_extracted_value(matches[0], field_name)
+            match = scan.first(pattern, start)
+            if match is not None:
+                value = self.clean_extracted_value(match, field_name)
                 if value:
                     return value
 
         return None
 
     def extract_remarks(self, text):
-        pattern1 = r'Remarks\s*:?.*?\n?(Pre\s*authorization\s+request\s+is\s+approved.*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless|Terms\s+and\s+Conditions))'
-        match = re.search(pattern1, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
+        match = REMARKS_APPROVED_PATTERN.search(text)
         if match:
             remarks = match.group(1).strip()
             remarks = re.sub(r'\s+', ' ', remarks)
             return remarks
 
-        pattern2 = r'Remarks\s*:?.*?([^:]*?)(?=(?:Important\s+Note|For\s+Real\s+time|Address|For\s+any\s+cashless|Terms\s+and\s+Conditions))'
-        match = re.search(pattern2, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
+        match = REMARKS_GENERIC_PATTERN.search(text)
         if match:
             remarks = match.group(1).strip()
             remarks = re.sub(r'\s+', ' ', remarks)
@@ -160,51 +163,43 @@ class DataExtractor:
 
         return None
 
-    def extract_all_data(self, pdf_path):
-        text = self.extract_text_from_pdf(pdf_path)
-
-        if not text.strip():
-            print("No text could be extracted from the PDF")
-            return None
-
-        extracted_data = {}
-        for field_name in self.patterns.keys():
-            extracted_data[field_name] = self.extract_field(text, field_name)
-
-        extracted_data['Letter Type'] = 'Authorization Letter'
-
-        return extracted_data
-
     def process_pdf(self, pdf_path):
         try:
             if not Path(pdf_path).exists():
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-            data = self.extract_all_data(pdf_path)
-
-            if data:
-                formatted_data = {
-                    "AL Number": data.get('AL Number'),
-                    "Approved Amount": data.get('Approved Amount'),
-                    "Date of Admission": data.get('Date of Admission'),
-                    "Date of Discharge": data.get('Date of Discharge'),
-                    "Letter Type": data.get('Letter Type'),
-                    "Name of the Patient": data.get('Name of the Patient'),
-                    "Policy No": data.get('Policy No'),
-                    "Policy Period": data.get('Policy Period'),
-                    "Remarks": data.get('Remarks'),
-                    "Total Bill Amount": data.get('Total Bill Amount'),
-                    "UHID Number": data.get('UHID Number')
-                }
-
-                return formatted_data
-            else:
-                return None
+            with PdfDocument(pdf_path) as document:
+                return self.process_document(document)
 
         except Exception as e:
             print(f"Error processing PDF: {e}")
             return None
 
+    def process_document(self, document):
+        """Formatted fields of an open PdfDocument, or None."""
+        data = self.extract_all_data(document)
+
+        if data:
+            formatted_data = {
+                "AL Number": data.get('AL Number'),
+                "Approved Amount": data.get('Approved Amount'),
+                "Date of Admission": data.get('Date of Admission'),
+                "Date of Discharge": data.get('Date of Discharge'),
+                "Letter Type": data.get('Letter Type'),
+                "Name of the Patient": data.get('Name of the Patient'),
+                "Policy No": data.get('Policy No'),
+                "Policy Period": data.get('Policy Period'),
+                "Remarks": data.get('Remarks'),
+                "Total Bill Amount": data.get('Total Bill Amount'),
+                "UHID Number": data.get('UHID Number'),
+                "Page Sources": self.page_sources,
+                "Pages Skipped": self.page_sources.count("skipped")
+            }
+
+            return formatted_data
+        else:
+            return None
+
 def main():
     if len(sys.argv) == 2:
         pdf_path = sys.argv[1]
@@ -0,0 +1,50 @@
+"""Template field regions: where an insurer's letter prints its fields, so scanned pages are OCR'd only there.
+
+Boxes are (x0, y0, x1, y1) fractions of the page, so they hold for any scan
+resolution or page size. They span the full width: labels and values share a
+line, and several field patterns look ahead to the label that follows.
+"""
+import os
+
+# The boxes are estimates that no sample letter has validated yet, so extractors only read regions
+# with OCR_TEMPLATE_REGIONS=1; `benchmark.py regions <scans>` reports how often each box misses a
+# field or disagrees with full-page OCR, and is the check to run before turning it on
+REGIONS_ENABLED = os.environ.get("OCR_TEMPLATE_REGIONS", "0") == "1"
+
+
+class Region:
+    def __init__(self, name, box, fields):
+        self.name = name
+        self.box = box
+        # Fields extracted from this region's text; each field belongs to one region
+        self.fields = fields
+
+
+TEMPLATES = {
+    ("ICICI Lombard", "Authorization Letter"): [
+        Region("details", (0.0, 0.10, 1.0, 0.42),
+               ["AL Number", "Policy No", "Policy Period", "Name of the Patient", "UHID Number",
+                "Date of Admission", "Date of Discharge"]),
+        Region("amounts", (0.0, 0.40, 1.0, 0.62), ["Total Bill Amount", "Approved Amount"]),
+        Region("remarks", (0.0, 0.60, 1.0, 0.88), ["Remarks"]),
+    ],
+}
+
+
+def template_regions(insurer, letter_type):
+    """Regions of an insurer's letter template, or an empty list when it has none."""
+    return TEMPLATES.get((insurer, letter_type), [])
+
+
+def extract_regions(document, regions, extract_field, page_no=0, **ocr_options):
+    """OCR each region of a page and extract its fields from its own text.
+
+    Returns {field: value}; a field is None when its region yielded no text or no
+    match, so the caller can fall back to the full page for it.
+    """
+    texts = document.ocr_regions(page_no, [region.box for region in regions], **ocr_options)
+    data = {}
+    for region, text in zip(regions, texts):
+        for field in region.fields:
+            data[field] = extract_field(text, field) if text.strip() else None
+    return data
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """Build an image-only PDF of the given number of pages (no text layer), and return its path."""
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("PIL")
+
+    def build(name="scan.pdf", pages=1):
+        source = fitz.open()
+        scanned = fitz.open()
+        for i in range(pages):
+            page = source.new_page()
+            page.insert_text((72, 72), f"Scanned page {i + 1}")
+            pix = page.get_pixmap(dpi=72)
+            scanned.new_page(width=page.rect.width, height=page.rect.height).insert_image(
+                page.rect, pixmap=pix)
+        path = tmp_path / name
+        scanned.save(path)
+        return path
+    return build
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Swap in an OCR backend that returns the given page texts in turn and records its calls.
+
+    page_text_cache is disabled so every page reaches the backend, and OCR runs in
+    this process (one worker), so pages are OCR'd in order.
+    """
+    pytest.importorskip("fitz")
+    import ocr_engine
+    import pdf_document
+    calls = []
+
+    def use(*page_texts):
+        def fake_worker(image, lang, config):
+            calls.append(config)
+            return page_texts[(len(calls) - 1) % len(page_texts)]
+        monkeypatch.setattr(ocr_engine, "_ocr_worker", fake_worker)
+        return calls
+
+    monkeypatch.setattr(ocr_engine.page_text_cache, "get", lambda key: None)
+    monkeypatch.setattr(ocr_engine.page_text_cache, "put", lambda key, value: None)
+    monkeypatch.setattr(ocr_engine, "MAX_WORKERS", 1)
+    monkeypatch.setattr(pdf_document, "MAX_WORKERS", 1)
+    return use
@@ -0,0 +1,36 @@
+"""A batch worker opens each document once for its page count, classification and extraction."""
+import pytest
+
+pytest.importorskip("fitz")
+
+import batch  # noqa: E402
+import pdf_document  # noqa: E402
+import router  # noqa: E402
+
+
+def test_process_file_opens_the_document_once(monkeypatch, scanned_pdf):
+    seen = []
+
+    def fake_run(module, document):
+        seen.append(document)
+        return {"Letter Type": "Approval Letter", "AL Number": "AL12345"}
+
+    monkeypatch.setattr(router.EXTRACTORS["care-health_approval"], "run", fake_run)
+    monkeypatch.setattr(batch, "_extractor", "care-health_approval")
+    opened = []
+    original_init = pdf_document.PdfDocument.__init__
+
+    def counting_init(self, *args, **kwargs):
+        opened.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_document.PdfDocument, "__init__", counting_init)
+
+    record = batch.process_file(str(scanned_pdf(pages=3)))
+
+    assert record["status"] == "ok"
+    assert record["pages"] == 3
+    assert record["result"] == {"Extractor": "care-health_approval", "Letter Type": "Approval Letter",
+                                "AL Number": "AL12345"}
+    assert seen == opened
+    assert len(opened) == 1
@@ -0,0 +1,54 @@
+"""Each scanned page of a care-health letter reaches the OCR backend once per extraction."""
+import pytest
+
+pytest.importorskip("fitz")
+
+import ocr_engine  # noqa: E402
+import router  # noqa: E402
+
+APPROVAL_TEXT = """Authorization Letter
+To,
+City Hospital
+12 Main Road, Pune
+Inlias ID: 123
+AL Number: AL12345
+Name of the Patient: Test Patient
+"""
+
+DENIAL_TEXT = """Denial Letter
+To,
+City Hospital
+12 Main Road, Pune
+Inlias ID: 123
+AL Number: AL12345
+"""
+
+
+@pytest.mark.parametrize("pages", [1, 3])
+def test_process_pdf_ocrs_each_page_once(scanned_pdf, fake_ocr, pages):
+    calls = fake_ocr(APPROVAL_TEXT)
+    pdf = scanned_pdf("approval.pdf", pages)
+    module = router.load_script("care-health_approval.py")
+
+    before = ocr_engine.ocr_call_count()
+    result = module.DataExtractor().process_pdf(str(pdf))
+
+    assert result is not None
+    assert result["Page Sources"] == ["ocr"] * pages
+    assert ocr_engine.ocr_call_count() - before == pages
+    assert len(calls) == pages
+
+
+@pytest.mark.parametrize("pages", [1, 3])
+def test_process_denial_letter_ocrs_each_page_once(scanned_pdf, fake_ocr, pages):
+    calls = fake_ocr(DENIAL_TEXT)
+    pdf = scanned_pdf("denial.pdf", pages)
+    module = router.load_script("care-health_query_denied.py")
+
+    before = ocr_engine.ocr_call_count()
+    result = module.DenialLetterExtractor().process_denial_letter(str(pdf))
+
+    assert result is not None
+    assert result["Page Sources"] == ["ocr"] * pages
+    assert ocr_engine.ocr_call_count() - before == pages
+    assert len(calls) == pages
@@ -0,0 +1,77 @@
+"""Early-exit OCR only skips pages once a letter's fields, open-ended sections included, have ended."""
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+
+import icici  # noqa: E402
+import pdf_document  # noqa: E402
+
+QUERY_PAGE_1 = """QUERY LETTER
+Claim of : Ravi Kumar
+UHID : UH12345
+Policy Number : 4016/123/00
+Policy Period : 01-Jan-2025 To 31-Dec-2025
+Date of Admission : 05-Mar-2025
+AL Number : AL998877
+REMARKS :
+Sr No Query Description
+1 Past Medical Surgical History details
+"""
+
+QUERY_PAGE_2 = """2 Investigation Reports with films
+3 Indoor Case Papers complete
+Any Other document required
+"""
+
+AUTHORIZATION_PAGE = """AUTHORIZATION LETTER
+AL Number : 12345-01
+Name of the Patient : Ravi Kumar
+UHID Number : UH12345
+Policy No : 4016/123/00
+Policy Period : 01-Jan-2025 To 31-Dec-2025
+Date of Admission : 05-Mar-2025
+Date of Discharge : 09-Mar-2025
+Total Bill Amount : 50,000
+Approved Amount : 40,000
+Remarks : Approved as per policy terms
+For any cashless queries call us
+"""
+
+QUERY_REASONS = ("1. Past Medical Surgical History details\n"
+                 "2. Investigation Reports with films\n"
+                 "3. Indoor Case Papers complete")
+
+
+def extract(path):
+    with pdf_document.PdfDocument(path) as document:
+        return icici.extract_from_pdf(document, max_workers=1)
+
+
+@pytest.mark.skipif("OCR_EARLY_EXIT" in os.environ, reason="OCR_EARLY_EXIT is set")
+def test_early_exit_is_opt_in():
+    assert not pdf_document.EARLY_EXIT
+
+
+@pytest.mark.parametrize("early_exit", [False, True])
+def test_query_reasons_continue_on_the_next_page(monkeypatch, scanned_pdf, fake_ocr, early_exit):
+    monkeypatch.setattr(pdf_document, "EARLY_EXIT", early_exit)
+    calls = fake_ocr(QUERY_PAGE_1, QUERY_PAGE_2)
+
+    result = extract(scanned_pdf("query.pdf", pages=2))
+
+    assert result["Reason"] == QUERY_REASONS
+    assert result["Page Sources"] == ["ocr", "ocr"]
+    assert len(calls) == 2
+
+
+def test_early_exit_skips_pages_after_a_complete_letter(monkeypatch, scanned_pdf, fake_ocr):
+    monkeypatch.setattr(pdf_document, "EARLY_EXIT", True)
+    calls = fake_ocr(AUTHORIZATION_PAGE, "Terms and conditions\n")
+
+    result = extract(scanned_pdf("authorization.pdf", pages=3))
+
+    assert result["Remarks"] == "Approved as per policy terms"
+    assert result["Page Sources"] == ["ocr", "skipped", "skipped"]
+    assert len(calls) == 1
@@ -0,0 +1,43 @@
+"""Job callbacks only go to allowed hosts."""
+import pytest
+
+from jobs import CallbackNotAllowed, JobQueue
+
+
+def make_queue(callback_hosts=()):
+    return JobQueue(lambda **kwargs: {}, workers=1, callback_hosts=callback_hosts)
+
+
+@pytest.mark.parametrize("url", [
+    "http://hooks.example.com/done",
+    "https://HOOKS.example.com:8443/done?job=1",
+])
+def test_callback_to_an_allowed_host_is_accepted(url):
+    make_queue(["hooks.example.com"]).check_callback(url)
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data",
+    "http://localhost:5000/api/jobs",
+    "http://hooks.example.com@internal.local/",
+    "http://hooks.example.com.evil.test/",
+    "ftp://hooks.example.com/done",
+    "hooks.example.com/done",
+    42,
+])
+def test_callback_off_the_allowlist_is_refused(url):
+    with pytest.raises(CallbackNotAllowed):
+        make_queue(["hooks.example.com"]).check_callback(url)
+
+
+def test_callbacks_are_refused_without_an_allowlist():
+    with pytest.raises(CallbackNotAllowed):
+        make_queue().check_callback("https://hooks.example.com/done")
+
+
+def test_refused_callback_is_not_queued():
+    queue = make_queue(["hooks.example.com"])
+    with pytest.raises(CallbackNotAllowed):
+        queue.submit({}, "http://10.0.0.5/")
+    assert queue.stats()["queued"] == 0
+    assert not queue._threads
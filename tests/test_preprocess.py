@@ -0,0 +1,29 @@
+"""The ICICI pipeline reproduces the old icici.preprocess_image pixel for pixel."""
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+from PIL import Image  # noqa: E402
+
+import preprocess  # noqa: E402
+
+
+def old_preprocess_image(image):
+    """icici.preprocess_image before the pipeline module, without its fall-back-on-error."""
+    array = np.array(image)
+    if len(array.shape) == 3:
+        array = array[:, :, ::-1].copy()
+        gray = cv2.cvtColor(array, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = array
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    return cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((1, 1), np.uint8))
+
+
+@pytest.mark.parametrize("mode, shape", [("RGB", (300, 400, 3)), ("L", (300, 400))])
+def test_icici_pipeline_matches_the_old_preprocessing(mode, shape):
+    image = Image.fromarray(np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8), mode)
+
+    processed = preprocess.pipeline_for("ICICI Lombard")(image)
+
+    assert np.array_equal(np.asarray(processed), old_preprocess_image(image))
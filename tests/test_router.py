@@ -0,0 +1,49 @@
+"""Routing a letter: one open PdfDocument, and fallback past candidates that extract no fields."""
+import pytest
+
+pytest.importorskip("fitz")
+
+import pdf_document  # noqa: E402
+import router  # noqa: E402
+
+
+def test_results_without_field_values_are_not_usable():
+    assert not router.is_usable(None)
+    assert not router.is_usable({"error": "Unreadable PDF"})
+    assert not router.is_usable({"Letter Type": "Authorization Letter", "AL Number": None, "Remarks": "",
+                                 "Page Sources": ["ocr"], "Pages Skipped": 0})
+    assert not router.is_usable({"Letter Type": "null", "Claim Number": "null"})
+    assert router.is_usable({"Letter Type": "Authorization Letter", "AL Number": "AB-12345"})
+
+
+def test_scanned_letter_falls_back_through_candidates_on_one_document(monkeypatch, scanned_pdf, fake_ocr):
+    fake_ocr("Authorization Letter to the Hospital\n")
+    results = {
+        "scannedpdf_icici": {"Letter Type": "Authorization Letter", "AL Number": None, "Page Sources": ["ocr"]},
+        "scan_spam_icici": {"Letter Type": "Authorization Letter", "AL Number": "", "Page Sources": ["ocr"]},
+        "icici": {"Letter Type": "Authorization Letter", "AL Number": "AB-12345"},
+    }
+    documents = []
+
+    def fake_run(name):
+        def run(module, document):
+            documents.append(document)
+            return results[name]
+        return run
+
+    for name in results:
+        monkeypatch.setattr(router.EXTRACTORS[name], "run", fake_run(name))
+    opened = []
+    original_init = pdf_document.PdfDocument.__init__
+
+    def counting_init(self, *args, **kwargs):
+        opened.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_document.PdfDocument, "__init__", counting_init)
+
+    result = router.extract(str(scanned_pdf(pages=2)))
+
+    assert result == {"Extractor": "icici", "Letter Type": "Authorization Letter", "AL Number": "AB-12345"}
+    assert len(opened) == 1
+    assert documents == opened * 3
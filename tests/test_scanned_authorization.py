@@ -0,0 +1,38 @@
+"""Both scanned ICICI authorization scripts read remarks that go on past the first page."""
+import pytest
+
+pytest.importorskip("fitz")
+
+import pdf_document  # noqa: E402
+import router  # noqa: E402
+
+PAGE_1 = """Authorization Letter to the Hospital
+AL Number : AB-12345
+Name of the Patient : Ravi Kumar UHID Number : UH12345
+Policy No : 4016/123/00
+Policy Period : 01-Jan-2025 To 31-Dec-2025
+Date of Admission : 05-Mar-2025
+Date of Discharge : 09-Mar-2025
+Total Bill Amount : 50000
+Final Approved Amount : 40000
+Remarks :
+Pre authorization request is approved for the planned procedure as per policy terms.
+"""
+
+PAGE_2 = """Balance to be settled at discharge.
+For any cashless queries call us
+"""
+
+
+@pytest.mark.parametrize("script", ["scannedpdf_icici.py", "scan_spam_icici.py"])
+@pytest.mark.parametrize("early_exit", [False, True])
+def test_remarks_continue_on_the_next_page(monkeypatch, scanned_pdf, fake_ocr, script, early_exit):
+    monkeypatch.setattr(pdf_document, "EARLY_EXIT", early_exit)
+    calls = fake_ocr(PAGE_1, PAGE_2, "Terms and conditions\n")
+
+    result = router.load_script(script).DataExtractor().process_pdf(str(scanned_pdf(pages=3)))
+
+    assert result["Remarks"] == ("Pre authorization request is approved for the planned procedure as per "
+                                 "policy terms. Balance to be settled at discharge.")
+    assert result["AL Number"] == "AB-12345"
+    assert len(calls) == (2 if early_exit else 3)
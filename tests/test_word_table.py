@@ -0,0 +1,57 @@
+"""Numbered "Sr No" tables read from synthetic pdfplumber words."""
+import word_table
+
+
+def word(text, x0, top, width=None):
+    return {"text": text, "x0": x0, "x1": x0 + (width or 6 * len(text)), "top": top}
+
+
+def line(top, *cells):
+    """Words of one printed line: (x0, "several words") per cell, each word placed after the last."""
+    words = []
+    for x0, text in cells:
+        for text_word in text.split():
+            words.append(word(text_word, x0, top))
+            x0 = words[-1]["x1"] + 4
+    return words
+
+
+TABLE = (
+    line(80, (72, "Dear Sir"))
+    + line(100, (72, "Sr No"), (130, "Reason(s)"))
+    + line(120, (72, "1"), (130, "Policy does not cover"))
+    + line(134.5, (130, "the treatment"))
+    + line(150, (72, "2."), (130, "Documents not submitted"))
+    + line(180, (72, "Thanking you"))
+)
+
+
+def test_cluster_rows_groups_words_by_top_and_orders_them_left_to_right():
+    words = [word("B", 100, 50.5), word("A", 20, 50), word("C", 20, 60)]
+
+    rows = word_table.cluster_rows(words)
+
+    assert [[w["text"] for w in row] for row in rows] == [["A", "B"], ["C"]]
+
+
+def test_numbered_rows_joins_wrapped_lines_and_stops_at_the_margin():
+    assert word_table.numbered_rows(TABLE) == [
+        ("1", "Policy does not cover the treatment"),
+        ("2", "Documents not submitted"),
+    ]
+
+
+def test_numbered_rows_without_a_header_is_empty():
+    assert word_table.numbered_rows(line(100, (72, "1"), (130, "Not a table"))) == []
+
+
+def test_single_word_header_has_no_column_boundary():
+    words = line(100, (72, "Sr.No.Particular(s)")) + line(120, (72, "1"), (130, "Something"))
+
+    assert word_table.numbered_rows(words) == []
+
+
+def test_numbered_row_picks_one_row_by_serial():
+    assert word_table.numbered_row(TABLE) == "Policy does not cover the treatment"
+    assert word_table.numbered_row(TABLE, "2") == "Documents not submitted"
+    assert word_table.numbered_row(TABLE, "3") is None
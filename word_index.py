@@ -0,0 +1,99 @@
+"""Spatial index over one page's words, built once and shared by every layout-based field.
+
+Words keep their original (reading) order, which the layout extractors rely on
+for "the first X" lookups; the index adds a top-sorted view for y-range
+queries by bisection and an exact-text -> positions map for anchors.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class Word:
+    __slots__ = ("x0", "top", "x1", "bottom", "text")
+
+    def __init__(self, x0, top, x1, bottom, text):
+        self.x0 = x0
+        self.top = top
+        self.x1 = x1
+        self.bottom = bottom
+        self.text = text
+
+
+class WordIndex:
+    def __init__(self, words):
+        self.words = words
+        self.by_top = sorted(range(len(words)), key=lambda i: words[i].top)
+        self.tops = [words[i].top for i in self.by_top]
+        # Stripped text -> ascending word positions
+        self.positions = {}
+        for i, word in enumerate(words):
+            self.positions.setdefault(word.text.strip(), []).append(i)
+        self._prefixes = None
+
+    @classmethod
+    def from_fitz(cls, page):
+        """Index a PyMuPDF page's words (x0, y0, x1, y1, text, ...)."""
+        return cls([Word(w[0], w[1], w[2], w[3], w[4]) for w in page.get_text("words")])
+
+    @classmethod
+    def from_pdfplumber(cls, words):
+        """Index the dicts returned by a pdfplumber page's extract_words()."""
+        return cls([Word(w["x0"], w["top"], w["x1"], w["bottom"], w["text"]) for w in words])
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, i):
+        return self.words[i]
+
+    def find(self, texts, after=-1, where=None):
+        """Position of the first word after `after` whose stripped text is one of texts
+        (and for which where(word) holds, when given), or None."""
+        if isinstance(texts, str):
+            texts = [texts]
+        best = None
+        for text in texts:
+            positions = self.positions.get(text, [])
+            for i in positions[bisect_right(positions, after):]:
+                if best is not None and i >= best:
+                    break
+                if where is None or where(self.words[i]):
+                    best = i
+                    break
+        return best
+
+    def find_prefix(self, prefix, after=-1, where=None):
+        """Like find(), for every distinct stripped text starting with prefix."""
+        if self._prefixes is None:
+            self._prefixes = sorted(self.positions)
+        start = bisect_left(self._prefixes, prefix)
+        end = start
+        while end < len(self._prefixes) and self._prefixes[end].startswith(prefix):
+            end += 1
+        return self.find(self._prefixes[start:end], after, where)
+
+    def first(self, predicate, after=-1):
+        """Position of the first word after `after` for which predicate(word) holds, or None.
+
+        For conditions the text map can't answer (substrings, shapes such as a PIN code).
+        """
+        for i in range(after + 1, len(self.words)):
+            if predicate(self.words[i]):
+                return i
+        return None
+
+    def band(self, top_min, top_max, x_max=None, before=None):
+        """Positions, in original order, of words with top_min < top < top_max (and x0 < x_max,
+        and position < before, when given)."""
+        start = bisect_right(self.tops, top_min)
+        end = bisect_left(self.tops, top_max, start)
+        selected = [i for i in self.by_top[start:end]
+                    if (x_max is None or self.words[i].x0 < x_max) and (before is None or i < before)]
+        return sorted(selected)
+
+    def lines(self, positions, ndigits=1):
+        """Words at positions grouped into lines by rounded top, top to bottom, as joined strings."""
+        lines = {}
+        for i in positions:
+            word = self.words[i]
+            lines.setdefault(round(word.top, ndigits), []).append(word.text)
+        return [' '.join(lines[y]) for y in sorted(lines)]
@@ -0,0 +1,71 @@
+"""Numbered tables ("Sr No | Particular(s)" / "Sr No | Reason(s)") read from a pdfplumber page's words.
+
+Words are clustered into rows by their top coordinate; the header row fixes
+where the serial-number column ends and the text column starts, and wrapped
+lines of a cell (indented at the text column) are joined to their row.
+"""
+import re
+
+# Words whose tops differ by less than this (in points) are on the same row
+ROW_TOLERANCE = 3
+
+SERIAL_PATTERN = re.compile(r"^(\d+)[.)]?$")
+
+
+def cluster_rows(words, tolerance=ROW_TOLERANCE):
+    """Group words into rows, top to bottom, each row ordered left to right."""
+    rows = []
+    for word in sorted(words, key=lambda word: (word["top"], word["x0"])):
+        if rows and word["top"] - rows[-1][0]["top"] < tolerance:
+            rows[-1].append(word)
+        else:
+            rows.append([word])
+    return [sorted(row, key=lambda word: word["x0"]) for row in rows]
+
+
+def _normalize(text):
+    return re.sub(r"[\s.]", "", text).lower()
+
+
+def _header_split(row):
+    """Where the text column starts in a header row beginning with "Sr No", or None if it isn't one."""
+    label = ""
+    for i, word in enumerate(row):
+        label += _normalize(word["text"])
+        if label == "srno":
+            return row[i + 1]["x0"] if i + 1 < len(row) else row[i]["x1"]
+        # "Sr.No.Particular(s)" extracted as a single word has no usable column boundary
+        if not "srno".startswith(label):
+            return None
+    return None
+
+
+def numbered_rows(words, tolerance=ROW_TOLERANCE):
+    """[(serial, text)] for the first numbered table among words, or [] if there is none."""
+    rows = cluster_rows(words, tolerance)
+    for header_index, header in enumerate(rows):
+        text_x = _header_split(header)
+        if text_x is None:
+            continue
+
+        entries = []
+        for row in rows[header_index + 1:]:
+            serial = SERIAL_PATTERN.match(row[0]["text"])
+            if serial and row[0]["x1"] <= text_x + tolerance:
+                entries.append((serial.group(1), [word["text"] for word in row[1:]]))
+            elif entries and row[0]["x0"] >= text_x - tolerance:
+                # A wrapped line of the previous row's cell
+                entries[-1][1].extend(word["text"] for word in row)
+            elif entries or row[0]["x0"] < text_x - tolerance:
+                # Back at the left margin: the table is over
+                break
+        return [(serial, " ".join(cell)) for serial, cell in entries]
+    return []
+
+
+def numbered_row(words, serial="1"):
+    """Text of the row numbered serial in the first numbered table among words, or None."""
+    for number, text in numbered_rows(words):
+        if number == serial and text:
+            return text
+    return None